@@ -0,0 +1,315 @@
+"""
+Read-only JSON API over the same order store and computations as the dashboard.
+
+    python api.py --port 8080          # stdlib asyncio server, no extra dependencies
+    uvicorn api:app --port 8080        # or any ASGI server
+
+    GET /health
+    GET /orders?start=2025-01-01&end=2025-02-01&year=&q=&page=1&page_size=100
+    GET /orders/<order_id>
+    GET /analytics/years
+    GET /analytics/<year>
+    GET /forecast?engine=&horizon=12
+
+Responses are cached per data version and request, and carry an ETag derived
+from both, so If-None-Match is answered with 304 before anything is computed.
+Data and results come from utils/core (one cached frame per data version, shared
+by every request); computation runs in a thread pool, and concurrent identical
+requests share one computation. Phone numbers are masked as in the Schedule tab.
+
+Orders carry customer names and details, so everything but /health needs
+`Authorization: Bearer <API_TOKEN>` when the API_TOKEN setting is set; without
+one, only loopback clients are answered and the server won't bind elsewhere.
+"""
+import sys
+import hmac
+import json
+import asyncio
+import hashlib
+import ipaddress
+import argparse
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+
+import pandas as pd
+
+import utils
+import core
+import storage
+import backtest
+import forecasting
+
+MAX_PAGE_SIZE = 1000
+CACHE_ENTRIES = 512
+ORDER_FIELDS = ['Order_ID'] + storage.ORDER_COLS
+
+API_STATS = {"requests": 0, "hits": 0, "misses": 0, "not_modified": 0, "shared": 0, "unauthorized": 0}
+_LOCK = threading.Lock()
+_RESPONSES = OrderedDict()  # (version, path, query) -> JSON body
+_INFLIGHT = {}
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# --- 1. HANDLERS (plain data in, JSON-ready dicts out) ---
+def _records(frame):
+    return json.loads(frame.to_json(orient='records', date_format='iso', force_ascii=False))
+
+def _int(query, name, default=None, lo=None, hi=None):
+    raw = query.get(name, default)
+    if raw in (None, ""):
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be an integer")
+    if (lo is not None and value < lo) or (hi is not None and value > hi):
+        raise ApiError(400, f"'{name}' must be between {lo} and {hi}")
+    return value
+
+def _date(query, name):
+    raw = query.get(name)
+    if not raw:
+        return None
+    try:
+        return pd.Timestamp(raw)
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be a date (YYYY-MM-DD)")
+
+def orders(df, query):
+    """Valid-dated orders in [start, end) / year / text, oldest first, one page at a time"""
+    rows = storage.filter_orders(df, _date(query, 'start'), _date(query, 'end'), _int(query, 'year'), query.get('q') or None)
+    rows = rows.sort_values('Date', kind='stable')
+    size = _int(query, 'page_size', 100, 1, MAX_PAGE_SIZE)
+    pages = max(1, -(-len(rows) // size))
+    page = _int(query, 'page', 1, 1, pages)
+    out = rows.iloc[(page - 1) * size:page * size][ORDER_FIELDS].copy()
+    out['Phone_Number'] = utils.mask_phone_numbers(out['Phone_Number'])
+    return {"total": len(rows), "page": page, "pages": pages, "page_size": size, "orders": _records(out)}
+
+def order(df, order_id):
+    rows = utils.get_store().get(order_id)  # O(1) through the store's ID index
+    if rows.empty:
+        raise ApiError(404, f"Order '{order_id}' not found")
+    out = rows.iloc[[-1]][ORDER_FIELDS].copy()
+    out['Phone_Number'] = utils.mask_phone_numbers(out['Phone_Number'])
+    return _records(out)[0]
+
+def years(df, query):
+    return {"years": core.year_list(df)}
+
+def analytics(df, year):
+    """The Analytics tab's numbers for one year"""
+    kpis = core.yearly_kpis(df, year)
+    if kpis is None:
+        raise ApiError(404, f"No orders in {year}")
+    return {
+        "year": year,
+        "kpis": {k: (v.item() if hasattr(v, 'item') else v) for k, v in kpis.items()},
+        "monthly": _records(core.monthly_sales(df, year)),
+        "events": _records(core.event_counts(df, year)),
+        "top_clients": _records(core.top_clients(df, year)),
+        "staffing": _records(core.staffing_intensity(df, year)),
+        "top_dishes": _records(core.dish_counts(df, year)),
+    }
+
+def forecast(df, query):
+    """Monthly outlook from the chosen engine (default: best in the backtest)"""
+    engine = query.get('engine') or backtest.best_engine(backtest.get_backtest(df))
+    if engine not in forecasting.ENGINES:
+        raise ApiError(400, f"Unknown engine '{engine}' (use one of {', '.join(forecasting.ENGINES)})")
+    horizon = _int(query, 'horizon', 12, 1, 36)
+    outlook = core.forecast_outlook(df, engine, horizon)
+    if outlook is None:
+        raise ApiError(404, "Need more than 6 months of history to forecast")
+    outlook = outlook.assign(Month=outlook['Month'].astype(str))
+    return {"engine": engine, "label": forecasting.ENGINES[engine].label, "horizon": horizon, "outlook": _records(outlook)}
+
+def route(df, path, query):
+    parts = [p for p in path.split('/') if p]
+    if parts == ['orders']:
+        return orders(df, query)
+    if len(parts) == 2 and parts[0] == 'orders':
+        return order(df, parts[1])
+    if parts == ['analytics', 'years']:
+        return years(df, query)
+    if len(parts) == 2 and parts[0] == 'analytics':
+        return analytics(df, _int({'year': parts[1]}, 'year'))
+    if parts == ['forecast']:
+        return forecast(df, query)
+    raise ApiError(404, f"No route for /{'/'.join(parts)}")
+
+# --- 2. CACHED DISPATCH ---
+def _etag(version, path, query):
+    h = hashlib.blake2b(repr((version, path, sorted(query.items()))).encode(), digest_size=12)
+    return f'"{h.hexdigest()}"'
+
+def _is_loopback(host):
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == "localhost"
+
+def _authorized(headers, client):
+    """Bearer API_TOKEN when one is set; otherwise only requests from this machine"""
+    token = utils.get_setting("API_TOKEN")
+    if token:
+        return hmac.compare_digest(headers.get('authorization', '').encode(), f"Bearer {token}".encode())
+    return client is not None and _is_loopback(client)
+
+def _json(status, payload, extra=()):
+    body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+    return status, [('content-type', 'application/json; charset=utf-8'), *extra], body
+
+async def handle(method, path, query, headers, client=None):
+    """(status, headers, body) for one request; headers are lower-cased, client is the peer's host"""
+    with _LOCK:
+        API_STATS["requests"] += 1
+    if method not in ('GET', 'HEAD'):
+        return _json(405, {"error": "Read-only API: use GET"}, [('allow', 'GET, HEAD')])
+    loop = asyncio.get_running_loop()
+    df = await loop.run_in_executor(None, utils.get_data)  # stat check; re-parses only after a write
+    version = df.attrs.get('data_version')
+    if path.rstrip('/') in ('', '/health'):
+        return _json(200, {"status": "ok" if not df.empty else "no data", "data_version": version, "stats": dict(API_STATS)})
+    if not _authorized(headers, client):
+        with _LOCK:
+            API_STATS["unauthorized"] += 1
+        return _json(401, {"error": "Missing or wrong API token"}, [('www-authenticate', 'Bearer')])
+
+    key = (version, path.rstrip('/'), tuple(sorted(query.items())))
+    etag = _etag(*key[:2], query)
+    common = [('etag', etag), ('x-data-version', str(version)), ('cache-control', 'no-cache')]
+    if etag in [t.strip() for t in headers.get('if-none-match', '').split(',')]:
+        with _LOCK:
+            API_STATS["not_modified"] += 1
+        return 304, common, b''
+
+    with _LOCK:
+        cached = _RESPONSES.get(key)
+        if cached is not None:
+            _RESPONSES.move_to_end(key)
+            API_STATS["hits"] += 1
+    if cached is not None:
+        return 200, [('content-type', 'application/json; charset=utf-8'), *common], cached
+
+    # Single flight: concurrent identical requests wait for the first one's result
+    pending = _INFLIGHT.get(key)
+    if pending is not None:
+        with _LOCK:
+            API_STATS["shared"] += 1
+        status, body = await asyncio.shield(pending)
+    else:
+        pending = _INFLIGHT[key] = loop.create_future()
+        try:
+            try:
+                payload = await loop.run_in_executor(None, route, df, key[1], query)
+                status, body = 200, json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+                with _LOCK:
+                    API_STATS["misses"] += 1
+                    _RESPONSES[key] = body
+                    while len(_RESPONSES) > CACHE_ENTRIES:
+                        _RESPONSES.popitem(last=False)
+            except ApiError as e:
+                status, body = e.status, json.dumps({"error": str(e)}).encode('utf-8')
+            except Exception as e:
+                print(f"❌ API error on {path}: {e}")
+                status, body = 500, json.dumps({"error": "Internal error"}).encode('utf-8')
+            pending.set_result((status, body))
+        finally:
+            _INFLIGHT.pop(key, None)
+            if not pending.done():
+                pending.cancel()
+    return status, [('content-type', 'application/json; charset=utf-8'), *(common if status == 200 else [])], body
+
+def _query(raw):
+    return {k: v[-1] for k, v in parse_qs(raw, keep_blank_values=True).items()}
+
+# --- 3. ASGI APP ---
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            msg = await receive()
+            if msg['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif msg['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+    client = (scope.get('client') or [None])[0]
+    status, out, body = await handle(scope['method'], scope['path'], _query(scope.get('query_string', b'').decode()), headers, client)
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(k.encode(), v.encode()) for k, v in out] + [(b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
+
+# --- 4. STDLIB SERVER (HTTP/1.1 keep-alive) ---
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+async def _serve_client(reader, writer):
+    client = (writer.get_extra_info('peername') or [None])[0]
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                method, target, version = line.decode('latin-1').split()
+            except ValueError:
+                break
+            headers = {}
+            while True:
+                h = await reader.readline()
+                if h in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = h.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if int(headers.get('content-length') or 0):
+                await reader.readexactly(int(headers['content-length']))
+            url = urlsplit(target)
+            status, out, body = await handle(method, url.path, _query(url.query), headers, client)
+            keep = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+            head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", *(f"{k}: {v}" for k, v in out),
+                    f"content-length: {len(body)}", f"connection: {'keep-alive' if keep else 'close'}"]
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + (b'' if method == 'HEAD' else body))
+            await writer.drain()
+            if not keep:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(host="127.0.0.1", port=8080, ready=None):
+    if not utils.get_setting("API_TOKEN") and not _is_loopback(host):
+        raise SystemExit(f"❌ Refusing to serve orders on {host} without an API_TOKEN setting")
+    server = await asyncio.start_server(_serve_client, host, port, limit=1 << 16)
+    if ready is not None:
+        ready(server.sockets[0].getsockname()[1])
+    async with server:
+        await server.serve_forever()
+
+def start(host="127.0.0.1", port=0):
+    """Runs the server on a background thread; returns its base URL (for tests/benchmarks)"""
+    started = threading.Event()
+    bound = {}
+    def ready(p):
+        bound['port'] = p
+        started.set()
+    threading.Thread(target=lambda: asyncio.run(serve(host, port, ready)), name="api-server", daemon=True).start()
+    started.wait(30)
+    return f"http://{host}:{bound['port']}"
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="ZuljaOS read-only JSON API")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    args = ap.parse_args()
+    utils.get_data()  # load (or migrate) once before accepting requests
+    print(f"🍱 ZuljaOS API on http://{args.host}:{args.port}  (Ctrl+C to stop)")
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -1,13 +1,30 @@
 import streamlit as st
-from utils import load_data
-from tabs.schedule import render_schedule
-from tabs.analytics import render_analytics
-from tabs.forecast import render_forecast
-from tabs.order import render_order
+import perf
+# Data, ML and AI modules (pandas, scikit-learn, Altair, OpenAI) are imported after login,
+# and each tab's module only when that tab is open, so the login screen starts fast.
 
 # --- CONFIG ---
 st.set_page_config(page_title="Zulja Operations OS", layout="wide", page_icon="🍱")
 
+def render_perf_panel(run):
+    """Developer view of this rerun's spans plus buffered stats (opt-in from the sidebar)"""
+    import pandas as pd
+    with st.expander("⏱️ Performance", expanded=True):
+        spans = pd.DataFrame(perf.records(run), columns=perf.FIELDS)
+        st.caption(f"This rerun: {len(spans)} spans")
+        view = spans.assign(span=["· " * d + n for d, n in zip(spans['depth'], spans['span'])])
+        st.dataframe(view[['span', 'ms', 'mem_kb']], hide_index=True, use_container_width=True)
+        st.caption("Buffered history")
+        st.dataframe(pd.DataFrame(perf.summary()), hide_index=True, use_container_width=True)
+        from utils import get_chart_payloads
+        payloads = get_chart_payloads()
+        if payloads:
+            st.caption("Chart payloads (last build)")
+            st.dataframe(pd.DataFrame(payloads), hide_index=True, use_container_width=True)
+        c1, c2 = st.columns(2)
+        c1.download_button("JSON", perf.export_json(), "perf_spans.json", "application/json")
+        c2.download_button("CSV", perf.export_csv(), "perf_spans.csv", "text/csv")
+
 def main():
     # --- 🔐 SECURITY CHECK ---
     # Check if the user is already logged in
@@ -32,46 +49,66 @@ def main():
         return  # <--- STOPS the app here if not logged in
 
     # --- 🚀 MAIN APP STARTS HERE (Only runs if logged in) ---
+    run = perf.start_run()
     st.title("🍱 Zulja Operations OS")
     st.caption("v2026.1 - Live Operations Dashboard")
     
-    # 1. Load Data
-    full_df = load_data()
+    # 1. Load Data (shared cached frame; tabs compute through core.py)
+    from utils import get_data, get_load_stats, get_llm_cache_stats, get_setting
+    full_df = get_data()
     
     if full_df.empty:
         st.error("⚠️ Database not found. Please check 'cleaned_revenue_data.csv'.")
         return
 
-    # 2. Filter Valid Data
-    df_valid = full_df[full_df['Date_Valid']].copy()
-
-    # 3. Sidebar Logout
+    # 2. Sidebar Logout
     with st.sidebar:
         st.write(f"Logged in as: **Manager**")
+        stats = get_load_stats()
+        st.caption(f"🗄️ Data cache: {stats['hits']} hits · {stats['misses']} misses · {stats['snapshot_hits']} snapshot loads")
+        ai = get_llm_cache_stats()
+        st.caption(f"🧠 AI cache: {ai['hits']} hits ({ai['hit_ms']:.0f} ms) · {ai['misses'] + ai['bypassed']} live calls ({ai['miss_ms']:.0f} ms)")
+        show_perf = st.checkbox("🛠️ Performance panel", key="perf_panel")
         if st.button("Logout"):
             st.session_state.authenticated = False
             st.rerun()
 
-    # 4. Create Tabs
+    # 3. Create Tabs (tracked, so hidden tabs neither run nor import their dependencies)
     tab1, tab2, tab3, tab4 = st.tabs([
         "📅 Schedule", 
         "📊 Analytics", 
         "🔮 Forecast (ML)", 
         "➕ New Order"
-    ])
+    ], key="main_tab", on_change="rerun")
 
-    # 5. Render Tabs
-    with tab1:
-        render_schedule(df_valid, full_df)
+    # 4. Render the open tab
+    if tab1.open:
+        with tab1:
+            from tabs.schedule import render_schedule
+            render_schedule()
     
-    with tab2:
-        render_analytics(df_valid)
+    if tab2.open:
+        with tab2:
+            from tabs.analytics import render_analytics
+            render_analytics()
         
-    with tab3:
-        render_forecast(df_valid)
+    if tab3.open:
+        with tab3:
+            from tabs.forecast import render_forecast
+            render_forecast()
         
-    with tab4:
-        render_order(full_df)
+    if tab4.open:
+        with tab4:
+            from tabs.order import render_order
+            render_order()
+
+    # 5. Instrumentation (PERF_METRICS_FILE: OpenMetrics text file for a scraper)
+    metrics_file = get_setting("PERF_METRICS_FILE")
+    if metrics_file:
+        perf.write_openmetrics(metrics_file)
+    if show_perf:
+        with st.sidebar:
+            render_perf_panel(run)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
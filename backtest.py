@@ -0,0 +1,157 @@
+"""
+Walk-forward backtest of the forecasting engines.
+
+Each engine is refitted on an expanding window of the monthly history and scored
+on the next HORIZON months it has not seen, for every cut-off from MIN_TRAIN
+months on. Engines run in parallel in a process pool. Results are cached per
+data version (memory and .cache/backtest.pkl) and the Forecast tab uses the
+engine with the lowest revenue MAPE.
+
+    python backtest.py            # score every engine on cleaned_revenue_data.csv
+"""
+import os
+import sys
+import time
+import pickle
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import forecasting
+
+MIN_TRAIN = 12
+HORIZON = 3
+BACKTEST_FORMAT = 1
+CACHE_FILE = os.path.join(forecasting.CACHE_DIR, 'backtest.pkl')
+
+_LOCK = threading.Lock()
+_CACHE = {"key": None, "results": None}
+
+# --- 1. WALK-FORWARD ---
+def walk_forward(series, engine, min_train=MIN_TRAIN, horizon=HORIZON):
+    """Errors of one engine over every expanding-window cut-off; returns a metrics dict"""
+    errors = {name: [] for name in forecasting.TARGETS}
+    actuals = {name: [] for name in forecasting.TARGETS}
+    fit_seconds = []
+    for cut in range(min_train, len(series)):
+        train, test = series.iloc[:cut], series.iloc[cut:cut + horizon]
+        t0 = time.perf_counter()
+        model = forecasting.ENGINES[engine]().fit(train)
+        fit_seconds.append(time.perf_counter() - t0)
+        pred = model.predict(test.index)
+        for name in forecasting.TARGETS:
+            errors[name].append(pred[name].to_numpy() - test[name].to_numpy())
+            actuals[name].append(test[name].to_numpy())
+
+    row = {'Engine': engine, 'Label': forecasting.ENGINES[engine].label, 'Folds': len(fit_seconds),
+           'Fit_ms': 1000 * float(np.mean(fit_seconds)) if fit_seconds else np.nan}
+    for name in forecasting.TARGETS:
+        err = np.concatenate(errors[name]) if errors[name] else np.array([])
+        act = np.concatenate(actuals[name]) if actuals[name] else np.array([])
+        nz = act > 0  # MAPE is undefined for empty months
+        row[f'{name}_MAE'] = float(np.abs(err).mean()) if len(err) else np.nan
+        row[f'{name}_MAPE'] = float(100 * np.abs(err[nz] / act[nz]).mean()) if nz.any() else np.nan
+    return row
+
+def _score(args):
+    series, engine = args
+    return walk_forward(series, engine)
+
+def run_backtest(series, engines=None, workers=None):
+    """Scores engines in parallel (one process per engine); DataFrame sorted by revenue MAPE"""
+    engines = list(engines or forecasting.ENGINES)
+    workers = workers or min(len(engines), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+            rows = list(pool.map(_score, [(series, e) for e in engines]))
+    else:
+        rows = [_score((series, e)) for e in engines]
+    return pd.DataFrame(rows).sort_values(['Revenue_MAPE', 'Revenue_MAE'], na_position='last').reset_index(drop=True)
+
+def best_engine(results):
+    if results is None or results.empty or results['Revenue_MAPE'].isna().all():
+        return forecasting.DEFAULT_ENGINE
+    return results.iloc[0]['Engine']
+
+# --- 2. CACHE ---
+def _cache_key(version):
+    return (version, BACKTEST_FORMAT, forecasting.MODEL_FORMAT, tuple(forecasting.ENGINES))
+
+def _read_disk():
+    try:
+        with open(CACHE_FILE, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"❌ Backtest cache unreadable, re-running: {e}")
+        return None
+
+def _refresh(df, key, workers=None):
+    series = forecasting.monthly_series(df)
+    if len(series) <= MIN_TRAIN:
+        return None
+    results = run_backtest(series, workers=workers)
+    try:
+        os.makedirs(forecasting.CACHE_DIR, exist_ok=True)
+        tmp = f"{CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump({"key": key, "results": results}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, CACHE_FILE)
+    except Exception as e:
+        print(f"❌ Could not save backtest results: {e}")
+    with _LOCK:
+        _CACHE.update(key=key, results=results)
+    return results
+
+def _refresh_in_background(df, key):
+    try:
+        _refresh(df, key)
+    except Exception as e:
+        print(f"❌ Backtest failed: {e}")
+    finally:
+        _RUNNING.clear()
+
+_RUNNING = threading.Event()
+
+def get_backtest(df, workers=None):
+    """
+    Backtest results for df's data version (memory -> disk -> run). When only an older
+    version's results exist they are returned at once and a re-run starts in the
+    background, so saving an order never blocks the Forecast tab. None if history is too short.
+    """
+    key = _cache_key(df.attrs.get('data_version'))
+    with _LOCK:
+        if _CACHE["key"] == key:
+            return _CACHE["results"]
+        stale = _CACHE["results"]
+
+    blob = _read_disk()
+    if blob is not None and blob.get("key") == key:
+        with _LOCK:
+            _CACHE.update(key=key, results=blob["results"])
+        return blob["results"]
+    if stale is None and blob is not None and blob.get("key", (None,))[1:] == key[1:]:
+        stale = blob["results"]
+
+    if stale is None:
+        return _refresh(df, key, workers)
+    if not _RUNNING.is_set():
+        _RUNNING.set()
+        threading.Thread(target=_refresh_in_background, args=(df, key), daemon=True).start()
+    return stale
+
+if __name__ == "__main__":
+    import warnings
+    import storage
+    warnings.filterwarnings("ignore")
+    path = sys.argv[1] if len(sys.argv) > 1 else storage.DATA_FILE
+    series = forecasting.monthly_series(storage.CsvStore(path).load())
+    print(f"{len(series)} months ({series.index[0]} – {series.index[-1]}), cut-offs from month {MIN_TRAIN}, {HORIZON}-month horizon")
+    t0 = time.perf_counter()
+    res = run_backtest(series)
+    print(res.drop(columns=['Engine']).round(1).to_string(index=False))
+    print(f"Best: {best_engine(res)}  ({time.perf_counter() - t0:.1f}s)")
@@ -0,0 +1 @@
+"""Offline benchmarks and synthetic data for ZuljaOS (not imported by the app)."""
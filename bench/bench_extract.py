@@ -0,0 +1,70 @@
+"""
+WhatsApp extraction benchmark against the local stub server.
+
+    python -m bench.bench_extract --messages 60 --latency 0.4 --fail-rate 0.1
+
+Compares the original one-message-per-call path (new sync client per message)
+with whatsapp.extract_batch (pooled async client, semaphore, token bucket,
+retries). No real API key or network access is needed.
+"""
+import argparse
+import time
+
+from openai import OpenAI
+
+from bench import stub_openai
+from whatsapp import build_prompt, parse_reply, extract_batch
+
+SAMPLES = [
+    "Salam, nak tempah {pax} pax nasi minyak untuk majlis kenduri kahwin pada {d}/3/2026. Rate RM18. Lokasi Gombak",
+    "Assalamualaikum kak, order {pax} bungkus nasi lemak + ayam goreng, tarikh {d}/4/2026, hantar ke DBKL HQ",
+    "Boleh buat buffet {pax} org? Menu nasi beriani, daging kicap, dalca, buah, sirap. Tarikh {d}/5/2026",
+]
+
+def messages(n):
+    return [SAMPLES[i % len(SAMPLES)].format(pax=20 + 10 * (i % 30), d=1 + i % 28) for i in range(n)]
+
+def sequential(texts, base_url):
+    """The original get_ai_extraction() loop: one blocking call, one fresh client per message"""
+    ok = 0
+    for t in texts:
+        try:
+            client = OpenAI(api_key="stub", base_url=base_url)
+            resp = client.chat.completions.create(
+                model="gpt-4o-mini", messages=[{"role": "user", "content": build_prompt(t)}], temperature=0)
+            parse_reply(resp.choices[0].message.content)
+            ok += 1
+        except Exception:
+            pass
+    return ok
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--messages", type=int, default=60)
+    ap.add_argument("--latency", type=float, default=0.4)
+    ap.add_argument("--fail-rate", type=float, default=0.1)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rpm", type=float, default=600)
+    ap.add_argument("--skip-sequential", action="store_true")
+    args = ap.parse_args()
+
+    server, url = stub_openai.start(latency=args.latency, fail_rate=args.fail_rate)
+    texts = messages(args.messages)
+    print(f"{len(texts)} messages, stub latency {args.latency}s, 429 rate {args.fail_rate:.0%}")
+
+    if not args.skip_sequential:
+        t0 = time.perf_counter()
+        ok = sequential(texts, url)
+        dt = time.perf_counter() - t0
+        print(f"{'sequential':>11}: {dt:7.2f}s  {len(texts) / dt:6.1f} msg/s  ok={ok}/{len(texts)}")
+
+    stub_openai.STATS.update(requests=0, rate_limited=0, max_in_flight=0)
+    results, stats = extract_batch(texts, "stub", url, concurrency=args.concurrency, rpm=args.rpm, backoff=0.2)
+    ok = sum(1 for data, err in results if data)
+    dt = stats["seconds"]
+    print(f"{'batch':>11}: {dt:7.2f}s  {len(texts) / dt:6.1f} msg/s  ok={ok}/{len(texts)}  retries={stats['retries']}  "
+          f"peak in-flight={stub_openai.STATS['max_in_flight']}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Parse+clean benchmark for load_data(): legacy row-wise pipeline vs the vectorized one.
+
+    python -m bench.bench_load --rows 1000000
+
+The file is generated and each variant runs in its own spawned process, so the
+parent never holds the data and peak RSS is measured cleanly per variant.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import tempfile
+import time
+
+import pandas as pd
+
+from bench.synth import write_orders_csv
+from storage import _parse_orders
+
+def legacy_load(path):
+    """The original utils.load_data() body, kept verbatim for comparison"""
+    df = pd.read_csv(path, encoding='utf-8', engine='python', on_bad_lines='skip', quotechar='"')
+    df['Date'] = pd.to_datetime(df['Date'], format='mixed', errors='coerce')
+    df['Date_Valid'] = df['Date'].notna()
+    df['Row_ID'] = df.index
+    df = df.sort_values('Date', na_position='last')
+    df['Month_Year'] = df['Date'].dt.to_period('M')
+    df['Revenue'] = pd.to_numeric(df['Revenue'], errors='coerce')
+    df['Pax'] = pd.to_numeric(df['Pax'], errors='coerce').fillna(0)
+    df['Pramusaji'] = pd.to_numeric(df['Pramusaji'], errors='coerce').fillna(0)
+    df['Phone_Clean'] = df['Phone_Number'].astype(str).str.replace(r'\D', '', regex=True)
+
+    def estimate_revenue(row):
+        if pd.notna(row['Revenue']) and row['Revenue'] > 0: return row['Revenue']
+        rates = {"Wedding": 18, "Corporate": 25, "Packet": 10, "Buffet": 22}
+        return row['Pax'] * rates.get(str(row['Event_Type']), 15)
+
+    df['Revenue'] = df.apply(estimate_revenue, axis=1)
+    return df
+
+def vectorized_load(path):
+    return _parse_orders(path)
+
+VARIANTS = {"legacy": legacy_load, "vectorized": vectorized_load}
+
+def _rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+def _run(name, path, out):
+    base_mb = _rss_mb()
+    t = time.perf_counter()
+    df = VARIANTS[name](path)
+    secs = time.perf_counter() - t
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    out.put({"variant": name, "rows": len(df), "seconds": secs, "peak_rss_mb": peak_mb - base_mb,
+             "frame_mb": df.memory_usage(deep=True).sum() / 2**20})
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--variants", nargs="+", default=list(VARIANTS))
+    args = ap.parse_args()
+
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "orders.csv")
+        t = time.perf_counter()
+        gen = ctx.Process(target=write_orders_csv, args=(path, args.rows))
+        gen.start(); gen.join()
+        print(f"Generated {args.rows:,} rows ({os.path.getsize(path) / 2**20:,.0f} MB) in {time.perf_counter() - t:.1f}s")
+
+        for name in args.variants:
+            out = ctx.Queue()
+            p = ctx.Process(target=_run, args=(name, path, out))
+            p.start()
+            r = out.get()
+            p.join()
+            print(f"{r['variant']:>10}: {r['seconds']:8.2f}s  peak RSS +{r['peak_rss_mb']:7.0f} MB  "
+                  f"frame {r['frame_mb']:7.0f} MB  ({r['rows']:,} rows)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Start-up import budget, measured with `python -X importtime`.
+
+    python -m bench.importtime                      # app (login screen), utils, each tab
+    python -m bench.importtime --top 15 --json out.json
+    python -m bench.importtime --budget app=0.8     # exit 1 if `import app` takes longer
+
+Each target is imported in a fresh interpreter. For every target the report
+shows the total, the heaviest third-party packages and the cost of each of our
+own modules (cumulative, so a module's figure includes what it pulls in).
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = ["app", "utils", "tabs.schedule", "tabs.analytics", "tabs.forecast", "tabs.order"]
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def _first_party():
+    names = {f[:-3] for f in os.listdir(ROOT) if f.endswith(".py")}
+    return names | {"tabs", "bench"}
+
+def measure(target, runs=3):
+    """[(module, self_us, cumulative_us, depth)] from the fastest of `runs` cold imports"""
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {target}"],
+                              cwd=ROOT, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+        rows = [(m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2)
+                for m in map(_LINE.match, proc.stderr.splitlines()) if m]
+        total = sum(r[2] for r in rows if r[3] == 0)
+        if best is None or total < best[0]:
+            best = (total, rows)
+    return best[1]
+
+def summarize(rows, top=10):
+    """Total seconds, heaviest third-party packages and our own modules"""
+    ours = _first_party()
+    packages, own = {}, {}
+    for name, self_us, cum_us, depth in rows:
+        root = name.split(".")[0]
+        if root in ours:
+            own[name] = max(own.get(name, 0), cum_us)
+        else:
+            packages[root] = packages.get(root, 0) + self_us  # self time: nested imports aren't counted twice
+    total = sum(r[2] for r in rows if r[3] == 0)
+    by_cost = lambda d: sorted(((k, v / 1e6) for k, v in d.items()), key=lambda kv: -kv[1])
+    return {"total_s": total / 1e6, "packages": by_cost(packages)[:top], "modules": by_cost(own)}
+
+def main():
+    ap = argparse.ArgumentParser(description="Import-time budget per module")
+    ap.add_argument("targets", nargs="*", default=TARGETS)
+    ap.add_argument("--runs", type=int, default=3, help="cold imports per target; the fastest is kept")
+    ap.add_argument("--top", type=int, default=8)
+    ap.add_argument("--json", help="write the report here")
+    ap.add_argument("--budget", nargs="*", default=[], help="target=seconds limits, e.g. app=0.8")
+    args = ap.parse_args()
+
+    report = {}
+    for target in args.targets:
+        s = summarize(measure(target, args.runs), args.top)
+        report[target] = s
+        print(f"--- import {target}: {s['total_s']:.2f}s")
+        print("    third-party: " + ", ".join(f"{k} {v:.2f}s" for k, v in s["packages"]))
+        for name, secs in s["modules"]:
+            print(f"    {name:>24}: {secs:6.3f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=1)
+
+    over = []
+    for item in args.budget:
+        target, limit = item.split("=")
+        if target in report and report[target]["total_s"] > float(limit):
+            over.append(f"{target} {report[target]['total_s']:.2f}s > {float(limit):.2f}s")
+    if over:
+        print("❌ Over budget: " + "; ".join(over))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Concurrent load test for api.py (stdlib only).
+
+    python -m bench.load_api --clients 50 --requests 2000             # starts the API in-process
+    python -m bench.load_api --url http://127.0.0.1:8080 --etag      # against a running server
+
+Each client keeps one HTTP/1.1 connection open and cycles through a mix of
+order pages, analytics years and forecasts. With --etag clients send back the
+ETag they last saw for a path, so unchanged data is answered with 304.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+PATHS = ["/orders?page={i}&page_size=50", "/orders?year=2025&page={i}&page_size=25", "/analytics/years",
+         "/analytics/2025", "/analytics/2024", "/forecast?horizon=12", "/orders?q=dbkl&page={i}&page_size=50"]
+
+async def _request(reader, writer, host, path, etag=None):
+    lines = [f"GET {path} HTTP/1.1", f"Host: {host}"] + ([f"If-None-Match: {etag}"] if etag else [])
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b""):
+            break
+        k, _, v = h.decode("latin-1").partition(":")
+        headers[k.strip().lower()] = v.strip()
+    await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers.get("etag")
+
+async def _client(host, port, n, use_etag, offset, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+    for k in range(n):
+        path = PATHS[(offset + k) % len(PATHS)].format(i=1 + (offset + k) % 3)
+        t = time.perf_counter()
+        status, etag = await _request(reader, writer, host, path, etags.get(path) if use_etag else None)
+        latencies.append(time.perf_counter() - t)
+        statuses[status] = statuses.get(status, 0) + 1
+        if etag:
+            etags[path] = etag
+    writer.close()
+
+async def run(url, clients, requests, use_etag):
+    u = urlsplit(url)
+    latencies, statuses = [], {}
+    per = max(1, requests // clients)
+    t = time.perf_counter()
+    await asyncio.gather(*(_client(u.hostname, u.port, per, use_etag, i, latencies, statuses) for i in range(clients)))
+    wall = time.perf_counter() - t
+    lat = sorted(latencies)
+    return {"requests": len(lat), "seconds": wall, "rps": len(lat) / wall, "statuses": statuses,
+            "p50_ms": 1000 * statistics.median(lat), "p95_ms": 1000 * lat[int(0.95 * (len(lat) - 1))], "max_ms": 1000 * lat[-1]}
+
+def main():
+    ap = argparse.ArgumentParser(description="Load test for the JSON API")
+    ap.add_argument("--url", help="running server; default: start api.py in-process on a free port")
+    ap.add_argument("--clients", type=int, default=50)
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--etag", action="store_true", help="send If-None-Match with the last ETag per path")
+    args = ap.parse_args()
+
+    url = args.url
+    if url is None:
+        import api
+        url = api.start()
+        asyncio.run(run(url, 1, len(PATHS), False))  # warm: load data and fit the forecast once
+    r = asyncio.run(run(url, args.clients, args.requests, args.etag))
+    print(f"{r['requests']:,} requests from {args.clients} clients in {r['seconds']:.2f}s: {r['rps']:,.0f} req/s  "
+          f"p50 {r['p50_ms']:.1f} ms · p95 {r['p95_ms']:.1f} ms · max {r['max_ms']:.1f} ms  statuses {r['statuses']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Local stand-in for the OpenAI chat-completions endpoint (stdlib only).
+
+    python -m bench.stub_openai --port 8765 --latency 0.4 --fail-rate 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub streamlit run app.py
+
+Replies are deterministic: extraction prompts get a JSON order built from the
+message with a few regexes, anything else gets a short canned report. Supports
+stream=true (server-sent events), simulated latency and random 429s with a
+Retry-After header. Every request is counted in STATS.
+"""
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STATS = {"requests": 0, "rate_limited": 0, "max_in_flight": 0}
+_IN_FLIGHT = [0]
+_LOCK = threading.Lock()
+
+_TEXT = re.compile(r'Text: "(.*)"\s*Return ONLY', re.S)
+_PAX = re.compile(r"(\d+)\s*(?:pax|org|orang|bungkus|pek)", re.I)
+_PRICE = re.compile(r"rm\s?(\d+(?:\.\d+)?)", re.I)
+_DATE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+_PHONE = re.compile(r"(01\d[\d\- ]{7,10})")
+_NASI = re.compile(r"\b(nasi \w+|ayam \w+|daging \w+|mee \w+|bihun \w+|kuih \w+|buah|dalca|sirap|teh \w+)\b", re.I)
+
+def fake_order(text):
+    """A plausible extraction for one message"""
+    pax = _PAX.search(text)
+    price = _PRICE.search(text)
+    date = _DATE.search(text)
+    phone = _PHONE.search(text)
+    pax_n = int(pax.group(1)) if pax else 50
+    rate = float(price.group(1)) if price else 0.0
+    lowered = text.lower()
+    etype = ("Wedding" if "kahwin" in lowered or "wedding" in lowered else
+             "Packet" if "bungkus" in lowered or "pek" in lowered else "Corporate")
+    return {
+        "Date": f"{date.group(3)}-{int(date.group(2)):02d}-{int(date.group(1)):02d}" if date else "2026-01-15",
+        "Customer_Name": text.split(":")[0][:30] if ":" in text[:40] else "Unknown",
+        "Phone_Number": re.sub(r"\D", "", phone.group(1)) if phone else "",
+        "Order_Title": text.strip().splitlines()[0][:40],
+        "Pax": pax_n, "Staff_Count": max(0, pax_n // 100),
+        "Event_Type": etype, "Location": "Gombak",
+        "Menu_Items": sorted({m.capitalize() for m in _NASI.findall(text)}) or ["Nasi putih"],
+        "Total_Price": rate * pax_n if rate and rate < 100 else rate,
+    }
+
+def reply_for(messages):
+    prompt = messages[-1].get("content", "") if messages else ""
+    m = _TEXT.search(prompt)
+    if m:
+        return json.dumps(fake_order(m.group(1)))
+    return ("**📉 Executive Summary**: Demand is steady.\n\n**⚠️ Operational Risk Analysis**: Within capacity.\n\n"
+            "**🚀 Strategic Action Plan**:\n- Confirm staff rosters early.\n- Upsell packet orders in slow months.")
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection pooling is exercised
+    latency, jitter, fail_rate, chunk_delay = 0.3, 0.1, 0.0, 0.02
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, code, payload, headers=()):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in headers:
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._send_json(404, {"error": {"message": "not found"}})
+        with _LOCK:
+            STATS["requests"] += 1
+            _IN_FLIGHT[0] += 1
+            STATS["max_in_flight"] = max(STATS["max_in_flight"], _IN_FLIGHT[0])
+        try:
+            if random.random() < self.fail_rate:
+                with _LOCK: STATS["rate_limited"] += 1
+                return self._send_json(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                                       headers=[("Retry-After", "0.2")])
+            time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+            content = reply_for(body.get("messages", []))
+            if body.get("stream"):
+                self._stream(content, body.get("model", "stub"))
+            else:
+                self._send_json(200, {
+                    "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                })
+        finally:
+            with _LOCK: _IN_FLIGHT[0] -= 1
+
+    def _stream(self, content, model):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        pieces = re.findall(r"\S+\s*", content) or [content]
+        for i, piece in enumerate(pieces):
+            chunk = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                     "choices": [{"index": 0, "delta": {"content": piece} if i else {"role": "assistant", "content": piece},
+                                  "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(self.chunk_delay)
+        done = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        self.wfile.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode())
+        self.wfile.flush()
+        self.close_connection = True
+
+def start(port=0, latency=0.3, jitter=0.1, fail_rate=0.0):
+    """Starts the stub in a daemon thread; returns (server, base_url)"""
+    handler = type("StubHandler", (Handler,), {"latency": latency, "jitter": jitter, "fail_rate": fail_rate})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.3, help="seconds per completion")
+    ap.add_argument("--jitter", type=float, default=0.1)
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 429")
+    args = ap.parse_args()
+    server, url = start(args.port, args.latency, args.jitter, args.fail_rate)
+    print(f"Stub OpenAI listening on {url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
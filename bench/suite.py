@@ -0,0 +1,191 @@
+"""
+Headless benchmark of every tab's compute path on synthetic order histories.
+
+    python -m bench.suite --rows 10000 100000 1000000 --out bench_results.json
+    python -m bench.suite --rows 10000 100000 --baseline bench_results.json   # exit 1 on a regression
+
+Each size runs in its own spawned process on a messy synthetic CSV (see
+bench/synth.py), with a stub `streamlit` module installed first so only the
+pandas/numpy work behind the tabs is timed. Cases are the compute parts of
+load_data (duplicate scan included), the Analytics aggregations (customer resolution and chart specs included), the
+forecast fit/predict and the Schedule filtering, each timed `--repeats` times (median and best kept).
+"""
+import argparse
+import gc
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+NOISE_FLOOR = 0.002  # seconds; slower-by-less-than-this never counts as a regression
+
+def _stub_streamlit():
+    """Minimal stand-in so utils imports without a Streamlit runtime"""
+    st = types.ModuleType("streamlit")
+    st.secrets = {}
+    sys.modules["streamlit"] = st
+
+def _time(fn, repeats):
+    runs = []
+    for _ in range(repeats):
+        gc.collect()
+        t = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t)
+    return {"median_s": statistics.median(runs), "min_s": min(runs), "repeats": repeats}
+
+# --- 1. CASES ---
+def cases(path, df):
+    """(name, fn) for every compute path, given the CSV and its cleaned frame"""
+    import pandas as pd
+    import storage, rollup, menu, forecasting, capacity, lookup, customers, dedupe, charts, utils
+
+    year = int(df.loc[df['Date_Valid'], 'Date'].dt.year.max())
+    today = pd.Timestamp(f"{year}-06-01")
+    store = storage.CsvStore(path)
+    store.load()
+    dish_index = menu.DishIndex(df)
+    order_lookup = lookup.OrderLookup(df)
+    customer_index = customers.CustomerIndex()
+    cids = customer_index.assign(df)
+    duplicate_index = dedupe.DuplicateIndex(df)
+    sample = df.loc[df['Date_Valid']].iloc[len(df) // 3]
+    series = forecasting.monthly_series(df)
+    order_id = df['Order_ID'].iloc[len(df) // 2]
+    points = pd.DataFrame({'lat': df['Lat'], 'lon': df['Lon']}).dropna()
+    # Chart specs are timed on warm core caches (a versioned view of df): only the spec build itself
+    versioned = df.copy(deep=False)
+    versioned.attrs['data_version'] = "bench"
+    spec_fns = [charts.monthly_income, charts.event_types, charts.top_clients, charts.staffing_intensity, charts.top_dishes]
+    for f in spec_fns:
+        f(versioned, year, charts.MAX_ROWS)
+    storage._write_snapshot(path, "bench", df)
+
+    def schedule_page():
+        page = storage.filter_orders(df, start=today - pd.Timedelta(days=365), end=today).sort_values('Date', ascending=False).iloc[:25]
+        return utils.mask_phone_numbers(page['Phone_Number'])
+
+    out = [
+        ("load.parse_clean", lambda: storage._parse_orders(path)),
+        ("load.snapshot_read", lambda: storage._read_snapshot(path, "bench")),
+        ("load.cached", store.load),
+        ("load.dedupe", lambda: dedupe.DuplicateIndex(df)),
+        ("analytics.rollup_build", lambda: rollup.Cube(rollup._aggregate(df), None)),
+        ("analytics.year_filter", lambda: storage.filter_orders(df, year=year)),
+        ("analytics.dish_index", lambda: menu.DishIndex(df)),
+        ("analytics.dish_top", lambda: dish_index.top(5, year=year)),
+        ("analytics.dish_search", lambda: dish_index.orders_with("ayam", year=year)),
+        ("analytics.customer_resolve", lambda: customers.CustomerIndex().assign(df)),
+        ("analytics.customer_reassign", lambda: customer_index.assign(df)),
+        ("analytics.customer_profiles", lambda: customers.profiles(df, cids)),
+        ("analytics.chart_specs", lambda: [f.__wrapped__(versioned, year, charts.MAX_ROWS) for f in spec_fns]),
+        ("analytics.chart_cached", lambda: [f(versioned, year, charts.MAX_ROWS) for f in spec_fns]),
+        ("analytics.map_clusters", lambda: charts.map_clusters(points, charts.MAX_ROWS)),
+        ("forecast.monthly_series", lambda: forecasting.monthly_series(df)),
+    ]
+    for engine in forecasting.ENGINES:
+        out.append((f"forecast.fit_predict.{engine}", lambda e=engine: forecasting.ENGINES[e]().fit(series).outlook(24)))
+    out += [
+        ("schedule.filter_upcoming", lambda: storage.filter_orders(df, start=today, end=today + pd.Timedelta(days=30))),
+        ("schedule.filter_text", lambda: storage.filter_orders(df, start=today - pd.Timedelta(days=365), end=today, text="dbkl")),
+        ("schedule.page_mask", schedule_page),
+        ("schedule.lookup_build", lambda: lookup.OrderLookup(df)),
+        ("schedule.lookup_search", lambda: order_lookup.search("dbkl")),
+        ("schedule.get_by_id", lambda: store.get(order_id)),
+        ("order.customer_find", lambda: customer_index.find("salma")),
+        ("order.duplicate_check", lambda: duplicate_index.check(sample['Date'], sample['Order_Title'], sample['Details'], sample['Pax'])),
+        ("schedule.capacity", lambda: capacity.forecast_days(capacity.daily_load(df), today, 60)),
+    ]
+    return out
+
+def run_size(rows, repeats, only, queue):
+    """Child process: generate, load once, then time every case"""
+    _stub_streamlit()
+    import warnings
+    warnings.filterwarnings("ignore")
+    import storage
+    from bench.synth import write_orders_csv
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "orders.csv")
+        t = time.perf_counter()
+        write_orders_csv(path, rows, messy=True)
+        gen_s = time.perf_counter() - t
+        df = storage._parse_orders(path)
+        results = []
+        for name, fn in cases(path, df):
+            if only and not any(name.startswith(o) for o in only):
+                continue
+            results.append({"case": name, "rows": rows, **_time(fn, repeats)})
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+        queue.put({"rows": rows, "generate_s": gen_s, "csv_mb": os.path.getsize(path) / 2**20,
+                   "peak_rss_mb": peak_mb, "results": results})
+
+# --- 2. BASELINE COMPARISON ---
+def compare(current, baseline, tolerance):
+    """Rows of (case, rows, old, new, ratio, regressed) for cases present in both runs"""
+    old = {(r["case"], r["rows"]): r["median_s"] for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        key = (r["case"], r["rows"])
+        if key not in old:
+            continue
+        before, after = old[key], r["median_s"]
+        ratio = after / before if before > 0 else float("inf")
+        rows.append((*key, before, after, ratio, ratio > 1 + tolerance and after - before > NOISE_FLOOR))
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description="Headless compute benchmark")
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    ap.add_argument("--repeats", type=int, default=3)
+    ap.add_argument("--only", nargs="*", default=[], help="case name prefixes, e.g. load. schedule.filter")
+    ap.add_argument("--out", help="write results JSON here (use it later as --baseline)")
+    ap.add_argument("--baseline", help="compare against a saved results JSON")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    args = ap.parse_args()
+
+    import numpy, pandas
+    report = {"meta": {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                       "pandas": pandas.__version__, "numpy": numpy.__version__, "machine": platform.machine(),
+                       "cpus": os.cpu_count(), "repeats": args.repeats},
+              "sizes": [], "results": []}
+
+    ctx = mp.get_context("spawn")
+    for rows in args.rows:
+        queue = ctx.Queue()
+        p = ctx.Process(target=run_size, args=(rows, args.repeats, args.only, queue))
+        p.start()
+        size = queue.get()
+        p.join()
+        report["results"] += size.pop("results")
+        report["sizes"].append(size)
+        print(f"--- {rows:,} rows ({size['csv_mb']:,.0f} MB CSV, peak RSS {size['peak_rss_mb']:,.0f} MB)")
+        for r in report["results"]:
+            if r["rows"] == rows:
+                print(f"{r['case']:>34}: {1000 * r['median_s']:10.2f} ms  (best {1000 * r['min_s']:.2f})")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"Saved {len(report['results'])} timings to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.tolerance)
+        regressions = [r for r in rows if r[5]]
+        print(f"--- vs {args.baseline} (tolerance {args.tolerance:.0%})")
+        for case, n, before, after, ratio, bad in rows:
+            print(f"{'❌' if bad else '  '} {case:>34} {n:>9,}: {1000 * before:9.2f} -> {1000 * after:9.2f} ms  x{ratio:.2f}")
+        print(f"{len(regressions)} regression(s) in {len(rows)} comparable timings")
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
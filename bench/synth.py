@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+# --- VOCABULARY (mirrors what we see in cleaned_revenue_data.csv) ---
+CUSTOMERS = ["DBKL", "Istana Negara", "Masjid Taman Bidara", "Nekmat", "Blanco", "Ipd Brickfields",
+             "Hospital Selayang", "Rosmaliza", "Farah", "Dato Nora", "Unknown", "Anise", "Nabila"]
+LOCATIONS = ["DBKL HQ", "Brickfields", "UITM Selayang", "Rawang", "Seri Kembangan", "Taman Wahyu",
+             "Kuala Lumpur", "HOSPITAL SELAYANG", "Gombak", "Batu Caves", "Shah Alam", "No Location"]
+EVENT_TYPES = ["Corporate", "Buffet", "Wedding", "Packet", "Food Testing"]
+TITLES = ["Mesyuarat Jawatankuasa", "Makan tengahari", "Kenduri kahwin", "Majlis tahlil", "Dbkl pelesenan"]
+DETAILS = [
+    "60 org 2 x mkn \n8 pagi\n\nNasi tomato \nAyam masak merah\nJelatah\nBuah\nAir kordial",
+    "*Tarikh : 3/1/2023 (Selasa)*\n*Jam : 9.30 pagi*\nRate RM15.00\n- Bihun Goreng + Sambal\n- Buah (potong)",
+    "AI: Nasi putih, Masak lemak nenas, Ayam grg berempah",
+    "30 bungkus\n6 petang\n\nNasi hujan panas\nDalca\nPapedom",
+]
+# Building blocks for the messy free text (Details / Menu_Items / Location)
+DISHES = ["Nasi putih", "NASI MINYAK", "nasi tomato", "Nasi hujan panas", "Nasi beriani", "Mee goreng + telur mata",
+          "Bihun Goreng + Sambal", "kuewtiaw goreng", "Ayam masak merah", "AYAM GRG BEREMPAH", "ayam zulja",
+          "Daging masak hitam", "daging kicap blackpepper", "Rendang ayam pencen cili api", "Ikan masak kicap",
+          "sotong masak apa2", "Dalca telur", "Acar jelatah", "JELATAH", "Papedom", "Sayur campur", "Kari ayam",
+          "Ulam + sambal belacan", "2 jenis kuih", "Kuih 2 jenis", "Buah-Buahan", "Buah (potong)", "Teh tarik",
+          "Kopi O", "Air kordial sejuk", "MINUMAN KORDIAL (SIRAP OREN)", "Air mineral", "Set satay ayam", "Lemang"]
+PLACES = ["DBKL HQ", "Menara DBKL 1", "Brickfields", "UITM Selayang", "Rawang", "Seri Kembangan", "Taman Bidara",
+          "Kuala Lumpur", "Hospital Selayang", "Gombak", "Batu Caves", "Shah Alam", "Kg melayu kepung", "Cheras",
+          "Istana Negara", "Damansara Perdana", "Petaling Jaya"]
+DAYS_MS = ["Isnin", "Selasa", "Rabu", "Khamis", "Jumaat", "Sabtu", "Ahad"]
+TIMES = ["{h} pagi", "{h}.30 pagi", "Jam {h}.00 petang", "{h} ptg", "{h}.00 malam", "{h} mlm",
+         "{h}.00 pagi hingga {h2}.00 petang", "{h}.30 pagi - {h2}.00 tengahari"]
+PAX = ["{n} pax", "{n} org", "{n} orang", "-{n} pax", "{n} bungkus", "Jumlah: {n} pax", "{n}pax"]
+
+MENUS = [
+    "['Nasi putih', 'Masak lemak daging salai', 'Sayur campur', 'Ayam goreng berempah', 'Air epal asam boi']",
+    "['Nasi minyak', 'Daging kicap blackpepper', 'Ayam merah', 'Acar timun', 'Dalca', 'Buah', 'Sirap']",
+    "['Laksa', 'Ayam zulja', 'Sirap', 'Teh tarik']",
+    "['Nasi putih, Nasi beriani, Ayam goreng berempah']",
+]
+
+# --- MESSY TEXT POOLS ---
+def _details(rng):
+    """One WhatsApp-style order message: date/time/pax/rate lines, a dish list, noise"""
+    dishes = rng.choice(DISHES, rng.integers(2, 9), replace=False)
+    bullet = rng.choice(["", "- ", "-", "• ", "*- "])
+    h = int(rng.integers(7, 12))
+    lines = [
+        f"*Tarikh : {rng.integers(1, 29)}/{rng.integers(1, 13)}/{rng.integers(2022, 2027)} ({rng.choice(DAYS_MS)})*" if rng.random() < 0.5 else "",
+        rng.choice(TIMES).format(h=h, h2=(h + int(rng.integers(2, 6)) - 1) % 12 + 1),
+        rng.choice(PAX).format(n=int(rng.integers(10, 800))),
+        f"*Rate RM{rng.choice([10, 15, 18, 22, 25])}.00*" if rng.random() < 0.4 else "",
+        "",
+        "*Menu*" if rng.random() < 0.3 else "",
+        *[bullet + d for d in dishes],
+        rng.choice(["", "", "Bawak meja buffet", "Pelayan - RM 100 (seorang)", "Lokasi : " + rng.choice(PLACES), "🙏🙏"]),
+    ]
+    text = "\n".join(l for l in lines if l or rng.random() < 0.5)
+    return ("AI: " + text) if rng.random() < 0.1 else text
+
+def _menu(rng):
+    dishes = [str(d) for d in rng.choice(DISHES, rng.integers(1, 12), replace=False)]
+    dishes = [d.upper() if rng.random() < 0.2 else d for d in dishes]
+    if rng.random() < 0.15:
+        return str([", ".join(dishes)])  # the whole menu as one comma-joined item, as in older rows
+    return str(dishes)
+
+def _location(rng):
+    place = str(rng.choice(PLACES))
+    r = rng.random()
+    if r < 0.05: return ""
+    if r < 0.10: return "Unknown"
+    if r < 0.20: return place.upper()
+    if r < 0.30: return place.lower() + "  "
+    if r < 0.35: return "Dewan Serbaguna " + place
+    return place
+
+def _phone(rng):
+    d = f"1{rng.integers(0, 10)}{rng.integers(1_000_000, 9_999_999)}"
+    return rng.choice(["", "", f"0{d}", f"0{d[:2]}-{d[2:]}", f"+60 {d[:2]} {d[2:5]} {d[5:]}", f"60{d}"])
+
+def text_pools(seed=0, size=2000):
+    """Distinct messy Details / Menu_Items / Location / Phone values to sample rows from"""
+    rng = np.random.default_rng(seed + 1)
+    return {
+        'Details': [_details(rng) for _ in range(size)],
+        'Menu_Items': [_menu(rng) for _ in range(size)],
+        'Location': [_location(rng) for _ in range(max(size // 20, 50))],
+        'Phone_Number': [_phone(rng) for _ in range(size)],
+    }
+
+def _pick(rng, pool, n):
+    """n draws from pool as a categorical (no per-row string copies, so 5M rows stay cheap)"""
+    cats = list(dict.fromkeys(pool))
+    return pd.Categorical.from_codes(rng.integers(0, len(cats), n), categories=cats)
+
+def make_orders(n, seed=0, start="2019-01-01", end="2026-12-31", iso_share=0.05, missing_rev_share=0.2,
+                messy=False, bad_date_share=0.002, dup_share=0.0):
+    """
+    Returns a raw (uncleaned) order table with n rows in the CSV schema.
+    messy=True samples free text from text_pools() (varied Malay WhatsApp layouts,
+    casing, phone formats, blanks, a few unparseable dates) and adds Order_IDs.
+    dup_share (messy only) turns that share of rows, at the end, into re-sent
+    copies of earlier ones (half of them with a forwarded header on the details).
+    """
+    rng = np.random.default_rng(seed)
+    t0, t1 = pd.Timestamp(start).value // 10**9, pd.Timestamp(end).value // 10**9
+    dates = pd.to_datetime(rng.integers(t0, t1, n), unit='s').floor('h')
+
+    # Same two date formats as the real file: exported 'd/m/Y H:M' and app-saved ISO dates
+    slash = (dates.day.astype(str) + "/" + dates.month.astype(str) + "/" + dates.year.astype(str)
+             + " " + dates.hour.astype(str) + ":00")
+    iso = dates.strftime('%Y-%m-%d')
+    date_col = np.where(rng.random(n) < iso_share, iso, slash)
+
+    pax = rng.integers(10, 800, n)
+    revenue = (pax * rng.choice([10, 15, 18, 22, 25], n)).astype(float)
+    revenue[rng.random(n) < missing_rev_share] = np.nan
+    phones = np.char.add("01", rng.integers(10_000_000, 99_999_999, n).astype(str))
+
+    if messy:
+        pools = text_pools(seed)
+        bad = rng.random(n) < bad_date_share
+        date_col[bad] = rng.choice(["TBC", "", "31/2/2025"], int(bad.sum()))
+        df = pd.DataFrame({
+            'Date': date_col,
+            'Customer_Name': _pick(rng, CUSTOMERS + ["", "Pn. Salma", "ABANG RAHIM", "uitm selayang"], n),
+            'Phone_Number': _pick(rng, pools['Phone_Number'], n),
+            'Order_Title': _pick(rng, TITLES, n),
+            'Details': _pick(rng, pools['Details'], n),
+            'Pax': np.where(rng.random(n) < 0.01, 0, pax),
+            'Pramusaji': rng.integers(0, 12, n),
+            'Event_Type': _pick(rng, EVENT_TYPES + ["Engagement"], n),
+            'Location': _pick(rng, pools['Location'], n),
+            'Menu_Items': _pick(rng, pools['Menu_Items'], n),
+            'Revenue': revenue,
+        })
+        df['Order_ID'] = np.char.mod('%012x', np.arange(n) + seed * n)
+        if dup_share:
+            k = int(n * dup_share)
+            src, dst = rng.integers(0, n - k, k), np.arange(n - k, n)
+            for c in ['Date', 'Customer_Name', 'Phone_Number', 'Order_Title', 'Details', 'Pax', 'Event_Type', 'Location', 'Menu_Items', 'Revenue']:
+                df.loc[dst, c] = df[c].to_numpy()[src]
+            fwd = dst[rng.random(k) < 0.5]
+            df['Details'] = df['Details'].cat.add_categories([f"Forwarded\n{d}" for d in df['Details'].cat.categories])
+            df.loc[fwd, 'Details'] = "Forwarded\n" + df.loc[fwd, 'Details'].astype(str)
+        return df
+
+    return pd.DataFrame({
+        'Date': date_col,
+        'Customer_Name': rng.choice(CUSTOMERS, n),
+        'Phone_Number': phones,
+        'Order_Title': rng.choice(TITLES, n),
+        'Details': rng.choice(DETAILS, n),
+        'Pax': pax,
+        'Pramusaji': rng.integers(0, 12, n),
+        'Event_Type': rng.choice(EVENT_TYPES, n),
+        'Location': rng.choice(LOCATIONS, n),
+        'Menu_Items': rng.choice(MENUS, n),
+        'Revenue': revenue,
+    })
+
+def write_orders_csv(path, n, seed=0, messy=False, dup_share=0.0):
+    make_orders(n, seed=seed, messy=messy, dup_share=dup_share).to_csv(path, index=False)
+    return path
@@ -0,0 +1,135 @@
+"""
+Daily staffing & kitchen capacity.
+
+Each order occupies its Pramusaji (serving staff) from SETUP_HOURS before the
+event start until it ends. The start comes from the Date's time when it has one,
+otherwise from a Malay/English time in Details ("9.30 pagi hingga 1.00 petang",
+"8.00 malam"); an explicit end time is used when given, else a typical duration
+for the event type. Orders with no known time block the whole day. Peak
+concurrent staff per day is a sweep over all start/end points at once;
+kitchen load is total pax per day.
+"""
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+EVENT_HOURS = {"Wedding": 6, "Buffet": 4, "Corporate": 4, "Engagement": 5, "Packet": 1}
+DEFAULT_HOURS = 4
+SETUP_HOURS = 2  # staff arrive this long before the event to set up
+STAFF_POOL = 15
+KITCHEN_PAX = 1000
+
+# --- 1. EVENT WINDOWS ---
+_TIME = r"(\d{1,2})(?:[.:](\d{2}))?\s*(am|pm|pagi|tengahari|tgh|tghari|petang|ptg|malam|mlm)\b"
+_WINDOW = re.compile(_TIME + r"(?:\s*(?:-|–|hingga|sampai|to)\s*" + _TIME + r")?", re.I)
+_PM = {"pm", "tengahari", "tgh", "tghari", "petang", "ptg", "malam", "mlm"}
+
+def _hour(h, m, period):
+    h, m, period = int(h), int(m or 0), period.lower()
+    if h > 23 or m > 59:
+        return np.nan
+    if period in _PM and h < 12 and not (period.startswith("t") and h >= 11):
+        h += 12  # "3 petang" -> 15, but "11 tengahari" stays 11
+    elif period in ("am", "pagi") and h == 12:
+        h = 0
+    return h + m / 60
+
+def parse_window(text):
+    """(start_hour, end_hour) from free text; NaN where not stated"""
+    m = _WINDOW.search(str(text))
+    if not m:
+        return np.nan, np.nan
+    g = m.groups()
+    start = _hour(*g[:3])
+    end = _hour(*g[3:]) if g[3] else np.nan
+    return start, end if end > start else np.nan
+
+def event_windows(df):
+    """Start/end timestamps for each order (whole day when no time is known)"""
+    day = df['Date'].dt.normalize()
+    clock = (df['Date'] - day) / pd.Timedelta(hours=1)
+
+    # Details: parse each distinct text once
+    codes, uniques = pd.factorize(df['Details'].astype(object))
+    table = np.full((len(uniques) + 1, 2), np.nan)
+    for i, u in enumerate(uniques):
+        table[i] = parse_window(u)
+    parsed = table[codes]
+
+    start_h = np.where(clock.to_numpy() > 0, clock.to_numpy(), parsed[:, 0])
+    hours = df['Event_Type'].astype(object).map(EVENT_HOURS).fillna(DEFAULT_HOURS).to_numpy(dtype=float)
+    end_h = np.where(np.isnan(parsed[:, 1]) | (clock.to_numpy() > 0), start_h + hours, parsed[:, 1])
+    known = ~np.isnan(start_h)
+    start_h = np.where(known, np.maximum(start_h - SETUP_HOURS, 0), 0)
+    end_h = np.where(known, np.minimum(end_h, 24), 24)
+
+    start = day + pd.to_timedelta(start_h, unit='h')
+    end = day + pd.to_timedelta(end_h, unit='h')
+    return start, end, known
+
+# --- 2. DAILY LOAD ---
+def daily_load(df):
+    """Per day: orders, pax (kitchen load), total staff booked and peak concurrent staff"""
+    df = df[df['Date_Valid']]
+    cols = ['Orders', 'Pax', 'Staff', 'Peak_Staff']
+    if df.empty:
+        return pd.DataFrame(columns=cols, index=pd.DatetimeIndex([], name='Day'))
+    start, end, _ = event_windows(df)
+    staff = df['Pramusaji'].to_numpy(dtype=float)
+    day = df['Date'].dt.normalize().to_numpy()
+
+    # Sweep line: +staff at each start, -staff at each end; ends sort before starts at the same instant
+    times = np.concatenate([start.to_numpy().astype('int64'), end.to_numpy().astype('int64')])
+    delta = np.concatenate([staff, -staff])
+    order = np.lexsort((delta, times))
+    level = np.cumsum(delta[order])
+    peak = pd.Series(level).groupby(np.concatenate([day, day])[order]).max()
+
+    out = df.groupby(df['Date'].dt.normalize()).agg(Orders=('Pax', 'size'), Pax=('Pax', 'sum'), Staff=('Pramusaji', 'sum'))
+    out['Peak_Staff'] = peak.reindex(out.index).to_numpy()
+    out.index.name = 'Day'
+    return out
+
+def flag_overbooked(load, staff_pool=STAFF_POOL, kitchen_pax=KITCHEN_PAX):
+    """Adds Over_Staff / Over_Kitchen / Overbooked columns to a daily_load() frame"""
+    load = load.copy()
+    load['Over_Staff'] = load['Peak_Staff'] > staff_pool
+    load['Over_Kitchen'] = load['Pax'] > kitchen_pax
+    load['Overbooked'] = load['Over_Staff'] | load['Over_Kitchen']
+    return load
+
+# --- 3. DAILY DEMAND FORECAST ---
+def daily_profile(load):
+    """Average staff/pax per calendar day by (month, weekday), idle days counted as zero"""
+    if load.empty:
+        return pd.DataFrame(columns=['Exp_Staff', 'Exp_Pax'])
+    days = pd.date_range(load.index.min(), load.index.max(), freq='D')
+    full = load[['Peak_Staff', 'Pax']].reindex(days, fill_value=0)
+    return full.groupby([days.month, days.weekday]).mean().rename(columns={'Peak_Staff': 'Exp_Staff', 'Pax': 'Exp_Pax'})
+
+def forecast_days(load, start, days=60, staff_pool=STAFF_POOL, kitchen_pax=KITCHEN_PAX):
+    """Booked vs expected daily demand for the next `days` days, with overbooking flags"""
+    idx = pd.date_range(pd.Timestamp(start).normalize(), periods=days, freq='D', name='Day')
+    booked = load.reindex(idx, fill_value=0)
+    hist = load[load.index < idx[0]]
+    prof = daily_profile(hist)
+    key = pd.MultiIndex.from_arrays([idx.month, idx.weekday])
+    expected = prof.reindex(key).fillna(0).set_axis(idx) if not prof.empty else pd.DataFrame(0.0, index=idx, columns=['Exp_Staff', 'Exp_Pax'])
+    return flag_overbooked(booked.join(expected), staff_pool, kitchen_pax)
+
+# --- 4. CACHE ---
+_LOCK = threading.Lock()
+_CACHE = {"version": None, "load": None}
+
+def get_daily_load(df):
+    """daily_load() for df's data version (computed once per version)"""
+    version = df.attrs.get('data_version')
+    with _LOCK:
+        if version is not None and _CACHE["version"] == version:
+            return _CACHE["load"]
+    load = daily_load(df)
+    with _LOCK:
+        _CACHE.update(version=version, load=load)
+    return load
@@ -0,0 +1,157 @@
+"""
+Chart layer behind the Analytics tab.
+
+Each function returns a finished Vega-Lite spec (a dict, its data inlined as a
+named dataset) memoized per (data version, year, budget) like core.py, so a
+rerun hands Streamlit the cached dict instead of rebuilding an Altair chart.
+No chart sends more than `max_rows` rows (CHART_MAX_ROWS setting, default
+MAX_ROWS): a long category tail is folded into one "Other" row, a long bar
+series is re-binned (neighbouring bars summed, so no total goes missing), and
+the delivery map gets weighted location clusters from a
+lat/lon grid, coarsened until it fits, instead of one point per order.
+
+The serialized (JSON) size of every chart built is kept in PAYLOAD_STATS.
+"""
+import json
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+import altair as alt
+
+import core
+
+MAX_ROWS = 500            # rows a single chart may send to the browser
+MAP_CELL = 0.005          # degrees (~550 m): orders closer than this share one map point
+MAP_RADIUS = (150, 1500)  # map point radius in metres, smallest to busiest cluster
+
+PAYLOAD_STATS = {}        # chart -> {'rows', 'bytes', 'builds'}
+_LOCK = threading.Lock()
+
+# --- 1. BUDGET ---
+def fold_tail(data, label, value, max_rows):
+    """At most max_rows rows: the largest (by `value`) max_rows - 1 and one "Other" row summing the rest.
+    Fold totals, not averages: divide after folding."""
+    if len(data) <= max_rows:
+        return data
+    data = data.sort_values(value, ascending=False)
+    head, tail = data.iloc[:max_rows - 1], data.iloc[max_rows - 1:]
+    other = tail.drop(columns=label).sum().to_frame().T.assign(**{label: "Other"})
+    return pd.concat([head, other], ignore_index=True)
+
+def rebin(data, label, value, max_rows):
+    """Ordered bars -> at most max_rows bars, each the sum of k neighbours and labelled by its first and last ("Jan–Mar")"""
+    if len(data) <= max_rows:
+        return data
+    k = math.ceil(len(data) / max_rows)
+    g = data.reset_index(drop=True).groupby(np.arange(len(data)) // k)
+    first, last = g[label].first().astype(str), g[label].last().astype(str)
+    return pd.DataFrame({label: first.where(first == last, first + "–" + last), value: g[value].sum(min_count=1)})
+
+def thin(data, max_rows):
+    """Every k-th row of an ordered series so at most max_rows are left (line/scatter points only: bars would lose totals)"""
+    if len(data) <= max_rows:
+        return data
+    return data.iloc[::math.ceil(len(data) / max_rows)]
+
+def map_clusters(points, max_rows, cell=MAP_CELL):
+    """lat/lon points -> one weighted point per grid cell (at its orders' mean position),
+    the grid doubled until at most max_rows cells are left"""
+    if points.empty:
+        return pd.DataFrame(columns=['lat', 'lon', 'orders', 'size'])
+    lat, lon = points['lat'].to_numpy(dtype=float), points['lon'].to_numpy(dtype=float)
+    while True:
+        key = np.floor(lat / cell).astype(np.int64) * 1_000_003 + np.floor(lon / cell).astype(np.int64)
+        codes, uniq = pd.factorize(key)
+        if len(uniq) <= max_rows:
+            break
+        cell *= 2
+    n = np.bincount(codes)
+    out = pd.DataFrame({'lat': np.bincount(codes, lat) / n, 'lon': np.bincount(codes, lon) / n, 'orders': n}).round({'lat': 5, 'lon': 5})
+    lo, hi = MAP_RADIUS
+    out['size'] = (lo + (hi - lo) * np.sqrt(n / n.max())).round()
+    return out.sort_values('orders', ascending=False, ignore_index=True)
+
+def _record(name, rows, payload):
+    with _LOCK:
+        builds = PAYLOAD_STATS.get(name, {}).get('builds', 0)
+        PAYLOAD_STATS[name] = {'rows': rows, 'bytes': len(payload.encode('utf-8')), 'builds': builds + 1}
+
+def _spec(name, chart, rows):
+    spec = chart.to_dict()
+    _record(name, rows, json.dumps(spec, separators=(',', ':'), default=str))
+    return spec
+
+def get_payload_stats():
+    """Rows and JSON bytes of the last build of every chart"""
+    with _LOCK:
+        return [{'chart': k, **v} for k, v in sorted(PAYLOAD_STATS.items())]
+
+# --- 2. CHARTS ---
+_CLEAN = dict(height=300, background='transparent')
+
+@core.memoized()
+def monthly_income(df, year, max_rows=MAX_ROWS):
+    data = rebin(core.monthly_sales(df, year), 'Month', 'Sales', max_rows)
+    chart = alt.Chart(data).mark_bar(cornerRadiusTopLeft=10, cornerRadiusTopRight=10).encode(
+        x=alt.X('Month', sort=None, axis=alt.Axis(labelAngle=0, title=None)),
+        y=alt.Y('Sales', axis=None),
+        color=alt.value("#FF4B4B"),
+        tooltip=['Month', 'Sales']
+    ).properties(**_CLEAN).configure_axis(grid=False, domain=False).configure_view(strokeWidth=0)
+    return _spec('monthly_income', chart, len(data))
+
+@core.memoized()
+def event_types(df, year, max_rows=MAX_ROWS):
+    data = fold_tail(core.event_counts(df, year), 'Type', 'Count', max_rows)
+    chart = alt.Chart(data).mark_arc(innerRadius=80, outerRadius=120).encode(
+        theta='Count',
+        color=alt.Color('Type', scale=alt.Scale(scheme='magma')),
+        tooltip=['Type', 'Count']
+    ).properties(**_CLEAN).configure_view(strokeWidth=0)
+    return _spec('event_types', chart, len(data))
+
+@core.memoized()
+def top_clients(df, year, max_rows=MAX_ROWS):
+    """None when the year has no named clients"""
+    data = core.top_clients(df, year).head(max_rows)
+    if data.empty:
+        return None
+    chart = alt.Chart(data).mark_bar(color='#FFD700', cornerRadius=5).encode(
+        x=alt.X('Revenue', axis=None),
+        y=alt.Y('Customer_Name', sort='-x', title=None),
+        tooltip=['Customer_Name', 'Revenue', 'Orders']
+    ).properties(**_CLEAN).configure_axis(grid=False, domain=False).configure_view(strokeWidth=0)
+    return _spec('top_clients', chart, len(data))
+
+@core.memoized()
+def staffing_intensity(df, year, max_rows=MAX_ROWS):
+    data = fold_tail(core.staffing_totals(df, year), 'Event_Type', 'Orders', max_rows)
+    data = pd.DataFrame({'Event_Type': data['Event_Type'], 'Pramusaji': data['Staff'] / data['Orders']})
+    chart = alt.Chart(data).mark_bar(color='#008080', cornerRadius=5).encode(
+        x=alt.X('Event_Type', title=None, axis=alt.Axis(labelAngle=0)),
+        y=alt.Y('Pramusaji', title="Avg Staff", axis=None),
+        tooltip=['Event_Type', 'Pramusaji']
+    ).properties(**_CLEAN).configure_axis(grid=False, domain=False).configure_view(strokeWidth=0)
+    return _spec('staffing_intensity', chart, len(data))
+
+@core.memoized()
+def top_dishes(df, year, max_rows=MAX_ROWS):
+    """None when the year has no dishes"""
+    data = core.dish_counts(df, year).head(max_rows)
+    if data.empty:
+        return None
+    chart = alt.Chart(data).mark_bar(color='#FF914D', cornerRadius=5).encode(
+        x=alt.X('Count', axis=None),
+        y=alt.Y('Menu', sort='-x', title=None),
+        tooltip=['Menu', 'Count']
+    ).properties(**_CLEAN).configure_axis(grid=False, domain=False).configure_view(strokeWidth=0)
+    return _spec('top_dishes', chart, len(data))
+
+@core.memoized()
+def delivery_map(df, year, max_rows=MAX_ROWS):
+    """Weighted delivery clusters (lat, lon, orders, size in metres) for st.map"""
+    data = map_clusters(core.delivery_points(df, year), max_rows)
+    _record('delivery_map', len(data), data.to_json(orient='records'))
+    return data
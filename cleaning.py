@@ -0,0 +1,94 @@
+import pandas as pd
+import numpy as np
+
+from menu import dishes_column
+from geocode import geocode_column
+
+# --- CONFIG ---
+# Fallback RM/pax used when an order has no recorded revenue
+EVENT_RATES = {"Wedding": 18, "Corporate": 25, "Packet": 10, "Buffet": 22}
+DEFAULT_RATE = 15
+
+NUMERIC_COLS = ['Pramusaji', 'Revenue', 'Pax']
+TEXT_COLS = ['Customer_Name', 'Phone_Number', 'Event_Type', 'Location', 'Order_Title', 'Details', 'Menu_Items']
+CATEGORY_COLS = ['Event_Type', 'Location', 'Customer_Name']
+
+# The two formats the order book actually contains: exported rows and rows saved by the app
+SLASH_FORMATS = {True: '%d/%m/%Y %H:%M', False: '%m/%d/%Y %H:%M'}
+ISO_FORMAT = 'ISO8601'
+
+# --- 1. DATES ---
+def _parse_slash_dates(u):
+    """
+    Parses d/m/Y-style strings, detecting the field order from the data:
+    day-first (Malaysian default) unless month-first explains more of the values.
+    """
+    best_dayfirst, best = True, pd.to_datetime(u, format=SLASH_FORMATS[True], errors='coerce')
+    if best.isna().any():
+        alt = pd.to_datetime(u, format=SLASH_FORMATS[False], errors='coerce')
+        if alt.notna().sum() > best.notna().sum():
+            best_dayfirst, best = False, alt
+    return best_dayfirst, best
+
+def parse_dates(raw):
+    """
+    Vectorized date parsing. Each distinct string is parsed once, trying the
+    known formats first and only falling back to the slow 'mixed' parser for leftovers.
+    """
+    if pd.api.types.is_datetime64_any_dtype(raw):
+        return raw
+
+    codes, uniques = pd.factorize(raw)
+    u = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    dayfirst, parsed = _parse_slash_dates(u)
+    for fmt in (ISO_FORMAT, 'mixed'):
+        miss = parsed.isna() & (u != "")
+        if not miss.any(): break
+        extra = {'dayfirst': dayfirst} if fmt == 'mixed' else {}
+        parsed[miss] = pd.to_datetime(u[miss], format=fmt, errors='coerce', **extra)
+
+    out = parsed.to_numpy(dtype='datetime64[ns]')
+    if len(out) == 0:
+        return pd.Series(pd.NaT, index=raw.index, dtype='datetime64[ns]')
+    dates = out[np.where(codes < 0, 0, codes)]
+    dates[codes < 0] = np.datetime64('NaT')
+    return pd.Series(dates, index=raw.index)
+
+# --- 2. REVENUE ---
+def estimate_revenue(revenue, pax, event_type):
+    """Keeps recorded revenue and falls back to pax x event rate where it's missing"""
+    cat = event_type.astype('category')
+    rate_table = np.array([EVENT_RATES.get(str(c), DEFAULT_RATE) for c in cat.cat.categories] + [DEFAULT_RATE], dtype=float)
+    rates = rate_table[cat.cat.codes.to_numpy()]  # code -1 (missing) picks the trailing default
+    rev = revenue.to_numpy(dtype=float, na_value=np.nan)
+    return np.where(np.isfinite(rev) & (rev > 0), rev, pax.to_numpy(dtype=float) * rates)
+
+# --- 3. PIPELINE ---
+def clean_orders(df):
+    """Turns the raw order table into the typed frame every tab works with"""
+    df['Date'] = parse_dates(df['Date'])
+    df['Date_Valid'] = df['Date'].notna()
+    df = df.sort_values('Date', na_position='last')
+    df['Month_Year'] = df['Date'].dt.to_period('M')
+
+    # Ensure Columns Exist
+    for c in NUMERIC_COLS + TEXT_COLS:
+        if c not in df.columns:
+            df[c] = 0 if c in NUMERIC_COLS else ""
+
+    # Force Numbers
+    df['Revenue'] = pd.to_numeric(df['Revenue'], errors='coerce')
+    df['Pax'] = pd.to_numeric(df['Pax'], errors='coerce').fillna(0)
+    df['Pramusaji'] = pd.to_numeric(df['Pramusaji'], errors='coerce').fillna(0)
+    df['Phone_Clean'] = df['Phone_Number'].fillna('').astype(str).str.replace(r'\D', '', regex=True)
+    # Remember which revenues are estimates: edits re-estimate them instead of storing them
+    rev = df['Revenue'].to_numpy(dtype=float, na_value=np.nan)
+    df['Revenue_Estimated'] = ~(np.isfinite(rev) & (rev > 0))
+    df['Revenue'] = estimate_revenue(df['Revenue'], df['Pax'], df['Event_Type'])
+    df['Dishes'] = dishes_column(df['Menu_Items'])
+    df['Lat'], df['Lon'] = geocode_column(df['Location'])
+
+    # Low-cardinality text -> categoricals (smaller frame, faster groupbys)
+    for c in CATEGORY_COLS:
+        df[c] = df[c].astype('category')
+    return df
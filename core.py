@@ -0,0 +1,188 @@
+"""
+Pure compute layer behind the tabs.
+
+Every function takes the cleaned order frame plus plain arguments and returns
+plain frames, dicts or numbers; nothing here touches Streamlit. Results are
+memoized per (function, data version, arguments) in small LRU caches, so a
+rerun from a widget that doesn't change the data (year picker, page number,
+slider) is a dict lookup. Returned frames are shared between sessions: treat
+them as read-only.
+"""
+import math
+import threading
+import functools
+from collections import OrderedDict
+
+import pandas as pd
+
+import storage
+import rollup
+import menu
+import customers
+import capacity
+import forecasting
+
+CORE_STATS = {"hits": 0, "misses": 0}
+_LOCK = threading.Lock()
+_CACHES = []
+
+def memoized(maxsize=32):
+    """LRU-caches fn(df, *args) by df's data version and the (hashable) other arguments"""
+    def wrap(fn):
+        cache = OrderedDict()
+        _CACHES.append(cache)
+
+        @functools.wraps(fn)
+        def inner(df, *args):
+            version = df.attrs.get('data_version')
+            if version is None:
+                return fn(df, *args)
+            key = (version, args)
+            with _LOCK:
+                if key in cache:
+                    cache.move_to_end(key)
+                    CORE_STATS["hits"] += 1
+                    return cache[key]
+            result = fn(df, *args)
+            with _LOCK:
+                CORE_STATS["misses"] += 1
+                cache[key] = result
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return result
+        return inner
+    return wrap
+
+def clear():
+    with _LOCK:
+        for cache in _CACHES:
+            cache.clear()
+
+def get_core_stats():
+    with _LOCK:
+        return dict(CORE_STATS)
+
+# --- 1. ANALYTICS ---
+@memoized(8)
+def year_list(df):
+    return rollup.get_cube(df).year_list()
+
+@memoized()
+def yearly_kpis(df, year):
+    """Headline numbers for one year, or None when it has no orders"""
+    ys = rollup.get_cube(df).year(year)
+    if ys is None:
+        return None
+    kpis = {k: ys[k] for k in ['revenue', 'pax', 'staff', 'orders', 'busiest_month', 'top_event']}
+    top = top_clients(df, year, 1)  # by customer, as in the Analytics chart, not by spelling
+    kpis['top_client'] = top['Customer_Name'].iloc[0] if not top.empty else "-"
+    return kpis
+
+@memoized()
+def monthly_sales(df, year):
+    """Month / Sales for every calendar month of the year"""
+    ys = rollup.get_cube(df).year(year)
+    return ys['monthly'].rename('Sales').rename_axis('Month').reset_index() if ys else pd.DataFrame(columns=['Month', 'Sales'])
+
+@memoized()
+def event_counts(df, year):
+    ys = rollup.get_cube(df).year(year)
+    return ys['event_counts'].rename('Count').rename_axis('Type').reset_index() if ys else pd.DataFrame(columns=['Type', 'Count'])
+
+@memoized()
+def top_clients(df, year, n=5):
+    """Highest-revenue clients, every spelling/phone of one customer counted together (anonymous walk-ins left out)"""
+    cids = customer_ids(df)
+    sel = (df['Date_Valid'] & (df['Date'].dt.year == int(year))).to_numpy() & ~pd.isna(cids)
+    if not sel.any():
+        return pd.DataFrame(columns=['Customer_Name', 'Revenue', 'Orders'])
+    year_rev = pd.Series(df['Revenue'].to_numpy()[sel], index=cids[sel])
+    top = year_rev.groupby(level=0).agg(['sum', 'size']).nlargest(n, 'sum')
+    names = customer_profiles(df)['Name'].reindex(top.index)
+    return pd.DataFrame({'Customer_Name': names.to_numpy(), 'Revenue': top['sum'].to_numpy(), 'Orders': top['size'].to_numpy()})
+
+@memoized()
+def staffing_intensity(df, year):
+    """Average Pramusaji per order by event type"""
+    ys = rollup.get_cube(df).year(year)
+    if ys is None:
+        return pd.DataFrame(columns=['Event_Type', 'Pramusaji'])
+    return ys['staff_intensity'].rename('Pramusaji').rename_axis('Event_Type').reset_index()
+
+@memoized()
+def staffing_totals(df, year):
+    """Event_Type / Staff (total Pramusaji) / Orders, for averages over merged types"""
+    ys = rollup.get_cube(df).year(year)
+    if ys is None:
+        return pd.DataFrame(columns=['Event_Type', 'Staff', 'Orders'])
+    return ys['event_staff'][['Staff', 'Orders']].rename_axis('Event_Type').reset_index()
+
+@memoized()
+def dish_counts(df, year, n=5):
+    """Menu / Count of the most-ordered dishes"""
+    return menu.get_dish_index(df).top(n, year=year).rename_axis('Menu').reset_index(name='Count')
+
+@memoized()
+def year_orders(df, year):
+    return storage.filter_orders(df, year=year)
+
+@memoized(64)
+def dish_orders(df, year, query):
+    """That year's orders whose menu has the dish"""
+    ids = menu.get_dish_index(df).orders_with(query, year=year)
+    ydf = year_orders(df, year)
+    return ydf.loc[ydf['Order_ID'].isin(ids), ['Date', 'Customer_Name', 'Order_Title', 'Pax']]
+
+@memoized()
+def delivery_points(df, year):
+    """lat/lon of that year's geocoded deliveries"""
+    return year_orders(df, year)[['Lat', 'Lon']].dropna().rename(columns={'Lat': 'lat', 'Lon': 'lon'})
+
+# --- 2. CUSTOMERS ---
+@memoized(4)
+def customer_ids(df):
+    """Canonical customer ID per order, positionally (None for anonymous walk-ins; see customers.py)"""
+    return customers.assign(df)
+
+@memoized(4)
+def customer_profiles(df):
+    """Customer_ID-indexed name, phone, order count, lifetime revenue and last order"""
+    return customers.profiles(df, customer_ids(df))
+
+# --- 3. FORECAST ---
+@memoized()
+def forecast_outlook(df, engine, horizon):
+    """Monthly outlook frame for the next `horizon` months, or None with too little history"""
+    model = forecasting.get_model(df, engine)
+    return model.outlook(horizon) if model is not None else None
+
+@memoized(64)
+def forecast_month(df, engine, year, month):
+    """Prediction for one target month plus the historical maxima it is compared with"""
+    model = forecasting.get_model(df, engine)
+    if model is None:
+        return None
+    pred = model.predict([pd.Period(f"{year}-{month:02d}", freq='M')]).iloc[0]
+    staff = math.ceil(pred['Staff'])
+    return {
+        'revenue': pred['Revenue'], 'factor': pred['Factor'], 'staff': staff,
+        'efficiency': pred['Revenue'] / staff if staff > 0 else 0,
+        'revenue_lo': pred['Revenue_Lo'], 'revenue_hi': pred['Revenue_Hi'],
+        'staff_lo': math.floor(pred['Staff_Lo']), 'staff_hi': math.ceil(pred['Staff_Hi']),
+        'history_max_revenue': model.history_max['Revenue'], 'history_max_staff': model.history_max['Staff'],
+    }
+
+# --- 4. SCHEDULE ---
+@memoized()
+def schedule_slice(df, view_mode, today, r0=None, r1=None, text=None):
+    """Upcoming (soonest first) or past (latest first) orders within the optional date range and text filter"""
+    if view_mode == "Upcoming":
+        start = today if r0 is None else max(today, r0)
+        return storage.filter_orders(df, start=start, end=r1, text=text).sort_values('Date', ascending=True)
+    end = today if r1 is None else min(today, r1)
+    return storage.filter_orders(df, start=r0, end=end, text=text).sort_values('Date', ascending=False)
+
+@memoized(16)
+def capacity_outlook(df, start, days, staff_pool, kitchen_pax):
+    """Booked vs expected daily load from `start`, overbooked days flagged (see capacity.py)"""
+    return capacity.forecast_days(capacity.get_daily_load(df), start, days, staff_pool, kitchen_pax)
@@ -0,0 +1,331 @@
+"""
+Customer identity resolution.
+
+Orders carry a free-text Customer_Name and, sometimes, a phone number, so one
+client shows up as "Kak Timah", "kak timah " and "Timah". Every order is
+resolved to a canonical customer ID:
+
+- the same phone (normalized to 01xxxxxxxx) is the same customer;
+- otherwise the name key (lower-case, honorifics such as "kak"/"dato" dropped,
+  words sorted) is matched exactly, then fuzzily against the names sharing a
+  word prefix with it (blocking, so each lookup scores a handful of names
+  rather than the whole book). rapidfuzz does the scoring when installed,
+  difflib otherwise;
+- a name match whose customer already has a different phone is a different
+  customer (two "Farah"s with their own numbers stay apart).
+
+Resolved orders are remembered by Order_ID in .cache/customers.pkl, so a
+restart or a new data version only resolves orders it hasn't seen, and each
+save resolves its own row through the storage change listener.
+
+    python customers.py               # customers recorded under several spellings
+"""
+import os
+import re
+import sys
+import pickle
+import difflib
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+import storage
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:  # difflib fallback: same 0-100 scores, just slower
+    fuzz = process = None
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'customers.pkl')
+INDEX_FORMAT = 1
+SIMILARITY = 88   # 0-100 score for two name keys to count as one spelling
+WORD_SIMILARITY = 75  # ...and for each of their words
+MIN_FUZZY = 5     # shorter name keys ("wan", "cu") only match exactly
+BLOCK_CHARS = 3   # names are only compared with names sharing a word prefix this long (same word, close length)
+
+# --- 1. KEYS ---
+HONORIFICS = {"kak", "akak", "k", "abang", "abg", "bang", "adik", "dik", "cik", "encik", "en", "puan", "pn",
+              "tuan", "tn", "dato", "datuk", "datin", "dr", "haji", "hj", "hajah", "hjh", "cikgu", "ustaz",
+              "ustazah", "aunty", "auntie", "uncle", "mr", "mrs", "ms", "madam", "lt", "kol", "kapt", "mej"}
+ANONYMOUS = {"", "unknown", "nan", "none", "no name", "customer"}
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_NON_DIGIT = re.compile(r"\D")
+
+def name_key(name):
+    """'Kak Timah ' -> 'timah'; None for blank / "Unknown" names"""
+    words = _NON_WORD.sub(" ", str(name).lower()).split()
+    if " ".join(words) in ANONYMOUS:
+        return None
+    core_words = [w for w in words if w not in HONORIFICS]
+    return " ".join(sorted(core_words or words))
+
+def normalize_phone(phone):
+    """'+60 19-340 4058' / '193404058' -> '0193404058'; None unless it looks like a Malaysian number"""
+    digits = _NON_DIGIT.sub("", str(phone))
+    if digits.startswith("60"):
+        digits = digits[1:]
+    elif not digits.startswith("0"):
+        digits = "0" + digits
+    return digits if 10 <= len(digits) <= 11 else None
+
+def _blocks(key):
+    """(word count, word position, word prefix, key length) per word: a fuzzy match must share one"""
+    words = key.split()
+    return {(len(words), i, w[:BLOCK_CHARS], len(key)) for i, w in enumerate(words)}
+
+def _lengths(n):
+    """Key lengths that can still score SIMILARITY against a key of length n (ratio = 2*matches/total)"""
+    return range(-(-SIMILARITY * n // (200 - SIMILARITY)), n * (200 - SIMILARITY) // SIMILARITY + 1)
+
+def _new_id(seed):
+    return "C" + hashlib.blake2b(seed.encode('utf-8'), digest_size=5).hexdigest()
+
+def _ratio(a, b):
+    return fuzz.ratio(a, b) if fuzz is not None else 100 * difflib.SequenceMatcher(None, a, b).ratio()
+
+def _same_words(a, b):
+    """Word-by-word check behind a whole-key match ("selayang utama" is not "selayang uitm")"""
+    wa, wb = a.split(), b.split()
+    return len(wa) == len(wb) and all(x == y or _ratio(x, y) >= WORD_SIMILARITY for x, y in zip(wa, wb))
+
+# --- 2. INDEX ---
+RESOLVE_STATS = {"phone": 0, "exact": 0, "fuzzy": 0, "new": 0, "anonymous": 0, "loaded": 0}
+
+class CustomerIndex:
+    def __init__(self, state=None):
+        state = state or {}
+        self.by_phone = state.get("by_phone", {})      # phone -> customer ID
+        self.by_name = state.get("by_name", {})        # name key -> customer ID (first customer seen with it)
+        self.phones = state.get("phones", {})          # customer ID -> its phones
+        self.order_cust = state.get("order_cust", {})  # Order_ID -> customer ID ("" = anonymous walk-in)
+        self.blocks = {}    # see _blocks() -> name keys
+        self.prefixes = {}  # word prefix -> name keys (lookup as you type)
+        for key in self.by_name:
+            self._block(key)
+        self.dirty = False
+
+    def _block(self, key):
+        for b in _blocks(key):
+            self.blocks.setdefault(b, set()).add(key)
+        for w in key.split():
+            self.prefixes.setdefault(w[:BLOCK_CHARS], set()).add(key)
+
+    def state(self):
+        return {"by_phone": self.by_phone, "by_name": self.by_name, "phones": self.phones, "order_cust": self.order_cust}
+
+    def _compatible(self, cid, phone):
+        return not phone or not self.phones.get(cid) or phone in self.phones[cid]
+
+    def similar(self, key, limit=5):
+        """(name key, score) of known names within SIMILARITY of key, best first"""
+        words = key.split()
+        pool = set().union(*(self.blocks.get((len(words), i, w[:BLOCK_CHARS], n), ())
+                             for i, w in enumerate(words) for n in _lengths(len(key))))
+        if process is not None:
+            scored = [(c, s) for c, s, _ in process.extract(key, pool, scorer=fuzz.ratio, score_cutoff=SIMILARITY, limit=None)]
+        else:
+            scored = []
+            for c in pool:
+                m = difflib.SequenceMatcher(None, key, c)
+                if m.quick_ratio() * 100 >= SIMILARITY and m.ratio() * 100 >= SIMILARITY:
+                    scored.append((c, 100 * m.ratio()))
+            scored.sort(key=lambda cs: -cs[1])
+        return [(c, s) for c, s in scored if _same_words(key, c)][:limit]
+
+    def match(self, key, phone):
+        """Existing customer ID for a (name key, normalized phone), or None"""
+        if phone and phone in self.by_phone:
+            RESOLVE_STATS["phone"] += 1
+            return self.by_phone[phone]
+        if key is None:
+            return None
+        cid = self.by_name.get(key)
+        if cid is not None and self._compatible(cid, phone):
+            RESOLVE_STATS["exact"] += 1
+            return cid
+        if len(key) >= MIN_FUZZY:
+            for cand, _ in self.similar(key):
+                cid = self.by_name[cand]
+                if self._compatible(cid, phone):
+                    RESOLVE_STATS["fuzzy"] += 1
+                    return cid
+        return None
+
+    def resolve(self, key, phone):
+        """Customer ID for (name key, phone), registering a new customer if nobody matches"""
+        if key is None and not phone:
+            RESOLVE_STATS["anonymous"] += 1
+            return ""
+        cid = self.match(key, phone)
+        if cid is None:
+            cid = _new_id(f"p:{phone}" if phone else f"n:{key}")
+            RESOLVE_STATS["new"] += 1
+        if phone:
+            self.by_phone[phone] = cid
+            self.phones.setdefault(cid, set()).add(phone)
+        if key is not None and key not in self.by_name:
+            self.by_name[key] = cid
+            self._block(key)
+        return cid
+
+    def add(self, rows):
+        """Resolves cleaned order rows (oldest first, so the first spelling seen stays canonical)"""
+        if rows.empty:
+            return
+        rows = rows.sort_values('Date', kind='stable', na_position='last')
+        names = {n: name_key(n) for n in pd.unique(rows['Customer_Name'].astype(str))}
+        phones = {p: normalize_phone(p) for p in pd.unique(rows['Phone_Clean'].astype(str))}
+        seen = {}
+        for oid, name, phone in zip(rows['Order_ID'].astype(str).tolist(), rows['Customer_Name'].astype(str).tolist(), rows['Phone_Clean'].astype(str).tolist()):
+            pair = (names[name], phones[phone])
+            if pair not in seen:
+                seen[pair] = self.resolve(*pair)
+            self.order_cust[oid] = seen[pair]
+        self.dirty = True
+
+    def remove(self, order_ids):
+        for oid in order_ids:
+            self.order_cust.pop(str(oid), None)
+        self.dirty = True
+
+    def assign(self, df):
+        """Customer ID per row of df, positionally (None for anonymous walk-ins); resolves unseen orders first"""
+        ids = df['Order_ID'].astype(str).tolist()
+        get = self.order_cust.get
+        cids = np.array([get(o) for o in ids], dtype=object)
+        unseen = np.equal(cids, None)
+        if unseen.any():
+            self.add(df[unseen])
+            cids = np.array([get(o) for o in ids], dtype=object)
+        cids[cids == ""] = None
+        return cids
+
+    def find(self, query, limit=5):
+        """Customer IDs for a (partial) phone or name: exact, then word-prefix, then fuzzy matches"""
+        q = str(query).strip()
+        digits = _NON_DIGIT.sub("", q)
+        hits = []
+        if len(digits) >= 3 and len(digits) * 2 >= len(q.replace(" ", "")):
+            phone = normalize_phone(digits)
+            if phone in self.by_phone:
+                hits.append(self.by_phone[phone])
+            hits += [cid for p, cid in self.by_phone.items() if digits in p]
+        else:
+            key = name_key(q)
+            if key is None or len(key) < BLOCK_CHARS:
+                return []
+            if key in self.by_name:
+                hits.append(self.by_name[key])
+            words = [w for w in key.split() if len(w) >= BLOCK_CHARS]
+            for cand in set().union(*(self.prefixes.get(w[:BLOCK_CHARS], ()) for w in words)):
+                if all(any(cw.startswith(w) for cw in cand.split()) for w in words):
+                    hits.append(self.by_name[cand])
+            hits += [self.by_name[c] for c, _ in self.similar(key, limit)]
+        return list(dict.fromkeys(hits))[:limit]
+
+# --- 3. PROFILES ---
+def profiles(df, cids):
+    """Per customer: display name, phone, orders, lifetime revenue, first/last order date and last order"""
+    d = pd.DataFrame({
+        'Customer_ID': cids, 'Name': df['Customer_Name'].astype(str).to_numpy(),
+        'Phone': df['Phone_Number'].fillna('').astype(str).to_numpy(), 'Date': df['Date'].to_numpy(),
+        'Revenue': df['Revenue'].to_numpy(), 'Title': df['Order_Title'].astype(str).to_numpy(),
+        'Pax': df['Pax'].to_numpy(), 'Order_ID': df['Order_ID'].astype(str).to_numpy(),
+    }).dropna(subset=['Customer_ID'])
+    if d.empty:
+        return pd.DataFrame(columns=['Name', 'Phone', 'Orders', 'Revenue', 'First', 'Last', 'Last_Title', 'Last_Pax', 'Last_ID'])
+    d = d.sort_values('Date', kind='stable', na_position='first')
+    g = d.groupby('Customer_ID', sort=False)
+    out = g.agg(Orders=('Revenue', 'size'), Revenue=('Revenue', 'sum'), First=('Date', 'min'), Last=('Date', 'max'))
+    last = g.tail(1).set_index('Customer_ID')
+    out['Last_Title'], out['Last_Pax'], out['Last_ID'] = last['Title'], last['Pax'], last['Order_ID']
+    # Most used spelling (a known name over "Unknown"), latest phone
+    keys = {n: name_key(n) for n in d['Name'].unique()}
+    named = d[d['Name'].map(keys).notna()]
+    spellings = named.groupby(['Customer_ID', 'Name'], sort=False).size().sort_values(ascending=False, kind='stable')
+    out['Name'] = spellings.reset_index().drop_duplicates('Customer_ID').set_index('Customer_ID')['Name']
+    out['Name'] = out['Name'].fillna("Unknown")
+    phones = d[d['Phone'].str.strip() != ""].groupby('Customer_ID').tail(1).set_index('Customer_ID')['Phone']
+    out['Phone'] = phones.reindex(out.index).fillna("")
+    return out[['Name', 'Phone', 'Orders', 'Revenue', 'First', 'Last', 'Last_Title', 'Last_Pax', 'Last_ID']]
+
+# --- 4. PERSISTENCE ---
+_LOCK = threading.RLock()
+_CACHE = {"index": None}
+
+def _read_disk():
+    try:
+        with open(CACHE_FILE, 'rb') as f:
+            blob = pickle.load(f)
+        if blob.get("format") == INDEX_FORMAT:
+            RESOLVE_STATS["loaded"] += 1
+            return blob["state"]
+    except Exception:
+        pass
+    return None
+
+def _save(index):
+    """Atomically writes the index next to the other caches (called under _LOCK)"""
+    if not index.dirty:
+        return
+    tmp = f"{CACHE_FILE}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        with open(tmp, 'wb') as f:
+            pickle.dump({"format": INDEX_FORMAT, "state": index.state()}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, CACHE_FILE)
+        index.dirty = False
+    except Exception as e:
+        print(f"❌ Could not save the customer index: {e}")
+        if os.path.exists(tmp): os.remove(tmp)
+
+def get_index():
+    """The process-wide CustomerIndex (read from disk on first use)"""
+    with _LOCK:
+        if _CACHE["index"] is None:
+            _CACHE["index"] = CustomerIndex(_read_disk())
+        return _CACHE["index"]
+
+def assign(df):
+    """Customer ID per row of df; newly seen orders are resolved and persisted"""
+    with _LOCK:
+        index = get_index()
+        cids = index.assign(df)
+        _save(index)
+        return cids
+
+def find(query, limit=5):
+    with _LOCK:
+        return get_index().find(query, limit)
+
+def match(name, phone):
+    """Existing customer ID for a name/phone typed into a form (nothing is registered), or None"""
+    with _LOCK:
+        return get_index().match(name_key(name), normalize_phone(phone) if phone else None)
+
+def _on_change(old, new):
+    with _LOCK:
+        index = _CACHE["index"]
+        if index is None:
+            return  # not loaded yet: the next assign() resolves the new orders
+        if new is not None:
+            index.add(new)
+        elif old is not None:
+            index.remove(old['Order_ID'])
+        _save(index)
+
+storage.subscribe(_on_change)
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else storage.DATA_FILE
+    df = storage._parse_orders(path)
+    index = CustomerIndex()
+    cids = index.assign(df)
+    prof = profiles(df, cids)
+    print(f"{len(df):,} orders -> {len(prof):,} customers ({pd.isna(cids).sum():,} anonymous); {RESOLVE_STATS}")
+    spellings = pd.Series(df['Customer_Name'].astype(str).str.strip().to_numpy(), index=cids).dropna()
+    multi = spellings.groupby(level=0).unique()
+    for cid, names in multi[multi.map(len) > 1].items():
+        print(f"  {cid}  {prof.at[cid, 'Name']!r:<28} <- {', '.join(map(repr, names))}")
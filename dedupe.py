@@ -0,0 +1,217 @@
+"""
+Near-duplicate order detection.
+
+The same booking often lands twice: forwarded from WhatsApp and re-typed.
+Orders are only compared with orders on the same day, and within the day only
+with those whose text looks alike:
+
+- every distinct Order_Title / Details value gets a MinHash signature of its
+  character 5-grams (numpy, once per distinct value, so repeated text is free);
+- a row's signature is the element-wise minimum of its title's and details'
+  signatures, which is the MinHash of the union of their shingles;
+- LSH bands of that signature plus the day and a head-count cell are the
+  candidate keys, so no pair is compared unless it already shares a day, a
+  similar size and a band.
+
+Candidates with the same head count (within PAX_TOLERANCE) and an estimated
+Jaccard similarity of at least SIMILARITY are duplicates. The earliest row of
+each group is the original. Results are built once per data version; pairs a
+manager marked "not a duplicate" are kept in .cache/not_duplicates.json.
+
+    python dedupe.py                  # list the duplicates in cleaned_revenue_data.csv
+"""
+import os
+import sys
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+DISMISSED_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'not_duplicates.json')
+SHINGLE = 5          # characters per shingle
+BANDS, ROWS = 8, 4   # LSH: 32 MinHash values; a pair at 0.6 similarity becomes a candidate half the time, at 0.8 98%
+SIMILARITY = 0.7     # estimated Jaccard of the title+details shingles
+PAX_TOLERANCE = 0.1  # head counts may differ by this share of the larger one
+CHUNK = 20000        # distinct texts hashed per numpy pass (bounds memory)
+
+_RNG = np.random.default_rng(20240501)
+_MUL = _RNG.integers(1, 2**63, BANDS * ROWS, dtype=np.uint64) | np.uint64(1)
+_ADD = _RNG.integers(0, 2**63, BANDS * ROWS, dtype=np.uint64)
+_FNV = np.uint64(1099511628211)
+
+# --- 1. SIGNATURES ---
+def _normalize(texts):
+    """Lower-case, punctuation-free, single-spaced and at least SHINGLE characters long"""
+    s = pd.Series(texts, dtype=object).fillna("").astype(str).str.lower()
+    s = s.str.replace(r"[\W_]+", " ", regex=True).str.strip()
+    return (" " + s + " ").str.pad(SHINGLE, side='right').tolist()
+
+def _minhash(texts):
+    enc = [t.encode('utf-8') for t in texts]
+    lens = np.fromiter(map(len, enc), dtype=np.int64, count=len(enc))
+    starts = np.concatenate(([0], np.cumsum(lens)[:-1]))
+    buf = np.frombuffer(b"".join(enc), dtype=np.uint8).astype(np.uint64)
+    m = len(buf) - SHINGLE + 1
+    h = np.zeros(m, dtype=np.uint64)
+    for j in range(SHINGLE):
+        h = h * _FNV + buf[j:j + m]  # wraps mod 2**64
+    # Keep the n-grams that lie inside one text (every text has at least one)
+    seg = np.repeat(np.arange(len(enc)), lens)[:m]
+    keep = np.arange(m) - starts[seg] <= lens[seg] - SHINGLE
+    h, seg = h[keep], seg[keep]
+    first = np.searchsorted(seg, np.arange(len(enc)))
+    sig = np.empty((len(enc), BANDS * ROWS), dtype=np.uint32)
+    for k in range(BANDS * ROWS):
+        sig[:, k] = np.minimum.reduceat((h * _MUL[k] + _ADD[k]) >> np.uint64(32), first)
+    return sig
+
+def signatures(texts):
+    """(len(texts), BANDS*ROWS) uint32 MinHash signatures of the texts' character shingles"""
+    norm = _normalize(texts)
+    if not norm:
+        return np.empty((0, BANDS * ROWS), dtype=np.uint32)
+    return np.vstack([_minhash(norm[i:i + CHUNK]) for i in range(0, len(norm), CHUNK)])
+
+def _same_pax(pa, pb):
+    return np.abs(pa - pb) <= PAX_TOLERANCE * np.maximum(pa, pb)
+
+# --- 2. INDEX ---
+class DuplicateIndex:
+    def __init__(self, df):
+        self.pos = np.flatnonzero(df['Date_Valid'].to_numpy())  # rows of the full frame this index covers
+        df = df.iloc[self.pos]
+        self.ids = df['Order_ID']
+        self.days = df['Date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+        self.pax = df['Pax'].to_numpy(dtype=float)
+        # One signature per distinct (title, details) combination: re-sent text is hashed once
+        tcode, titles = pd.factorize(df['Order_Title'], use_na_sentinel=False)
+        dcode, details = pd.factorize(df['Details'], use_na_sentinel=False)
+        combos, self.pcode = np.unique(tcode.astype(np.int64) * max(len(details), 1) + dcode, return_inverse=True)
+        tsig, dsig = signatures(titles), signatures(details)
+        self.tcode, self.tsig = tcode, tsig
+        self.psig = np.minimum(tsig[combos // max(len(details), 1)], dsig[combos % max(len(details), 1)])
+        self.day_order = np.argsort(self.days, kind='stable')
+        self.sorted_days = self.days[self.day_order]
+        self.original, self.similarity = self._scan()
+
+    def sig(self, idx):
+        return self.psig[self.pcode[idx]]
+
+    def _candidates(self):
+        """(kept, other) row pairs sharing a day, a head-count cell and at least one LSH band"""
+        n = len(self.days)
+        rows = np.arange(n)
+        days = self.days.astype(np.uint64)
+        # Two half-offset grids over log(pax): head counts within PAX_TOLERANCE share a cell in one of
+        # them. Bands alternate grids, so a busy day's bucket isn't led by an order of another size.
+        lp = np.log1p(np.maximum(self.pax, 0)) / (-2 * np.log1p(-PAX_TOLERANCE))
+        cells = [np.floor(lp).astype(np.uint64), np.floor(lp + 0.5).astype(np.uint64)]
+        firsts, others = [], []
+        for b in range(BANDS):
+            band = self.psig[:, b * ROWS:(b + 1) * ROWS].astype(np.uint64)
+            key = band[:, 0]
+            for c in range(1, ROWS):
+                key = key * _FNV + band[:, c]
+            codes, uniq = pd.factorize((key[self.pcode] * _FNV + days) * _FNV + cells[b % 2])  # hash grouping, no sort
+            first = np.empty(len(uniq), dtype=np.int64)
+            first[codes[::-1]] = rows[::-1]  # last write wins: each bucket's earliest row
+            member = first[codes] != rows
+            firsts.append(first[codes[member]])
+            others.append(rows[member])
+        return np.concatenate(firsts), np.concatenate(others)
+
+    def _scan(self):
+        """Per row: index of its original (itself if none) and the estimated similarity to it"""
+        n = len(self.days)
+        original = np.arange(n)
+        similarity = np.ones(n)
+        a, b = self._candidates()
+        ok = ((self.sig(a) == self.sig(b)).mean(axis=1) >= SIMILARITY) & _same_pax(self.pax[a], self.pax[b])
+        a, b = a[ok], b[ok]
+        # Groups: every row points at the earliest row it's linked to
+        while len(a):
+            low = np.minimum(original[a], original[b])
+            if (original[a] == low).all() and (original[b] == low).all():
+                break
+            np.minimum.at(original, a, low)
+            np.minimum.at(original, b, low)
+        dup = np.flatnonzero(original != np.arange(n))
+        similarity[dup] = (self.sig(dup) == self.sig(original[dup])).mean(axis=1)
+        return original, similarity
+
+    def flagged(self):
+        """(copy rows, their original rows, similarity) for every row flagged as a copy, as positions in the frame"""
+        dup = np.flatnonzero(self.original != np.arange(len(self.days)))
+        return self.pos[dup], self.pos[self.original[dup]], self.similarity[dup]
+
+    def check(self, date, title, details, pax):
+        """(Order_ID, similarity) of existing orders a new one would duplicate, most similar first.
+        A typed-in order rarely repeats the forwarded message's details, so matching titles alone also count."""
+        day = np.datetime64(pd.Timestamp(date), 'D').astype(np.int64)
+        idx = self.day_order[np.searchsorted(self.sorted_days, day):np.searchsorted(self.sorted_days, day, 'right')]
+        if not len(idx):
+            return []
+        new_title = signatures([title])
+        sim = np.maximum((self.sig(idx) == np.minimum(new_title, signatures([details]))).mean(axis=1),
+                         (self.tsig[self.tcode[idx]] == new_title).mean(axis=1) if str(title).strip() else 0)
+        ok = (sim >= SIMILARITY) & _same_pax(self.pax[idx], float(pax))
+        hits = sorted(zip(sim[ok], idx[ok]), reverse=True)
+        return [(str(self.ids.iloc[i]), float(s)) for s, i in hits]
+
+# --- 3. CACHE & REVIEW ---
+_LOCK = threading.Lock()
+_CACHE = {"version": None, "index": None}
+
+def get_index(df):
+    """DuplicateIndex for df's data version (built once per version)"""
+    version = df.attrs.get('data_version')
+    with _LOCK:
+        if version is not None and _CACHE["version"] == version:
+            return _CACHE["index"]
+    index = DuplicateIndex(df)
+    with _LOCK:
+        _CACHE.update(version=version, index=index)
+    return index
+
+def load_dismissed(path=DISMISSED_FILE):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return {frozenset(p) for p in json.load(f)}
+    except (FileNotFoundError, ValueError):
+        return set()
+
+def dismiss(order_id, duplicate_of, path=DISMISSED_FILE):
+    """Remembers that two orders are separate bookings"""
+    with _LOCK:
+        pairs = load_dismissed(path) | {frozenset((str(order_id), str(duplicate_of)))}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(sorted(sorted(p) for p in pairs), f, indent=1)
+        os.replace(tmp, path)
+
+def review(df, dismissed=None):
+    """The review list: each flagged copy with its original's ID and title, dismissed pairs left out"""
+    dup, orig, sim = get_index(df).flagged()
+    out = df.iloc[dup][['Order_ID', 'Date', 'Customer_Name', 'Order_Title', 'Pax', 'Revenue']].reset_index(drop=True)
+    out['Order_ID'] = out['Order_ID'].astype(str)
+    out.insert(1, 'Duplicate_Of', df['Order_ID'].iloc[orig].astype(str).to_numpy())
+    out['Original_Title'] = df['Order_Title'].iloc[orig].to_numpy()
+    out['Similarity'] = sim
+    dismissed = load_dismissed() if dismissed is None else dismissed
+    if dismissed and len(out):
+        out = out[[frozenset(p) not in dismissed for p in zip(out['Order_ID'], out['Duplicate_Of'])]]
+    return out
+
+if __name__ == "__main__":
+    import time
+    import storage
+    path = sys.argv[1] if len(sys.argv) > 1 else storage.DATA_FILE
+    df = storage._parse_orders(path)
+    t0 = time.perf_counter()
+    out = review(df)
+    print(f"{len(df):,} orders: {len(out):,} flagged as duplicates in {time.perf_counter() - t0:.2f}s "
+          f"(RM {out['Revenue'].sum():,.0f} counted twice)")
+    if len(out):
+        print(out[['Date', 'Pax', 'Similarity', 'Order_Title', 'Original_Title']].round(2).to_string(index=False))
@@ -0,0 +1,285 @@
+"""
+Revenue & staffing forecasts.
+
+Orders are rolled up into a contiguous monthly series (empty months count as
+zero) and a model is fitted once per data version. Fitted models are kept in
+memory and pickled under .cache/, so a restarted server reuses the last fit if
+the data hasn't changed. predict() covers any number of months in one
+vectorized call and returns point estimates with a prediction interval.
+"""
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+MODEL_FORMAT = 2  # bump when a fitted model's attributes change, so old pickles are refitted
+INTERVAL_Z = 1.645  # 90% prediction interval
+TARGETS = {'Revenue': 'Revenue', 'Staff': 'Pramusaji'}
+
+FIT_STATS = {"fits": 0, "memory_hits": 0, "disk_hits": 0}
+_LOCK = threading.Lock()
+_MODELS = {}
+
+# --- 1. MONTHLY SERIES ---
+def monthly_series(df):
+    """Revenue and staff per calendar month, contiguous from first to last order month"""
+    df = df[df['Date_Valid']]
+    if df.empty:
+        return pd.DataFrame(columns=['Revenue', 'Staff'], index=pd.PeriodIndex([], freq='M'))
+    m = df.groupby(df['Date'].dt.to_period('M'))[list(TARGETS.values())].sum()
+    m.columns = list(TARGETS)
+    full = pd.period_range(m.index.min(), m.index.max(), freq='M')
+    return m.reindex(full, fill_value=0).astype(float)
+
+# --- 2. CALENDAR FEATURES ---
+# 1 Ramadan (Malaysia). Syawal open-house season follows it; Aidiladha is ~99 days after 1 Ramadan.
+RAMADAN_START = ["2018-05-17", "2019-05-06", "2020-04-24", "2021-04-13", "2022-04-03", "2023-03-23", "2024-03-12",
+                 "2025-03-02", "2026-02-19", "2027-02-08", "2028-01-28", "2029-01-16", "2030-01-06", "2030-12-26"]
+
+def calendar_features(periods):
+    """Per-month share of days in Ramadan / the following Syawal month, an Aidiladha flag and the month"""
+    periods = pd.PeriodIndex(periods, freq='M')
+    days = pd.date_range(periods.min().start_time, periods.max().end_time.normalize(), freq='D')
+    ramadan = np.zeros(len(days), dtype=bool)
+    syawal = np.zeros(len(days), dtype=bool)
+    haji = np.zeros(len(days), dtype=bool)
+    for start in pd.to_datetime(RAMADAN_START):
+        raya = start + pd.Timedelta(days=30)
+        ramadan |= (days >= start) & (days < raya)
+        syawal |= (days >= raya) & (days < raya + pd.Timedelta(days=30))
+        haji |= days == start + pd.Timedelta(days=99)
+    daily = pd.DataFrame({'ramadan': ramadan, 'syawal': syawal, 'aidiladha': haji}, index=days.to_period('M'))
+    monthly = daily.groupby(level=0).agg({'ramadan': 'mean', 'syawal': 'mean', 'aidiladha': 'max'}).reindex(periods)
+    monthly['aidiladha'] = monthly['aidiladha'].astype(float)
+    monthly['month'] = periods.month
+    return monthly.reset_index(drop=True)
+
+# --- 3. ENGINES ---
+class Engine:
+    """
+    A forecasting method for the monthly series. Subclasses implement _fit(), which
+    returns in-sample fitted values (NaN where it has none), and _point() for any
+    month index t (0 = first month of the series).
+    """
+    name = ""
+    label = ""
+
+    def fit(self, series):
+        self.start = series.index[0]
+        self.end = series.index[-1]
+        self.n = len(series)
+        self.history_max = series.max().to_dict()
+
+        # Seasonal factor: mean revenue of that calendar month / overall mean (1.0 where unknown)
+        months = series.index.month.to_numpy()
+        rev = series['Revenue'].to_numpy()
+        overall = rev.mean()
+        factor = np.ones(13)
+        if overall > 0:
+            month_mean = pd.Series(rev).groupby(months).mean()
+            factor[month_mean.index] = month_mean.to_numpy() / overall
+        self.factor = factor
+
+        self.sigma = {}
+        for name in TARGETS:
+            y = series[name].to_numpy()
+            fitted = self._fit(name, y, series.index)
+            resid = (y - fitted)[~np.isnan(fitted)]
+            self.sigma[name] = float(np.sqrt((resid ** 2).sum() / max(len(resid) - 2, 1)))
+        return self
+
+    def _spread(self, t, factor):
+        """Interval width multiplier; grows with the number of seasons ahead"""
+        return np.sqrt(np.ceil(np.maximum(t - self.n + 1, 1) / 12))
+
+    def predict(self, periods):
+        """Point forecast and interval for each pd.Period in `periods` (one vectorized pass)"""
+        periods = pd.PeriodIndex(periods, freq='M')
+        t = (periods.asi8 - self.start.ordinal).astype(int)
+        f = self.factor[periods.month.to_numpy()]
+        spread = self._spread(t, f)
+        out = pd.DataFrame({'Month': periods, 'Factor': f})
+        for name in TARGETS:
+            point = self._point(name, t, periods)
+            half = INTERVAL_Z * self.sigma[name] * spread
+            out[name] = np.maximum(point, 0)
+            out[f'{name}_Lo'] = np.maximum(point - half, 0)
+            out[f'{name}_Hi'] = np.maximum(point + half, 0)
+        return out
+
+    def outlook(self, horizon=12):
+        """The next `horizon` months after the last observed month"""
+        return self.predict(pd.period_range(self.end + 1, periods=horizon, freq='M'))
+
+class TrendSeasonal(Engine):
+    """Linear trend over the month index x the calendar month's mean revenue ratio"""
+    name = "trend_seasonal"
+    label = "Trend × Seasonality"
+
+    def _fit(self, name, y, index):
+        t = np.arange(self.n, dtype=float)
+        from sklearn.linear_model import LinearRegression  # imported on first fit: keeps app start-up light
+        lr = LinearRegression().fit(t.reshape(-1, 1), y)
+        if not hasattr(self, 'coef'):
+            self.coef = {}
+            self.t_mean = t.mean()
+            self.t_ss = ((t - self.t_mean) ** 2).sum() or 1.0
+        self.coef[name] = (float(lr.intercept_), float(lr.coef_[0]))
+        return (lr.intercept_ + lr.coef_[0] * t) * self.factor[index.month.to_numpy()]
+
+    def _point(self, name, t, periods):
+        a, b = self.coef[name]
+        return (a + b * t) * self.factor[periods.month.to_numpy()]
+
+    def _spread(self, t, factor):
+        # OLS prediction-interval widening for months far from the fitted range
+        return np.sqrt(1 + 1 / self.n + (t - self.t_mean) ** 2 / self.t_ss) * np.maximum(factor, 1e-9)
+
+class SeasonalNaive(Engine):
+    """Same calendar month one year earlier (the latest one observed)"""
+    name = "seasonal_naive"
+    label = "Seasonal Naive"
+
+    def _fit(self, name, y, index):
+        if not hasattr(self, 'y'):
+            self.y = {}
+        self.y[name] = y
+        fitted = np.full(len(y), np.nan)
+        fitted[12:] = y[:-12] if len(y) > 12 else fitted[12:]
+        return fitted
+
+    def _point(self, name, t, periods):
+        y = self.y[name]
+        if self.n < 12:
+            return np.full(len(t), y.mean())
+        src = np.where(t >= self.n, t - 12 * np.ceil((t - self.n + 1) / 12).astype(int), t - 12)
+        return np.where(src >= 0, y[np.clip(src, 0, self.n - 1)], y.mean())
+
+def _holt_winters(y, alpha, beta, gamma, phi, m=12):
+    """Additive damped Holt-Winters pass; returns one-step fitted values and the final state"""
+    n = len(y)
+    if n >= 2 * m:
+        level = y[:m].mean()
+        trend = (y[m:2 * m].mean() - level) / m
+        season = y[:m] - level
+    else:
+        level, trend, season = y.mean(), 0.0, np.zeros(m)
+    season = season.astype(float).copy()
+    fitted = np.empty(n)
+    for i in range(n):
+        s = season[i % m]
+        fitted[i] = level + phi * trend + s
+        new_level = alpha * (y[i] - s) + (1 - alpha) * (level + phi * trend)
+        trend = beta * (new_level - level) + (1 - beta) * phi * trend
+        season[i % m] = gamma * (y[i] - new_level) + (1 - gamma) * s
+        level = new_level
+    return fitted, level, trend, season
+
+class HoltWinters(Engine):
+    """Additive damped Holt-Winters in NumPy; smoothing weights by in-sample grid search"""
+    name = "holt_winters"
+    label = "Holt-Winters"
+    GRID = [(a, b, g) for a in (0.1, 0.3, 0.5, 0.7) for b in (0.0, 0.05, 0.15) for g in (0.05, 0.2, 0.4)]
+    PHI = 0.9
+
+    def _fit(self, name, y, index):
+        if not hasattr(self, 'state'):
+            self.state = {}
+        warm = 12 if len(y) >= 24 else 1
+        best = None
+        for a, b, g in self.GRID:
+            fitted, level, trend, season = _holt_winters(y, a, b, g, self.PHI)
+            sse = ((y[warm:] - fitted[warm:]) ** 2).sum()
+            if best is None or sse < best[0]:
+                best = (sse, fitted, level, trend, season)
+        _, fitted, level, trend, season = best
+        self.state[name] = (fitted, level, trend, season)
+        out = fitted.copy()
+        out[:warm] = np.nan
+        return out
+
+    def _point(self, name, t, periods):
+        fitted, level, trend, season = self.state[name]
+        h = np.maximum(t - self.n + 1, 1)
+        damp = self.PHI * (1 - self.PHI ** h) / (1 - self.PHI)  # sum of phi^1..phi^h
+        ahead = level + damp * trend + season[t % 12]
+        return np.where(t < self.n, fitted[np.clip(t, 0, self.n - 1)], ahead)
+
+class BoostedCalendar(Engine):
+    """Linear trend + gradient-boosted trees on calendar and Ramadan/Syawal/Aidiladha features"""
+    name = "gbr_calendar"
+    label = "Boosted Calendar"
+
+    def _fit(self, name, y, index):
+        from sklearn.ensemble import GradientBoostingRegressor
+        from sklearn.linear_model import LinearRegression
+        if not hasattr(self, 'models'):
+            self.models = {}
+        t = np.arange(self.n, dtype=float)
+        lr = LinearRegression().fit(t.reshape(-1, 1), y)
+        trend = lr.intercept_ + lr.coef_[0] * t
+        X = calendar_features(index)
+        gbr = GradientBoostingRegressor(n_estimators=150, max_depth=2, learning_rate=0.05, subsample=0.8, random_state=0)
+        gbr.fit(X, y - trend)
+        self.models[name] = (float(lr.intercept_), float(lr.coef_[0]), gbr)
+        return trend + gbr.predict(X)
+
+    def _point(self, name, t, periods):
+        a, b, gbr = self.models[name]
+        return a + b * t + gbr.predict(calendar_features(periods))
+
+ENGINES = {e.name: e for e in (TrendSeasonal, SeasonalNaive, HoltWinters, BoostedCalendar)}
+DEFAULT_ENGINE = TrendSeasonal.name
+
+# --- 4. CACHE ---
+def _disk_path(engine):
+    return os.path.join(CACHE_DIR, f"forecast-{engine}.pkl")
+
+def _read_disk(engine, version):
+    try:
+        with open(_disk_path(engine), 'rb') as f:
+            blob = pickle.load(f)
+        if blob.get("format") == MODEL_FORMAT and blob.get("version") == version:
+            return blob["model"]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"❌ Forecast cache unreadable, refitting: {e}")
+    return None
+
+def _write_disk(engine, version, model):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{_disk_path(engine)}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump({"format": MODEL_FORMAT, "version": version, "model": model}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, _disk_path(engine))
+    except Exception as e:
+        print(f"❌ Could not save forecast model: {e}")
+
+def get_model(df, engine=DEFAULT_ENGINE, min_months=6):
+    """Fitted model for df's data version (memory -> disk -> fit); None if history is too short"""
+    version = df.attrs.get('data_version')
+    with _LOCK:
+        hit = _MODELS.get(engine)
+        if hit is not None and version is not None and hit[0] == version:
+            FIT_STATS["memory_hits"] += 1
+            return hit[1]
+
+    model = _read_disk(engine, version) if version is not None else None
+    if model is not None:
+        FIT_STATS["disk_hits"] += 1
+    else:
+        series = monthly_series(df)
+        if len(series) < min_months:
+            return None
+        model = ENGINES[engine]().fit(series)
+        FIT_STATS["fits"] += 1
+        if version is not None:
+            _write_disk(engine, version, model)
+    with _LOCK:
+        _MODELS[engine] = (version, model)
+    return model
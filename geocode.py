@@ -0,0 +1,144 @@
+"""
+Location geocoder for the delivery heatmap.
+
+Place names come from a gazetteer CSV (name,lat,lon): data/gazetteer.csv by
+default, or the file named by the GAZETTEER_FILE environment variable. All
+names are compiled into one Aho-Corasick automaton, so each Location string is
+scanned once whatever the gazetteer size. Matches must sit on word boundaries,
+and the longest one wins ("batu caves" beats "kl", "hospital selayang" beats
+"selayang"). Results are memoized per normalized location string.
+"""
+import os
+import re
+import threading
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+GAZETTEER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.csv')
+
+# Short forms used in addresses -> gazetteer spelling
+ABBREVIATIONS = {"tmn": "taman", "jln": "jalan", "kg": "kampung", "kpg": "kampung", "sg": "sungai",
+                 "bdr": "bandar", "bt": "batu", "seri": "sri", "hosp": "hospital", "k lumpur": "kuala lumpur"}
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+def normalize(text):
+    """Lower-case, punctuation-free, abbreviations expanded, single-spaced"""
+    words = _NON_WORD.sub(" ", str(text).lower()).split()
+    return " ".join(ABBREVIATIONS.get(w, w) for w in words)
+
+# --- 1. MULTI-PATTERN MATCHER ---
+class Matcher:
+    """Aho-Corasick automaton over normalized place names"""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]  # pattern ids ending at each node (including via fail links)
+        for pid, name in enumerate(self.names):
+            node = 0
+            for ch in name:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({}); self.fail.append(0); self.out.append([])
+                node = nxt
+            self.out[node].append(pid)
+
+        # Breadth-first fail links
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def longest(self, text):
+        """Pattern id of the longest whole-word match in text (earliest on ties), or None"""
+        best, best_len, best_start = None, 0, 0
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            for pid in self.out[node]:
+                n = len(self.names[pid])
+                start = i - n + 1
+                if n < best_len or (n == best_len and start >= best_start):
+                    continue
+                if (start == 0 or text[start - 1] == " ") and (i + 1 == len(text) or text[i + 1] == " "):
+                    best, best_len, best_start = pid, n, start
+        return best
+
+# --- 2. GAZETTEER ---
+_LOCK = threading.Lock()
+_STATE = {"matcher": None, "coords": None, "key": None}
+
+def gazetteer_path():
+    return os.getenv("GAZETTEER_FILE") or GAZETTEER_FILE
+
+def _file_key(path):
+    try:
+        st_ = os.stat(path)
+        return (os.path.abspath(path), st_.st_mtime_ns, st_.st_size)
+    except OSError:
+        return (os.path.abspath(path), None, None)
+
+def gazetteer_key():
+    """(path, mtime, size) of the gazetteer the matcher was built from (not the file on disk now):
+    anything cached with coordinates must match it"""
+    _state()
+    return _STATE["key"]
+
+def load_gazetteer(path=None):
+    """(Re)loads the gazetteer and rebuilds the matcher; clears the memo cache"""
+    path = path or gazetteer_path()
+    key = _file_key(path)  # stat before reading: an edit mid-read only makes the key look stale
+    gz = pd.read_csv(path, dtype={'name': str})
+    gz['name'] = gz['name'].map(normalize)
+    gz = gz[gz['name'] != ""].drop_duplicates('name', keep='first')
+    with _LOCK:
+        _STATE["matcher"] = Matcher(gz['name'])
+        _STATE["coords"] = gz[['lat', 'lon']].to_numpy(dtype=float)
+        _STATE["key"] = key
+        _geocode_normalized.cache_clear()
+    return len(gz)
+
+def _state():
+    if _STATE["matcher"] is None:
+        load_gazetteer()
+    return _STATE["matcher"], _STATE["coords"]
+
+@lru_cache(maxsize=65536)
+def _geocode_normalized(text):
+    matcher, coords = _state()
+    pid = matcher.longest(text)
+    return (float(coords[pid, 0]), float(coords[pid, 1])) if pid is not None else None
+
+def geocode(location):
+    """(lat, lon) for a free-text location, or None if no gazetteer place is mentioned"""
+    return _geocode_normalized(normalize(location))
+
+def place_name(text):
+    """Normalized name of the longest gazetteer place mentioned in text, or None"""
+    matcher, _ = _state()
+    pid = matcher.longest(normalize(text))
+    return matcher.names[pid] if pid is not None else None
+
+def geocode_column(locations):
+    """Lat/Lon arrays for a Location column; each distinct string is geocoded once"""
+    codes, uniques = pd.factorize(locations)
+    table = np.full((len(uniques) + 1, 2), np.nan)  # last row: missing location
+    for i, loc in enumerate(uniques):
+        hit = geocode(loc)
+        if hit: table[i] = hit
+    picked = table[codes]
+    return picked[:, 0], picked[:, 1]
@@ -0,0 +1,272 @@
+"""
+Raw calendar export -> cleaned order rows.
+
+    python ingest.py                                  # archive/raw_orders_full_years.csv -> the order book
+    python ingest.py export.csv --out orders.csv      # into a standalone CSV instead
+    python ingest.py --workers 4 --chunksize 2000 --no-ai
+    python ingest.py --mark-only                      # the order book already has this export
+
+The raw file (Order_Title, Details, Start_Time, Location) is streamed in chunks
+and every chunk is parsed in a worker process by precompiled rules for the Malay
+booking blocks (rule_parser.py): date ("Tarikh: 4/5/2024", "13/6/2023(Selasa)"),
+time ("Jam 9.30 pagi hingga 1.00 petang"), head count ("-70 pax", "300 org
+bungkus", "Total: 290 pax"), per-head rates ("Rate RM 15.00", "RM18/pax") and the
+menu lines. Only rows with no head count the rules can find go to the LLM
+(concurrent and cached; they stay pending without an API key and are retried on
+the next run).
+
+Ingestion is incremental: each raw row is hashed on its content and rows whose
+hash is in the state file are skipped, so re-running over a newer export only
+adds the new bookings.
+"""
+import os
+import sys
+import time
+import hashlib
+import argparse
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+import journal
+import rule_parser as rules
+from storage import ORDER_COLS, DB_COLS
+
+RAW_FILE = os.path.join('archive', 'raw_orders_full_years.csv')
+STATE_FILE = os.path.join('.cache', 'ingest_state.txt')
+RAW_COLS = ['Order_Title', 'Details', 'Start_Time', 'Location']
+CHUNK_ROWS = 5000
+LOCAL_TZ = timezone(timedelta(hours=8))  # Malaysia has no DST
+PAX_PER_STAFF = 50  # serving staff estimate when the booking doesn't say
+
+# --- 1. ROWS (field rules live in rule_parser.py, compiled once per worker) ---
+EMPTY_DETAILS = {"", "no details", "nan"}
+
+def content_hash(title, details, start, location):
+    return hashlib.blake2b("\x1f".join((title, details, start, location)).encode('utf-8'), digest_size=16).hexdigest()
+
+def _local_start(start_time):
+    try:
+        start = datetime.fromisoformat(start_time.strip())
+    except ValueError:
+        return None
+    return start.astimezone(LOCAL_TZ).replace(tzinfo=None) if start.tzinfo else start
+
+def parse_row(title, details, start_time, location):
+    """
+    One raw calendar row -> (row in ORDER_COLS or None, status). Status is "ok",
+    "empty" (nothing to parse) or "unparsed" (text the rules found no head count in).
+    """
+    has_details = details.strip().lower() not in EMPTY_DETAILS
+    text = f"{title}\n{details}" if has_details else title
+    pax = rules.parse_pax(text)
+    alamat = rules._ALAMAT.search(details) if has_details else None
+    event = rules.parse_event(title, details if has_details else "")
+    staff = rules._STAFF.search(text)
+    date = rules.parse_date(details if has_details else "", _local_start(start_time))
+    row = {
+        'Date': date.strftime('%Y-%m-%d %H:%M') if date else None,
+        'Customer_Name': rules.parse_customer(title, details if has_details else ""),
+        'Phone_Number': rules.parse_phone(text),
+        'Order_Title': title.strip(),
+        'Details': details if has_details else "",
+        'Pax': pax,
+        'Pramusaji': int(staff.group(1)) if staff else (0 if event == "Packet" or not pax else max(1, round(pax / PAX_PER_STAFF))),
+        'Event_Type': event,
+        'Location': location.strip() if location.strip() not in ("", "No Location") else (alamat.group(1).strip(" *") if alamat else "Unknown"),
+        'Menu_Items': str(rules.parse_menu(details)) if has_details else "[]",
+        'Revenue': rules.parse_revenue(text, pax),
+    }
+    if pax > 0:
+        return row, "ok"
+    return row, "unparsed" if has_details else "empty"
+
+def parse_chunk(records):
+    """Worker entry point: [(hash, title, details, start, location)] -> [(hash, row, status)]"""
+    return [(h, *parse_row(*rest)) for h, *rest in records]
+
+# --- 2. LLM FALLBACK ---
+def merge_ai(row, data):
+    """Fills the fields the rules missed from an extraction (see whatsapp.build_prompt)"""
+    pax = int(pd.to_numeric(data.get('Pax'), errors='coerce') or 0)
+    if pax <= 0:
+        return None
+    menu = data.get('Menu_Items') or []
+    price = pd.to_numeric(data.get('Total_Price'), errors='coerce')
+    staff = int(pd.to_numeric(data.get('Staff_Count'), errors='coerce') or 0)
+    out = dict(row, Pax=pax)
+    out['Date'] = row['Date'] or data.get('Date')
+    out['Revenue'] = float(price) if pd.notna(price) and price > 0 else row['Revenue']
+    out['Pramusaji'] = staff or max(1, round(pax / PAX_PER_STAFF))
+    if row['Menu_Items'] == "[]":
+        out['Menu_Items'] = str(list(menu) if isinstance(menu, list) else [str(menu)])
+    if data.get('Event_Type') in ("Wedding", "Corporate", "Packet", "Buffet"):
+        out['Event_Type'] = data['Event_Type']
+    if not row['Phone_Number'] and data.get('Phone_Number'):
+        out['Phone_Number'] = rules._NON_DIGIT.sub("", str(data['Phone_Number']))
+    return out
+
+def ai_fill(pending, progress=None):
+    """[(hash, row)] the rules couldn't parse -> [(hash, row)] the LLM could; None without an API key"""
+    import utils  # Streamlit + OpenAI stack, only when there's something to send
+    results = utils.get_bulk_extraction([f"{r['Order_Title']}\n{r['Details']}" for _, r in pending], progress=progress)
+    if results is None:
+        return None
+    filled = []
+    for (h, row), (data, err) in zip(pending, results[0]):
+        merged = merge_ai(row, data) if data and not err else None
+        if merged is not None:
+            filled.append((h, merged))
+    return filled
+
+# --- 3. STATE & OUTPUT ---
+def load_state(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return {line.strip() for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+def save_state(path, hashes):
+    """Appends hashes once their rows are written (a crash in between re-ingests, never loses, a row)"""
+    if not hashes:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("".join(h + "\n" for h in hashes))
+
+class Sink:
+    """Writes parsed rows into the order book (one journal write per batch) or a standalone CSV"""
+
+    def __init__(self, out=None, store=None):
+        self.out = out
+        self.store = store
+
+    def write(self, rows):
+        if not rows:
+            return
+        df = pd.DataFrame(rows, columns=ORDER_COLS)
+        if self.out:
+            # Persistent IDs up front, as the store path gets them: a CSV without them would be migrated (rewritten) on first load
+            df = journal.fill_new_ids(df.reindex(columns=DB_COLS))
+            df.to_csv(self.out, mode='a', header=not os.path.exists(self.out), index=False)
+        else:
+            self.store.insert_many(df)
+
+def _fresh(chunk, seen):
+    """Records of the chunk not ingested yet (identical rows within the file count once)"""
+    chunk = chunk.reindex(columns=RAW_COLS).fillna("")
+    records = []
+    for title, details, start, location in chunk.itertuples(index=False, name=None):
+        h = content_hash(title, details, start, location)
+        if h not in seen:
+            seen.add(h)
+            records.append((h, title, details, start, location))
+    return records
+
+def _chunks(src, chunksize, seen, stats):
+    for chunk in pd.read_csv(src, chunksize=chunksize, dtype=str, keep_default_na=False):
+        stats["read"] += len(chunk)
+        records = _fresh(chunk, seen)
+        stats["skipped"] += len(chunk) - len(records)
+        if records:
+            yield records
+
+# --- 4. PIPELINE ---
+def mark_ingested(src, state=STATE_FILE, chunksize=CHUNK_ROWS):
+    """Records every row of src as ingested without writing it (an export the order book already has)"""
+    stats = {"read": 0, "skipped": 0}
+    marked = 0
+    for records in _chunks(src, chunksize, load_state(state), stats):
+        save_state(state, [r[0] for r in records])
+        marked += len(records)
+    return marked
+
+def run(src=RAW_FILE, out=None, store=None, state=STATE_FILE, chunksize=CHUNK_ROWS, workers=None, use_ai=True, log=print):
+    """Streams src into the sink; returns the stats dict (counts, seconds, rows/s)"""
+    stats = {"read": 0, "skipped": 0, "parsed": 0, "ai": 0, "pending": 0, "empty": 0}
+    seen = load_state(state)
+    sink = Sink(out, store)
+    unparsed = []
+    t0 = time.perf_counter()
+
+    def drain(results):
+        rows, done = [], []
+        for h, row, status in results:
+            if status == "ok":
+                rows.append(row)
+                done.append(h)
+                stats["parsed"] += 1
+            elif status == "empty":
+                done.append(h)  # nothing to parse, now or later
+                stats["empty"] += 1
+            else:
+                unparsed.append((h, row))
+                stats["pending"] += 1
+        sink.write(rows)
+        save_state(state, done)
+
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(src, chunksize, seen, stats)
+    first = next(chunks, None)
+    second = next(chunks, None)
+    if second is None or workers == 1:
+        # One chunk (or no pool wanted): spawning workers would cost more than it saves
+        for records in (c for c in (first, second) if c):
+            drain(parse_chunk(records))
+        for records in chunks:
+            drain(parse_chunk(records))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+            inflight = deque([pool.submit(parse_chunk, first), pool.submit(parse_chunk, second)])
+            for records in chunks:
+                inflight.append(pool.submit(parse_chunk, records))
+                while len(inflight) >= 2 * workers:  # bounded: the file is never all in memory
+                    drain(inflight.popleft().result())
+            while inflight:
+                drain(inflight.popleft().result())
+    stats["rule_seconds"] = time.perf_counter() - t0
+
+    if unparsed and use_ai:
+        log(f"🤖 {len(unparsed)} rows need the LLM...")
+        filled = ai_fill(unparsed)
+        if filled is None:
+            log("⚠️ No OpenAI API key: unparsed rows stay pending until the next run.")
+        else:
+            sink.write([row for _, row in filled])
+            save_state(state, [h for h, _ in filled])
+            stats["ai"] = len(filled)
+            stats["pending"] -= len(filled)
+
+    stats["seconds"] = time.perf_counter() - t0
+    stats["rows_per_s"] = stats["read"] / stats["seconds"] if stats["seconds"] else 0.0
+    stats["rule_rows_per_s"] = stats["read"] / stats["rule_seconds"] if stats["rule_seconds"] else 0.0
+    return stats
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Raw calendar export -> cleaned orders (incremental)")
+    ap.add_argument("src", nargs="?", default=RAW_FILE)
+    ap.add_argument("--out", help="write to this CSV instead of the order book")
+    ap.add_argument("--state", default=STATE_FILE, help="hashes of rows already ingested")
+    ap.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    ap.add_argument("--workers", type=int, default=None, help="parser processes (default: all cores)")
+    ap.add_argument("--no-ai", action="store_true", help="never call the LLM; unparsed rows stay pending")
+    ap.add_argument("--mark-only", action="store_true", help="only record src's rows as ingested (already in the order book)")
+    args = ap.parse_args()
+
+    if args.mark_only:
+        print(f"Marked {mark_ingested(args.src, args.state, args.chunksize):,} rows as ingested in {args.state}")
+        sys.exit(0)
+
+    store = None
+    if not args.out:
+        import utils
+        store = utils.get_store()
+    s = run(args.src, args.out, store, args.state, args.chunksize, args.workers, not args.no_ai)
+    print(f"Read {s['read']:,} rows: {s['parsed']:,} parsed by rules, {s['ai']:,} by the LLM, "
+          f"{s['skipped']:,} already ingested, {s['empty']:,} empty, {s['pending']:,} pending")
+    print(f"⏱️ {s['seconds']:.2f}s total, {s['rows_per_s']:,.0f} rows/s ({s['rule_rows_per_s']:,.0f} rows/s through the rules)")
+    sys.exit(0)
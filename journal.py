@@ -0,0 +1,230 @@
+"""
+Append-only order journal.
+
+Saves, edits and deletes are appended as one JSON line each to
+'<csv>.journal.jsonl' instead of rewriting the CSV. Loading replays the journal
+on top of the base CSV; compaction folds it into a new base file atomically.
+
+Every order is keyed by a persistent Order_ID. Legacy CSVs without one are
+migrated once (migrate_ids) so an ID never depends on the row's position.
+
+    python journal.py compact   # fold the journal into cleaned_revenue_data.csv
+    python journal.py migrate   # give legacy rows persistent Order_IDs
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import fcntl  # POSIX only: guards against other server processes
+except ImportError:
+    fcntl = None
+
+JOURNAL_SUFFIX = '.journal.jsonl'
+COMPACT_BYTES = 256 * 1024  # background compaction kicks in past this journal size
+ID_COL = 'Order_ID'
+LEGACY_PREFIX = 'row-'  # positional placeholder for rows not yet migrated
+
+_THREAD_LOCK = threading.RLock()
+_COMPACTING = threading.Event()
+
+# --- 1. IDS & LOCKING ---
+def new_order_id():
+    return uuid.uuid4().hex[:12]
+
+def fill_order_ids(df):
+    """Legacy rows without an ID get a positional placeholder until migrate_ids() persists real ones"""
+    if ID_COL not in df.columns:
+        df[ID_COL] = None
+    ids = df[ID_COL].astype(object)
+    missing = ids.isna() | (ids.astype(str).str.strip() == "")
+    if missing.any():
+        pos = pd.Series(range(len(df)), index=df.index)
+        ids[missing] = LEGACY_PREFIX + pos[missing].astype(str)
+    df[ID_COL] = ids.astype(str)
+    return df
+
+def fill_new_ids(df):
+    """Copy of df with a fresh persistent ID for every row that has none (bulk inserts)"""
+    df = df.copy()
+    ids = df[ID_COL].astype(object) if ID_COL in df.columns else pd.Series(None, index=df.index, dtype=object)
+    missing = ids.isna() | (ids.astype(str).str.strip() == "")
+    ids[missing] = [new_order_id() for _ in range(int(missing.sum()))]
+    df[ID_COL] = ids.astype(str)
+    return df
+
+def has_legacy_ids(df):
+    return bool(df[ID_COL].astype(str).str.startswith(LEGACY_PREFIX).any())
+
+@contextmanager
+def locked(path):
+    """Exclusive lock shared by every writer of this order book (threads and processes)"""
+    with _THREAD_LOCK:
+        with open(path + '.lock', 'a') as fh:
+            if fcntl: fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl: fcntl.flock(fh, fcntl.LOCK_UN)
+
+# --- 2. WRITE PATH ---
+def append(path, op, order_id, data=None):
+    """Appends one insert/update/delete record. Cost is independent of the CSV size."""
+    append_many(path, [(op, order_id, data)])
+
+def append_many(path, items):
+    """Appends (op, order_id, data) records under one lock and one fsync (bulk imports)"""
+    now = time.time()
+    lines = []
+    for op, order_id, data in items:
+        rec = {"op": op, "id": str(order_id), "ts": now}
+        if data is not None:
+            rec["data"] = data
+        lines.append(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+    if not lines:
+        return
+    with locked(path):
+        with open(path + JOURNAL_SUFFIX, 'a', encoding='utf-8') as f:
+            f.write("".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+    maybe_compact(path)
+
+def journal_stat(path):
+    try:
+        st_ = os.stat(path + JOURNAL_SUFFIX)
+        return (st_.st_mtime_ns, st_.st_size)
+    except FileNotFoundError:
+        return (0, 0)
+
+# --- 3. READ PATH ---
+def read(path):
+    """Returns all journal records, skipping a torn trailing line"""
+    records = []
+    try:
+        with open(path + JOURNAL_SUFFIX, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+def fold(records):
+    """Collapses the journal into final per-ID field changes and a set of deleted IDs"""
+    changes, deleted = {}, set()
+    for rec in records:
+        oid, op = rec.get("id"), rec.get("op")
+        if op == "insert":
+            changes[oid] = dict(rec.get("data") or {})
+            deleted.discard(oid)
+        elif op == "update" and oid not in deleted:
+            changes.setdefault(oid, {}).update(rec.get("data") or {})
+        elif op == "delete":
+            changes.pop(oid, None)
+            deleted.add(oid)
+    return changes, deleted
+
+def apply(df, records, prepare=None, unprepare=None):
+    """
+    Replays journal records on top of df (keyed by Order_ID). Updates are merged
+    onto the row's stored values (`unprepare` recovers them from a prepared df, so
+    nothing `prepare` derived gets written back); `prepare` turns the touched rows
+    into df's schema. Replaying the same records twice gives the same result.
+    """
+    changes, deleted = fold(records)
+    if not changes and not deleted:
+        return df
+
+    touched = df[ID_COL].isin(changes.keys() | deleted)
+    current = df[touched & df[ID_COL].isin(changes.keys())].drop_duplicates(ID_COL, keep='last')
+    if unprepare is not None:
+        current = unprepare(current)
+    current = current.set_index(ID_COL)
+
+    rows = []
+    for oid, fields in changes.items():
+        row = current.loc[oid].to_dict() if oid in current.index else {}
+        row.update(fields)
+        row[ID_COL] = oid
+        rows.append(row)
+
+    kept = df[~touched]
+    if not rows:
+        return kept
+    new_rows = pd.DataFrame(rows)
+    if prepare is not None:
+        new_rows = prepare(new_rows)
+    return pd.concat([kept, new_rows], ignore_index=True)
+
+# --- 4. COMPACTION & MIGRATION ---
+def _read_base(path):
+    base = pd.read_csv(path, encoding='utf-8', on_bad_lines='skip', quotechar='"', dtype=str, keep_default_na=False)
+    return fill_order_ids(base)
+
+def _rewrite(path, base, had_journal):
+    """Atomically replaces the base CSV, then clears the journal it now contains"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    base.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+    # Base already contains every record, so a crash before this line only means a harmless re-replay
+    if had_journal:
+        os.remove(path + JOURNAL_SUFFIX)
+
+def compact(path):
+    """Folds the journal into a new base CSV (atomic replace), then clears the journal"""
+    with locked(path):
+        records = read(path)
+        if not records:
+            return 0
+        _rewrite(path, apply(_read_base(path), records), True)
+        return len(records)
+
+def migrate_ids(path):
+    """
+    Replaces positional placeholder IDs in the base CSV with persistent ones. The
+    journal is folded in first, since its records may refer to the placeholders.
+    Returns the number of orders that got a new ID; running it again is a no-op.
+    """
+    with locked(path):
+        records = read(path)
+        base = apply(_read_base(path), records)
+        legacy = base[ID_COL].str.startswith(LEGACY_PREFIX)
+        if not legacy.any():
+            return 0
+        base.loc[legacy, ID_COL] = [new_order_id() for _ in range(int(legacy.sum()))]
+        _rewrite(path, base, bool(records))
+        return int(legacy.sum())
+
+def _compact_in_background(path):
+    try:
+        n = compact(path)
+        print(f"🗜️ Compacted {n} journal records into {path}")
+    except Exception as e:
+        print(f"❌ Journal compaction failed: {e}")
+    finally:
+        _COMPACTING.clear()
+
+def maybe_compact(path, threshold=None):
+    """Starts a background compaction once the journal grows past the threshold"""
+    if journal_stat(path)[1] < (threshold or COMPACT_BYTES) or _COMPACTING.is_set():
+        return
+    _COMPACTING.set()
+    threading.Thread(target=_compact_in_background, args=(path,), daemon=True).start()
+
+if __name__ == "__main__":
+    target = sys.argv[2] if len(sys.argv) > 2 else 'cleaned_revenue_data.csv'
+    if len(sys.argv) > 1 and sys.argv[1] == "compact":
+        print(f"Compacted {compact(target)} records into {target}")
+    elif len(sys.argv) > 1 and sys.argv[1] == "migrate":
+        print(f"Assigned persistent IDs to {migrate_ids(target)} orders in {target}")
+    else:
+        print(__doc__)
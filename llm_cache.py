@@ -0,0 +1,197 @@
+"""
+On-disk LLM response cache.
+
+Replies are stored in a small SQLite file (.cache/llm_cache.db by default,
+LLM_CACHE_FILE to move it) keyed by a SHA-256 of model, system prompt, user
+content and temperature, so an identical request is answered from disk. Entries
+expire after LLM_CACHE_TTL seconds (default 7 days), and once the file holds
+more than LLM_CACHE_MAX_MB of replies the least recently used ones are evicted.
+
+    python llm_cache.py stats | clear
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'llm_cache.db')
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_MB = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed);
+"""
+
+CACHE_STATS = {"hits": 0, "misses": 0, "bypassed": 0, "evicted": 0, "hit_seconds": 0.0, "miss_seconds": 0.0}
+_LOCK = threading.Lock()
+
+def cache_key(model, system, user, temperature):
+    payload = json.dumps([model, system or "", user or "", round(float(temperature), 3)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class LLMCache:
+    def __init__(self, path=None, ttl=None, max_mb=None):
+        self.path = path or os.getenv("LLM_CACHE_FILE") or CACHE_FILE
+        self.ttl = float(ttl if ttl is not None else os.getenv("LLM_CACHE_TTL", DEFAULT_TTL))
+        self.max_bytes = int(float(max_mb if max_mb is not None else os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 2**20)
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._conn() as con:
+            con.executescript(SCHEMA)
+
+    def _conn(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=10)
+            con.execute("PRAGMA journal_mode=WAL")
+            self._local.con = con
+        return con
+
+    def get(self, key):
+        """Cached reply or None; expired entries count as misses and are dropped"""
+        con = self._conn()
+        row = con.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        with con:
+            if now - row[1] > self.ttl:
+                con.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            con.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key, response, model=None):
+        now = time.time()
+        con = self._conn()
+        with con:
+            con.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, model, response, len(response.encode('utf-8')), now, now))
+        self.evict()
+
+    def evict(self):
+        """Drops expired entries, then least recently used ones until under the size budget"""
+        con = self._conn()
+        with con:
+            n = con.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)).rowcount
+            total = con.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                for key, size in con.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+                    if total <= self.max_bytes: break
+                    con.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    total -= size
+                    n += 1
+        with _LOCK:
+            CACHE_STATS["evicted"] += n
+        return n
+
+    def usage(self):
+        count, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": count, "bytes": size}
+
+    def clear(self):
+        con = self._conn()
+        with con:
+            return con.execute("DELETE FROM responses").rowcount
+
+_CACHE = {"cache": None}
+
+def get_cache():
+    with _LOCK:
+        if _CACHE["cache"] is None:
+            _CACHE["cache"] = LLMCache()
+        return _CACHE["cache"]
+
+def cached_call(fn, model, system, user, temperature, use_cache=True):
+    """
+    Returns fn()'s reply text, served from the cache when an identical request was
+    answered before. use_cache=False always calls the model (and refreshes the entry).
+    Cache failures never break the call itself.
+    """
+    key = cache_key(model, system, user, temperature)
+    t0 = time.perf_counter()
+    if use_cache:
+        try:
+            hit = get_cache().get(key)
+        except Exception as e:
+            print(f"❌ LLM cache read failed: {e}")
+            hit = None
+        if hit is not None:
+            with _LOCK:
+                CACHE_STATS["hits"] += 1
+                CACHE_STATS["hit_seconds"] += time.perf_counter() - t0
+            return hit
+
+    reply = fn()
+    with _LOCK:
+        CACHE_STATS["misses" if use_cache else "bypassed"] += 1
+        CACHE_STATS["miss_seconds"] += time.perf_counter() - t0
+    if reply:
+        try:
+            get_cache().put(key, reply, model)
+        except Exception as e:
+            print(f"❌ LLM cache write failed: {e}")
+    return reply
+
+def cached_stream(stream_fn, model, system, user, temperature, use_cache=True):
+    """
+    Streaming counterpart of cached_call(): yields reply chunks from stream_fn().
+    A cache hit is yielded in one piece; a fully streamed reply is stored at the end.
+    """
+    key = cache_key(model, system, user, temperature)
+    t0 = time.perf_counter()
+    if use_cache:
+        try:
+            hit = get_cache().get(key)
+        except Exception as e:
+            print(f"❌ LLM cache read failed: {e}")
+            hit = None
+        if hit is not None:
+            with _LOCK:
+                CACHE_STATS["hits"] += 1
+                CACHE_STATS["hit_seconds"] += time.perf_counter() - t0
+            yield hit
+            return
+
+    parts = []
+    for piece in stream_fn():
+        parts.append(piece)
+        yield piece
+    with _LOCK:
+        CACHE_STATS["misses" if use_cache else "bypassed"] += 1
+        CACHE_STATS["miss_seconds"] += time.perf_counter() - t0
+    if parts:
+        try:
+            get_cache().put(key, "".join(parts), model)
+        except Exception as e:
+            print(f"❌ LLM cache write failed: {e}")
+
+def get_cache_stats():
+    """Counters plus mean latency (ms) of cached vs live answers"""
+    with _LOCK:
+        s = dict(CACHE_STATS)
+    live = s["misses"] + s["bypassed"]
+    s["hit_ms"] = 1000 * s["hit_seconds"] / s["hits"] if s["hits"] else 0.0
+    s["miss_ms"] = 1000 * s["miss_seconds"] / live if live else 0.0
+    return s
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if cmd == "clear":
+        print(f"Removed {get_cache().clear()} cached replies")
+    elif cmd == "stats":
+        u = get_cache().usage()
+        print(f"{u['entries']} cached replies, {u['bytes'] / 2**20:.2f} MB in {get_cache().path}")
+    else:
+        print(__doc__)
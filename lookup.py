@@ -0,0 +1,94 @@
+"""
+Search-as-you-type order lookup for the Manager Control Panel.
+
+Built once per data version: Order_IDs sorted for prefix search, and a word
+index over each order's label (customer, title, date): sorted words plus the
+orders holding each, so every query word is a binary search for the words it
+prefixes. Neither lookup scans the order book.
+"""
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+MIN_QUERY = 2  # query words shorter than this are ignored (a lone short query only matches ID prefixes)
+_WORD = re.compile(r"\w+")
+
+class OrderLookup:
+    def __init__(self, df):
+        df = df[df['Date_Valid']].sort_values('Date', ascending=False, kind='stable')
+        self.ids = df['Order_ID'].astype(str).to_numpy()
+        self.labels = ("ID " + df['Order_ID'].astype(str) + ": " + df['Order_Title'].astype(str).str.strip().str[:40]
+                       + " — " + df['Customer_Name'].astype(str) + " (" + df['Date'].dt.strftime('%Y-%m-%d') + ")").to_numpy()
+        # Word index: postings (label rows) grouped by word, words in sorted order
+        words = pd.Series(self.labels).str.lower().str.findall(_WORD.pattern).explode().dropna()
+        codes, uniq = pd.factorize(words.to_numpy(dtype=object))
+        by_word = np.argsort(uniq.astype(str), kind='stable')
+        rank = np.empty(len(uniq), dtype=np.int64)
+        rank[by_word] = np.arange(len(uniq))
+        order = np.argsort(rank[codes], kind='stable')
+        self._lower = np.array([l.lower() for l in self.labels], dtype=object)
+        self._vocab = uniq.astype(str)[by_word]
+        self._postings = words.index.to_numpy()[order]
+        self._starts = np.searchsorted(rank[codes][order], np.arange(len(uniq) + 1))
+        order = np.argsort(self.ids, kind='stable')
+        self._sorted_ids = self.ids[order]
+        self._sorted_pos = order
+
+    def label(self, order_id):
+        hit = np.flatnonzero(self.ids == str(order_id))
+        return self.labels[hit[0]] if len(hit) else None
+
+    def search(self, query, limit=20):
+        """(order_id, label) pairs: exact/prefix ID matches first, then text matches, newest first"""
+        q = str(query).strip()
+        if not q:
+            return []
+        lo = np.searchsorted(self._sorted_ids, q, side='left')
+        hi = np.searchsorted(self._sorted_ids, q + '\uffff', side='right')
+        pos = list(np.sort(self._sorted_pos[lo:min(hi, lo + limit)]))
+        if len(pos) < limit:
+            text = self._match(q.lower(), limit * 2)
+            seen = set(pos)
+            pos += [p for p in text if p not in seen][:limit - len(pos)]
+        return [(self.ids[p], self.labels[p]) for p in pos]
+
+    def _match(self, q, limit):
+        """Up to `limit` label rows (newest first) with a word starting with each query word;
+        several words (a name, a date) must also appear together as typed"""
+        rows, words = None, _WORD.findall(q)
+        for w in words:
+            if len(w) < MIN_QUERY:
+                continue
+            lo = np.searchsorted(self._vocab, w, side='left')
+            hi = np.searchsorted(self._vocab, w + '\uffff', side='right')
+            hit = np.unique(self._postings[self._starts[lo]:self._starts[hi]])
+            rows = hit if rows is None else np.intersect1d(rows, hit, assume_unique=True)
+            if not len(rows):
+                break
+        if rows is None:
+            return []
+        if len(words) == 1:
+            return list(rows[:limit])
+        out = []
+        for p in rows:  # candidates already hold every word, so this stops early
+            if q in self._lower[p]:
+                out.append(p)
+                if len(out) == limit:
+                    break
+        return out
+
+_LOCK = threading.Lock()
+_CACHE = {"version": None, "lookup": None}
+
+def get_lookup(df):
+    """OrderLookup for df's data version (built once per version)"""
+    version = df.attrs.get('data_version')
+    with _LOCK:
+        if version is not None and _CACHE["version"] == version:
+            return _CACHE["lookup"]
+    lookup = OrderLookup(df)
+    with _LOCK:
+        _CACHE.update(version=version, lookup=lookup)
+    return lookup
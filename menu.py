@@ -0,0 +1,157 @@
+"""
+Menu parsing and the dish-frequency index.
+
+Menu_Items cells come in a few shapes: proper stringified lists from the
+export (['Nasi putih', 'Ayam goreng berempah']), the single-string lists
+written by the New Order / Schedule forms (['Nasi putih, Dalca, Buah']) and
+free text with bullets, newlines and Malay quantity notes. Each distinct cell is
+tokenized once into a tuple of normalized dish names (the 'Dishes' column), and
+an inverted index dish -> orders with per-year counts is built per data version.
+"""
+import re
+import threading
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+# --- 1. TOKENIZER ---
+_LIST_ITEM = re.compile(r"'([^']*)'|\"([^\"]*)\"")
+_SPLIT = re.compile(r"[,;\n]+")
+_BULLET = re.compile(r"^(?:[\s\-\*•·>]+|\d+[\.\)]\s+)+")
+_PAREN = re.compile(r"\([^)]*\)?")
+_NOTE = re.compile(r"\s+[-–]\s+.*$")                                   # "dadih jagung - bekas dah beli"
+_LEAD_QTY = re.compile(r"^\d+\s*(?:x|jenis|pax|org|orang|bungkus|pek|set)?\s+", re.I)  # "2 jenis kuih"
+_TRAIL_QTY = re.compile(r"[\s\-–:]*\d+\s*(?:x|pax|org|orang|bungkus|pek|jenis)?\s*$", re.I)  # "kuih - 1"
+_PUNCT = re.compile(r"[^\w\s\+\-&]")
+
+# Spellings that mean the same dish / word
+ALIASES = {
+    "buah-buahan": "buah", "buah buahan": "buah", "buah potong": "buah",
+    "papadom": "papedom", "acar jelatah": "jelatah", "air kordial": "minuman kordial", "kordial": "minuman kordial",
+}
+WORD_ALIASES = {"msk": "masak", "grg": "goreng", "greng": "goreng", "ayaq": "air"}
+# Section headers and notes that aren't dishes
+STOP = {"menu", "makanan pagi", "makanan tengahari", "minum petang", "ready makanan", "ai", "nan", "none", "pax"}
+
+def split_menu(cell):
+    """Splits one Menu_Items cell into raw item strings"""
+    if cell is None or (isinstance(cell, float) and np.isnan(cell)):
+        return []
+    s = str(cell).strip()
+    if s.startswith('['):
+        quoted = [a or b for a, b in _LIST_ITEM.findall(s)]
+        items = quoted if quoted else [s.strip('[]')]
+    else:
+        items = [s]
+    # Brackets go first: "(teh tarik, kopi)" notes would otherwise split into fake dishes
+    return list(chain.from_iterable(_SPLIT.split(_PAREN.sub(" ", i)) for i in items))
+
+def normalize_dish(text):
+    """Lower-cased dish name with bullets, quantities, notes and brackets stripped ('' if not a dish)"""
+    s = text.strip().lower()
+    if s.startswith("ai:"): s = s[3:]
+    s = _PAREN.sub(" ", s)
+    s = _NOTE.sub("", s)
+    s = _BULLET.sub("", s)
+    s = _TRAIL_QTY.sub("", s)
+    s = _LEAD_QTY.sub("", s)
+    s = " ".join(WORD_ALIASES.get(w, w) for w in _PUNCT.sub(" ", s).split()).strip(" -+&")
+    s = ALIASES.get(s, s)
+    if len(s) <= 2 or s in STOP or not re.search(r"[a-z]", s):
+        return ""
+    return s
+
+def parse_menu(cell):
+    """Tuple of distinct normalized dishes in one order, in menu order"""
+    seen = {}
+    for item in split_menu(cell):
+        d = normalize_dish(item)
+        if d: seen.setdefault(d, None)
+    return tuple(seen)
+
+def dishes_column(menu_items):
+    """parse_menu() over a column, tokenizing each distinct cell only once"""
+    codes, uniques = pd.factorize(menu_items)
+    parsed = np.empty(len(uniques) + 1, dtype=object)
+    parsed[:-1] = [parse_menu(u) for u in uniques]
+    parsed[-1] = ()  # code -1 (missing) -> no dishes
+    return pd.Series(parsed[codes], index=menu_items.index)
+
+def display_name(dish):
+    return dish[:1].upper() + dish[1:]
+
+# --- 2. INVERTED INDEX ---
+class DishIndex:
+    """dish -> order positions, with per-year order counts, for one data version"""
+
+    def __init__(self, df):
+        df = df[df['Date_Valid']]
+        self.order_ids = df['Order_ID'].to_numpy()
+        self.row_years = df['Date'].dt.year.to_numpy()
+        dishes = df['Dishes'].to_numpy()
+        lens = np.fromiter((len(t) for t in dishes), dtype=np.int64, count=len(dishes))
+        codes, self.dishes = pd.factorize(pd.Series(list(chain.from_iterable(dishes)), dtype=object))
+        rows = np.repeat(np.arange(len(dishes)), lens)
+        years = np.repeat(self.row_years, lens)
+
+        # Postings: row positions grouped by dish code
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(self.dishes) + 1))
+        self._postings = (rows[order], bounds)
+        self._lookup = {d: i for i, d in enumerate(self.dishes)}
+
+        # Per-year order counts: dish x year
+        self.counts = pd.crosstab(pd.Categorical.from_codes(codes, self.dishes), years) if len(codes) else pd.DataFrame()
+
+        # Word -> dishes, so "rendang" finds "ayam rendang" and "rendang daging"
+        self._words = {}
+        for i, d in enumerate(self.dishes):
+            for w in d.split():
+                self._words.setdefault(w, []).append(i)
+
+    def top(self, n=5, year=None):
+        """Most-ordered dishes (number of orders containing them)"""
+        if self.counts.empty: return pd.Series(dtype=int)
+        if year is None:
+            s = self.counts.sum(axis=1)
+        elif int(year) in self.counts.columns:
+            s = self.counts[int(year)]
+        else:
+            return pd.Series(dtype=int)
+        s = s[s > 0].sort_values(ascending=False, kind='stable').head(n)
+        s.index = [display_name(d) for d in s.index]
+        return s
+
+    def _rows_for(self, code):
+        rows, bounds = self._postings
+        return rows[bounds[code]:bounds[code + 1]]
+
+    def orders_with(self, query, year=None):
+        """Order_IDs whose menu has a dish matching every word of the query"""
+        words = [w for w in normalize_dish(query).split() if w]
+        if not words: return np.array([], dtype=object)
+        codes = set(self._words.get(words[0], []))
+        for w in words[1:]:
+            codes &= set(self._words.get(w, []))
+        if query.strip().lower() in self._lookup:
+            codes.add(self._lookup[query.strip().lower()])
+        if not codes: return np.array([], dtype=object)
+        rows = np.unique(np.concatenate([self._rows_for(c) for c in codes]))
+        if year is not None:
+            rows = rows[self.row_years[rows] == int(year)]
+        return self.order_ids[rows]
+
+_LOCK = threading.Lock()
+_CACHE = {"version": None, "index": None}
+
+def get_dish_index(df):
+    """DishIndex for df's data version (built once per version)"""
+    version = df.attrs.get('data_version')
+    with _LOCK:
+        if version is not None and _CACHE["version"] == version:
+            return _CACHE["index"]
+    index = DishIndex(df)
+    with _LOCK:
+        _CACHE.update(version=version, index=index)
+    return index
@@ -0,0 +1,161 @@
+"""
+Hot-path timing.
+
+    with perf.span("clean"): ...        # time a block
+    @perf.timed()                       # time every call of a function
+
+Each span records wall time and the change in process memory (RSS) into a
+process-wide ring buffer (PERF_BUFFER entries, default 5000), tagged with the
+Streamlit rerun it ran in and its parent span. Per-span totals are kept
+separately so the OpenMetrics file (write_openmetrics) has monotonic counters.
+The cost is a perf_counter call and one small /proc read per span.
+"""
+import os
+import io
+import csv
+import json
+import time
+import threading
+import functools
+from collections import deque
+
+try:
+    import resource  # POSIX only: peak-RSS fallback when /proc is missing
+except ImportError:
+    resource = None
+
+BUFFER_SIZE = int(os.getenv("PERF_BUFFER", 5000))
+FIELDS = ['run', 'ts', 'span', 'parent', 'depth', 'ms', 'mem_kb', 'error']
+
+_LOCK = threading.Lock()
+_SPANS = deque(maxlen=BUFFER_SIZE)
+_TOTALS = {}  # span -> [count, seconds, errors]
+_RUNS = {"next": 1}
+_local = threading.local()
+_PAGE_KB = os.sysconf("SC_PAGE_SIZE") // 1024 if hasattr(os, "sysconf") else 4
+
+def _rss_kb():
+    """Current resident memory in KB (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_KB
+    except Exception:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+
+# --- 1. RUNS & SPANS ---
+def start_run():
+    """Starts a new rerun in this thread (one Streamlit session = one thread); returns its id"""
+    with _LOCK:
+        run = _RUNS["next"]
+        _RUNS["next"] += 1
+    _local.run = run
+    _local.stack = []
+    return run
+
+def current_run():
+    return getattr(_local, "run", 0)
+
+class span:
+    """Context manager timing one block; nests, and records even when the block raises"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else ""
+        self.depth = len(stack)
+        stack.append(self.name)
+        self.mem0 = _rss_kb()
+        self.ts = time.time()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.t0
+        _local.stack.pop()
+        rec = {'run': current_run(), 'ts': self.ts, 'span': self.name, 'parent': self.parent,
+               'depth': self.depth, 'ms': round(1000 * seconds, 3), 'mem_kb': _rss_kb() - self.mem0,
+               'error': exc_type.__name__ if exc_type else ""}
+        with _LOCK:
+            _SPANS.append(rec)
+            tot = _TOTALS.setdefault(self.name, [0, 0.0, 0])
+            tot[0] += 1
+            tot[1] += seconds
+            tot[2] += exc_type is not None
+        return False
+
+def timed(name=None):
+    """Decorator form of span(); the span is named after the function by default"""
+    def wrap(fn):
+        label = name or fn.__name__
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(label):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+# --- 2. READING & EXPORT ---
+def records(run=None):
+    """Buffered span records in start order (only one rerun's if run is given)"""
+    with _LOCK:
+        recs = list(_SPANS)
+    if run is not None:
+        recs = [r for r in recs if r['run'] == run]
+    return sorted(recs, key=lambda r: (r['ts'], r['depth']))
+
+def summary():
+    """Per span over the buffer: calls, mean/p95/max ms and mean memory delta"""
+    by_name = {}
+    for r in records():
+        by_name.setdefault(r['span'], []).append(r)
+    rows = []
+    for name, recs in by_name.items():
+        ms = sorted(r['ms'] for r in recs)
+        rows.append({'span': name, 'calls': len(ms), 'mean_ms': round(sum(ms) / len(ms), 2),
+                     'p95_ms': ms[min(len(ms) - 1, int(0.95 * len(ms)))], 'max_ms': ms[-1],
+                     'mean_mem_kb': round(sum(r['mem_kb'] for r in recs) / len(recs))})
+    return sorted(rows, key=lambda r: -r['mean_ms'] * r['calls'])
+
+def export_json(run=None):
+    return json.dumps(records(run), indent=1)
+
+def export_csv(run=None):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(records(run))
+    return buf.getvalue()
+
+def openmetrics():
+    """Cumulative per-span counters in OpenMetrics text format"""
+    with _LOCK:
+        totals = {k: list(v) for k, v in _TOTALS.items()}
+    lines = ["# TYPE zulja_span_seconds summary", "# UNIT zulja_span_seconds seconds",
+             "# HELP zulja_span_seconds Wall time spent in instrumented spans."]
+    for name, (count, seconds, _) in sorted(totals.items()):
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        lines.append(f'zulja_span_seconds_count{{span="{label}"}} {count}')
+        lines.append(f'zulja_span_seconds_sum{{span="{label}"}} {seconds:.6f}')
+    lines.append("# TYPE zulja_span_errors counter")
+    for name, (_, _, errors) in sorted(totals.items()):
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        lines.append(f'zulja_span_errors_total{{span="{label}"}} {errors}')
+    lines.append("# TYPE zulja_process_resident_memory_bytes gauge")
+    lines.append(f"zulja_process_resident_memory_bytes {_rss_kb() * 1024}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+def write_openmetrics(path):
+    """Atomically writes openmetrics() to path (for a textfile scraper)"""
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(openmetrics())
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"❌ Could not write metrics file: {e}")
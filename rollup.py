@@ -0,0 +1,126 @@
+"""
+Pre-aggregated analytics cube.
+
+Orders are collapsed once per data version into cells keyed by
+(Year, Month, Event_Type, Customer_Name) holding revenue/pax/staff sums and
+order counts. Every Analytics KPI and chart is derived from those cells, and
+per-year summaries are precomputed so switching years is a dict lookup.
+Saves, edits and deletes patch the cube in place; the patched cube is only
+adopted for the next data version if every cell matches a fresh aggregation,
+which skips re-summarizing the years the writes didn't touch.
+"""
+import calendar
+import threading
+
+import numpy as np
+import pandas as pd
+
+import storage
+
+MONTHS = list(calendar.month_name)[1:]
+KEYS = ['Year', 'Month', 'Event_Type', 'Customer_Name']
+MEASURES = ['Revenue', 'Pax', 'Staff', 'Orders']
+
+_LOCK = threading.Lock()
+_CACHE = {"cube": None}
+CUBE_STATS = {"builds": 0, "hits": 0, "incremental": 0}
+
+# --- 1. AGGREGATION ---
+def _aggregate(df):
+    """Collapses cleaned order rows into cube cells (rows without a valid date are skipped)"""
+    df = df[df['Date_Valid']]
+    cells = pd.DataFrame({
+        'Year': df['Date'].dt.year, 'Month': df['Date'].dt.month,
+        'Event_Type': df['Event_Type'], 'Customer_Name': df['Customer_Name'],
+        'Revenue': df['Revenue'], 'Pax': df['Pax'], 'Staff': df['Pramusaji'], 'Orders': 1,
+    })
+    cells = cells.groupby(KEYS, observed=True, dropna=False, sort=False)[MEASURES].sum().reset_index()
+    # Plain object keys so cubes from different frames (different categories) line up
+    for c in ['Event_Type', 'Customer_Name']:
+        cells[c] = cells[c].astype(object).where(cells[c].notna(), None)
+    return cells
+
+def _summarize(cells):
+    """Everything the Analytics tab shows for one year, from that year's cells"""
+    monthly = cells.groupby('Month')['Revenue'].sum().reindex(range(1, 13))
+    events = cells.groupby('Event_Type')[['Orders', 'Staff']].sum()
+    return {
+        'revenue': cells['Revenue'].sum(),
+        'pax': cells['Pax'].sum(),
+        'staff': cells['Staff'].sum(),
+        'orders': int(cells['Orders'].sum()),
+        'monthly': pd.Series(monthly.to_numpy(), index=MONTHS, name='Revenue'),
+        'busiest_month': MONTHS[int(monthly.fillna(0).to_numpy().argmax())],
+        'event_counts': events['Orders'].sort_values(ascending=False),
+        'staff_intensity': events['Staff'] / events['Orders'],
+        'event_staff': events,
+        'top_event': events['Orders'].idxmax() if len(events) else "-",
+    }
+
+class Cube:
+    def __init__(self, cells, version):
+        self.cells = cells
+        self.version = version
+        self.pending = False  # patched by writes, waiting to be matched to a new data version
+        self.years = {int(y): _summarize(g) for y, g in cells.groupby('Year')}
+
+    def year_list(self):
+        return sorted(self.years, reverse=True)
+
+    def year(self, year):
+        return self.years.get(int(year)) if year is not None else None
+
+    def apply(self, rows, sign):
+        """Adds (sign=1) or removes (sign=-1) the contribution of some cleaned order rows"""
+        delta = _aggregate(rows)
+        if delta.empty:
+            return
+        delta[MEASURES] = delta[MEASURES] * sign
+        cells = pd.concat([self.cells, delta], ignore_index=True)
+        cells = cells.groupby(KEYS, dropna=False, sort=False)[MEASURES].sum().reset_index()
+        self.cells = cells[cells['Orders'] != 0]
+        for y in delta['Year'].unique():
+            year_cells = self.cells[self.cells['Year'] == y]
+            if year_cells.empty:
+                self.years.pop(int(y), None)
+            else:
+                self.years[int(y)] = _summarize(year_cells)
+
+# --- 2. CACHE ---
+def _matches(cube, cells):
+    """True if a patched cube holds exactly these cells (same keys, same sums): grand totals
+    alone would miss revenue moved between months or event types"""
+    if len(cube.cells) != len(cells):
+        return False
+    have = cube.cells.set_index(KEYS)[MEASURES]
+    want = cells.set_index(KEYS)[MEASURES].reindex(have.index)  # a key the patch got wrong comes back NaN
+    return bool(np.allclose(have.to_numpy(dtype=float), want.to_numpy(dtype=float), rtol=0, atol=0.01, equal_nan=True))
+
+def get_cube(df):
+    """The cube for df's data version: cached, patched, or built from scratch"""
+    version = df.attrs.get('data_version')
+    with _LOCK:
+        cube = _CACHE["cube"]
+        if cube is not None and version is not None and cube.version == version:
+            CUBE_STATS["hits"] += 1
+            return cube
+        cells = _aggregate(df)
+        if cube is not None and cube.pending and _matches(cube, cells):
+            cube.version, cube.pending = version, False
+            CUBE_STATS["incremental"] += 1
+            return cube
+        cube = Cube(cells, version)
+        _CACHE["cube"] = cube
+        CUBE_STATS["builds"] += 1
+        return cube
+
+def _on_change(old, new):
+    with _LOCK:
+        cube = _CACHE["cube"]
+        if cube is None:
+            return
+        if old is not None: cube.apply(old, -1)
+        if new is not None: cube.apply(new, 1)
+        cube.version, cube.pending = None, True
+
+storage.subscribe(_on_change)
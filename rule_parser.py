@@ -0,0 +1,375 @@
+"""
+Deterministic order extraction: precompiled rules + a small Malay lexicon.
+
+    data, conf = rule_parser.extract("Nak order nasi minyak 50 pax, 3/1/2023 di Selayang. 012-345 6789")
+    rule_parser.low_fields(conf)          # fields worth asking the LLM about
+    python rule_parser.py eval            # accuracy + latency over the order book's Details
+
+extract() returns the same fields as the LLM prompt (whatsapp.build_prompt) and
+a 0-1 confidence per field: ~0.9+ for an explicit match ("50 pax", "Tarikh:
+4/5/2024", "Rate RM15"), lower for a lexicon guess, 0 when a required field
+(Date, Pax, Menu_Items) wasn't found. Fallback defaults (a "Buffet" event, a
+title made up from other fields) score 0.4, below THRESHOLD, so the LLM is
+asked. An optional field that isn't there gets a neutral 0.6 only in a labelled
+booking block ("Nama:", "Tarikh:", ...), where it would have had its own line;
+in free text a missing name, place or price may just be written in words the
+rules don't know, so it scores 0.4 too. Phone numbers and staff counts are
+digit patterns the rules find anywhere, so a missing one is always 0.6.
+
+The field rules are shared with the raw-export ETL (ingest.py).
+"""
+import re
+import sys
+import time
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import capacity
+
+FIELDS = ['Date', 'Customer_Name', 'Phone_Number', 'Order_Title', 'Pax', 'Staff_Count',
+          'Event_Type', 'Location', 'Menu_Items', 'Total_Price']
+REQUIRED = ('Date', 'Pax', 'Menu_Items')
+THRESHOLD = 0.5     # fields below this go to the LLM
+ABSENT = 0.6        # optional field not mentioned: fine as empty
+GUESS = 0.4         # fallback default, or a field free text may hold in words: ask the LLM
+AI_CONFIDENCE = 0.8
+
+# --- 1. FIELD RULES (compiled once per process) ---
+_DMY = r"(\d{1,2})[/.](\d{1,2})[/.](20\d{2}|\d{2})\b"
+_TARIKH = re.compile(r"tarikh\s*:?\s*\*?\s*" + _DMY, re.I)
+_ANY_DATE = re.compile(r"(?<![\d/.])" + _DMY)
+_JAM = re.compile(r"\bjam\b[^\n]*", re.I)
+_UNIT = r"(?:pax|org|orang|pek|pack|packs|bungkus|kotak|box|buffet|hidang)"
+_PAX = re.compile(r"(?<![\d.])(\d{1,5})\s*" + _UNIT + r"\b", re.I)
+_TOTAL_PAX = re.compile(r"(?:total|jumlah)\s*:?\s*(\d{1,5})\s*" + _UNIT, re.I)
+_RATE = re.compile(r"rate\b[^\n]{0,20}?rm\s*(\d+(?:\.\d+)?)|rm\s*(\d+(?:\.\d+)?)\s*(?:/|per\s*|x\s*)(?:pax|org|orang|kepala|head|\d)", re.I)
+_TOTAL_RM = re.compile(r"^\W*(?:total|jumlah)(?:\s+(?:harga|keseluruhan|bayaran))?\s*:?\s*rm\s*([\d,]+(?:\.\d+)?)", re.I | re.M)
+_STAFF = re.compile(r"(\d{1,2})\s*(?:pramusaji|pelayan|waiter|staff)", re.I)
+_PHONE = re.compile(r"(?<![\d+])(?:\+?6)?0[\s-]?\d{1,2}[\s-]?\d{3,4}[\s-]?\d{3,4}(?!\d)")
+_NAMA = re.compile(r"^\W*nama\s*:\s*(.+)$", re.I | re.M)
+_LABEL = re.compile(r"^\W*(?:nama|tarikh|hari|jam|masa|alamat|lokasi|tempat|venue|tel|no\.?\s*tel|phone|pax|jumlah|total|menu|majlis|acara)\b[^:\n]{0,15}:", re.I | re.M)
+_ALAMAT = re.compile(r"^\W*(?:alamat|lokasi|tempat|venue)\s*:\s*(.+)$", re.I | re.M)
+_LETTER = re.compile(r"[A-Za-z]")
+_SPACES = re.compile(r"\s+")
+_NON_DIGIT = re.compile(r"\D")
+
+# Menu: one dish per line, after bullets and emphasis are stripped
+_BULLET = re.compile(r"^[\s*\-–•·>.⁠]*(?:(?:\d{1,2}|[ivx]{1,4})[.)]\s*)?", re.I)
+_HEADER = re.compile(r"^(?:menu\b.*|(?:makan|makanan|minum|minuman|mkn|sarapan|breakfast|lunch|dinner|hi[- ]?tea|berbuka|moreh|sahur)\b.{0,25})$", re.I)
+_NOT_DISH = re.compile(
+    r"\d\s*" + _UNIT + r"|\brm\s*\d|\brate\b|\bjam\b|\bready\b|tarikh|\bbil\b|bilik|tingkat|mesyuarat|tempahan|"
+    r"pengerusi|chair|nama\s*:|alamat|lokasi|\btel\b|hidang|sediakan|letak|bawa|jangan|total|jumlah|deliver|bayaran|deposit|\bbank\b|akaun|waiter|zulja|\d\.\d\d\b|"
+    r"\bnote\b|meja|kerusi|khemah|alas|sarung|reben|tema\b|stage|rostrum|aircooler|pa system|" + _DMY, re.I)
+MAX_DISH_CHARS = 60
+
+# Client names: bookings from the same institution are written many ways
+CLIENTS = [
+    (re.compile(r"\bdbkl\b|dato\W*b(?:a)?nda?r|datuk\W*bandar", re.I), "DBKL"),
+    (re.compile(r"istana\s+negara", re.I), "Istana Negara"),
+]
+# Event type: first matching rule wins, anything else is a buffet
+EVENT_RULES = [
+    ("Wedding", re.compile(r"kahwin|wedding|nikah|walimah|resepsi|sanding|pe(?:n)?gantin|pelamin", re.I)),
+    ("Engagement", re.compile(r"tunang|engagement", re.I)),
+    ("Food Testing", re.compile(r"food\s*test|rasa\s*makanan", re.I)),
+    ("Corporate", re.compile(r"\bdbkl\b|dato\W*b(?:a)?nda?r|mesyuarat|meeting|jabatan|kementerian|syarikat|sdn\.?\s*bhd|seminar|kursus|bengkel|"
+                             r"hospital|\bhosp\b|klinik|universiti|uitm|kolej|sekolah|\bsmk\b|istana|pejabat|\bipd\b|polis|institut|agensi", re.I)),
+    ("Packet", re.compile(r"bungkus|pack\s*food|packet|nasi\s*kotak", re.I)),
+]
+
+def _date(m):
+    d, mth, y = (int(g) for g in m.groups())
+    try:
+        return datetime(y + 2000 if y < 100 else y, mth, d)
+    except ValueError:
+        return None
+
+def find_day(text):
+    """First valid d/m/Y date, preferring one labelled 'Tarikh'; None if there isn't one"""
+    for rx in (_TARIKH, _ANY_DATE):
+        for m in rx.finditer(text):
+            day = _date(m)
+            if day:
+                return day
+    return None
+
+def parse_date(text, default=None):
+    """Booking day from the text (with the hour from 'Jam ...' when stated), else default"""
+    day = find_day(text)
+    if day is None:
+        return default
+    jam = _JAM.search(text)
+    hour = capacity.parse_window(jam.group(0) if jam else text)[0]
+    if np.isnan(hour):
+        return day
+    return day.replace(hour=int(hour), minute=int(round(hour % 1 * 60)))
+
+def parse_pax(text):
+    m = _TOTAL_PAX.search(text)
+    if m:
+        return int(m.group(1))
+    counts = [int(n) for n in _PAX.findall(text)]
+    return max(counts) if counts else 0
+
+def parse_revenue(text, pax):
+    """Stated total, else pax x the per-head rates (one per line, summed across meals); NaN if neither"""
+    totals = _TOTAL_RM.findall(text)
+    if totals:
+        return float(totals[-1].replace(',', ''))  # the grand total comes last
+    rates = []
+    for line in text.splitlines():
+        m = None if line.strip(" *-").startswith("(") else _RATE.search(line)  # bracketed notes price a subset
+        if m:
+            rates.append(float(m.group(1) or m.group(2)))
+    return pax * sum(rates) if rates and pax else np.nan
+
+def parse_menu(details):
+    dishes, seen = [], set()
+    for line in details.splitlines():
+        item = _BULLET.sub("", line).strip(" *_~⁠\t").strip()
+        if (len(item) < 3 or len(item) > MAX_DISH_CHARS or item.startswith("(") or not _LETTER.search(item)
+                or _HEADER.match(item) or _NOT_DISH.search(item) or capacity._WINDOW.search(item)):
+            continue
+        item = _SPACES.sub(" ", item).rstrip(" .,;-")
+        if item.lower() not in seen:
+            seen.add(item.lower())
+            dishes.append(item)
+    return dishes
+
+def parse_customer(title, details):
+    m = _NAMA.search(details)
+    if m:
+        return m.group(1).strip(" *")
+    for rx, name in CLIENTS:
+        if rx.search(title):
+            return name
+    name = _SPACES.sub(" ", _PHONE.sub("", title)).strip(" -()+.,")
+    return name.title() if name else "Unknown"
+
+def parse_event(title, details):
+    text = f"{title}\n{details}"
+    for event, rx in EVENT_RULES:
+        if rx.search(text):
+            return event
+    return "Buffet"
+
+def parse_phone(text):
+    m = _PHONE.search(text)
+    return _NON_DIGIT.sub("", m.group(0)) if m else ""
+
+# --- 2. MESSAGE LEXICON ---
+# Words a dish name starts with; a message mentioning one inline ("nak order nasi minyak 50 pax") has a menu
+DISH_HEADS = ["nasi", "mee", "mi", "bihun", "mihun", "kuey teow", "kuetiau", "laksa", "roti", "ayam", "daging", "kambing",
+              "ikan", "udang", "sotong", "kari", "gulai", "rendang", "dalca", "sambal", "sayur", "sup", "soto", "bubur",
+              "kuih", "karipap", "pulut", "lemang", "ketupat", "satay", "sate", "air", "teh", "kopi", "buah", "acar",
+              "jelatah", "ulam", "papadom", "popia", "agar", "puding", "kek", "sandwich", "telur", "lontong", "murtabak"]
+_HEADS = r"(?:" + "|".join(sorted(map(re.escape, DISH_HEADS), key=len, reverse=True)) + r")"
+_DISH_WORD = re.compile(r"\b" + _HEADS + r"\b", re.I)
+_STOP = r"(?:untuk|utk|pada|nak|order|tempah|dan|and|with|dengan|for|on|di|kat|hari|esok|besok|lusa|jam|tarikh|sebanyak|sahaja|je|ya|boleh|tak|pax|org|orang|rm|x)"
+# A dish runs on word by word until a stop word or a list delimiter (comma, full stop, new line)
+_INLINE_DISH = re.compile(r"\b" + _HEADS + r"(?:[ \t]+(?!" + _STOP + r"\b)[a-z][a-z-]*)*", re.I)
+_MONTHS = {"jan": 1, "feb": 2, "mac": 3, "mar": 3, "apr": 4, "mei": 5, "may": 5, "jun": 6, "jul": 7, "ogo": 8, "ogs": 8,
+           "aug": 8, "sep": 9, "okt": 10, "oct": 10, "nov": 11, "dis": 12, "dec": 12}
+_NAMED_DATE = re.compile(r"\b(\d{1,2})\s*(" + "|".join(_MONTHS) + r")[a-z]*\.?(?:\s*(20\d{2}))?\b", re.I)
+_RELATIVE = {"hari ini": 0, "hari ni": 0, "harini": 0, "esok": 1, "besok": 1, "lusa": 2}
+_RELATIVE_DATE = re.compile(r"\b(" + "|".join(_RELATIVE) + r")\b", re.I)
+_AT_PLACE = re.compile(r"\b(?:di|kat|at|venue|lokasi|tempat)\s*:?\s+([^\n,.;]{3,60})", re.I)
+_GREETING = re.compile(r"^(?:salam|assalamualaikum|hi|hello|helo|hai|selamat|kak|bang|boss|bos)\b", re.I)
+# The LLM prompt's categories (whatsapp.EVENT_TYPES); finer rule labels map onto them
+EVENT_LABELS = {"Wedding": "Wedding", "Corporate": "Corporate", "Packet": "Packet", "Buffet": "Buffet"}
+
+def _find_date(text, today):
+    """(date string, confidence) from d/m/Y, '3 Jan 2023', or esok/lusa"""
+    day = parse_date(text)
+    if day is not None:
+        return day.strftime('%Y-%m-%d'), 0.95
+    m = _NAMED_DATE.search(text)
+    if m:
+        d, month, year = int(m.group(1)), _MONTHS[m.group(2).lower()[:3]], m.group(3)
+        try:
+            day = datetime(int(year) if year else today.year, month, d)
+        except ValueError:
+            day = None
+        if day is not None:
+            if not year and day.date() < today.date():
+                day = day.replace(year=day.year + 1)  # "3 Jan" in December is next year's
+            return day.strftime('%Y-%m-%d'), 0.9 if year else 0.75
+    m = _RELATIVE_DATE.search(text)
+    if m:
+        return (today + timedelta(days=_RELATIVE[m.group(1).lower()])).strftime('%Y-%m-%d'), 0.7
+    return None, 0.0
+
+def _find_pax(text):
+    m = _TOTAL_PAX.search(text)
+    if m:
+        return int(m.group(1)), 1.0
+    counts = {int(n) for n in _PAX.findall(text)}
+    if not counts:
+        return 0, 0.0
+    return max(counts), 0.95 if len(counts) == 1 else 0.75
+
+def _find_menu(text):
+    lines = [d for d in parse_menu(text) if _DISH_WORD.search(d)]
+    if lines:
+        return lines, 0.9 if len(lines) > 1 else 0.8
+    inline, seen = [], set()
+    for m in _INLINE_DISH.finditer(text):
+        dish = m.group(0).strip()
+        if dish.lower() not in seen:
+            seen.add(dish.lower())
+            inline.append(dish)
+    return inline, 0.75 if inline else 0.0
+
+def is_booking_block(text):
+    """True for a labelled booking ("Nama: ...", "Tarikh: ..."): a field without its line isn't there"""
+    return len(_LABEL.findall(text)) >= 2
+
+def _find_location(text, absent):
+    import geocode  # gazetteer is loaded on first use
+    m = _ALAMAT.search(text)
+    if m:
+        return m.group(1).strip(" *"), 0.9
+    m = _AT_PLACE.search(text)
+    if m and geocode.place_name(m.group(1)):
+        return m.group(1).strip(" *"), 0.85
+    place = geocode.place_name(text)
+    if place:
+        return place.title(), 0.7
+    return "", absent
+
+def _find_title(text, event, customer):
+    for line in text.splitlines():
+        line = line.strip(" *-_")
+        if 3 <= len(line) <= MAX_DISH_CHARS and not _GREETING.match(line) and not _PAX.search(line) and not find_day(line):
+            return line, ABSENT
+    return " ".join(p for p in (event, customer) if p) or "Order", GUESS
+
+def extract(text, today=None):
+    """Message -> (fields dict shaped like the LLM reply, {field: confidence})"""
+    text = str(text or "")
+    today = today or datetime.now()
+    absent = ABSENT if is_booking_block(text) else GUESS
+    date, c_date = _find_date(text, today)
+    pax, c_pax = _find_pax(text)
+    menu, c_menu = _find_menu(text)
+    location, c_loc = _find_location(text, absent)
+    phone = parse_phone(text)
+
+    name, c_name = "", absent
+    m = _NAMA.search(text)
+    if m:
+        name, c_name = m.group(1).strip(" *"), 0.95
+    else:
+        for rx, client in CLIENTS:
+            if rx.search(text):
+                name, c_name = client, 0.9
+                break
+
+    event, c_event = "Buffet", GUESS
+    for label, rx in EVENT_RULES:
+        if rx.search(text):
+            event, c_event = EVENT_LABELS.get(label, "Other"), 0.9
+            break
+
+    totals = _TOTAL_RM.findall(text)
+    price = parse_revenue(text, pax)
+    c_price = 0.95 if totals else 0.85 if np.isfinite(price) else absent
+    staff = _STAFF.search(text)
+    title, c_title = _find_title(text, event, name)
+
+    data = {
+        'Date': date, 'Customer_Name': name, 'Phone_Number': phone, 'Order_Title': title, 'Pax': pax,
+        'Staff_Count': int(staff.group(1)) if staff else 0, 'Event_Type': event, 'Location': location,
+        'Menu_Items': menu, 'Total_Price': float(price) if np.isfinite(price) else 0.0,
+    }
+    conf = {
+        'Date': c_date, 'Customer_Name': c_name, 'Phone_Number': 0.95 if phone else ABSENT, 'Order_Title': c_title,
+        'Pax': c_pax, 'Staff_Count': 0.9 if staff else ABSENT, 'Event_Type': c_event, 'Location': c_loc,
+        'Menu_Items': c_menu, 'Total_Price': c_price,
+    }
+    return data, conf
+
+def low_fields(conf, threshold=THRESHOLD):
+    return [f for f in FIELDS if conf.get(f, 0.0) < threshold]
+
+def overall(conf):
+    """The extraction is only as trustworthy as its weakest required field"""
+    return min(conf[f] for f in REQUIRED)
+
+def merge(data, conf, ai, fields):
+    """Takes only `fields` from an LLM reply (where it has a value); returns new (data, conf)"""
+    data, conf = dict(data), dict(conf)
+    for f in fields:
+        value = ai.get(f)
+        if value not in (None, "", [], 0, "Unknown"):
+            data[f] = value
+            conf[f] = AI_CONFIDENCE
+    return data, conf
+
+# --- 3. EVALUATION ---
+def evaluate(df, threshold=THRESHOLD):
+    """
+    Runs extract() over every order's Details and scores it against the stored
+    fields. Returns (per-field accuracy frame, latency/LLM-share summary dict).
+    """
+    import pandas as pd
+    import menu
+
+    rows = df[df['Details'].astype(str).str.strip().ne("") & ~df['Details'].astype(str).str.startswith("AI:")]
+    hits = {f: [] for f in ('Date', 'Pax', 'Event_Type', 'Total_Price', 'Menu_Items', 'Phone_Number')}
+    latencies, needs_ai, swapped = [], 0, 0
+    for r in rows.itertuples(index=False):
+        text = str(r.Details)
+        t = time.perf_counter()
+        data, conf = extract(text)
+        latencies.append(time.perf_counter() - t)
+        needs_ai += bool(low_fields(conf, threshold))
+
+        if data['Date'] and pd.notna(r.Date):
+            ok = data['Date'] == r.Date.strftime('%Y-%m-%d')
+            if not ok and r.Date.day <= 12 and data['Date'] == r.Date.strftime('%Y-%d-%m'):
+                ok, swapped = True, swapped + 1  # stored with day and month swapped (legacy import)
+            hits['Date'].append(ok)
+        if r.Pax > 0 and data['Pax']:
+            hits['Pax'].append(data['Pax'] == int(r.Pax))
+        hits['Event_Type'].append(data['Event_Type'] == str(r.Event_Type))
+        if data['Total_Price'] > 0:
+            hits['Total_Price'].append(abs(data['Total_Price'] - r.Revenue) <= 0.05 * max(r.Revenue, 1))
+        truth = set(r.Dishes)
+        if truth:
+            found = set(menu.parse_menu(str(data['Menu_Items'])))
+            hits['Menu_Items'].append(len(found & truth) / len(found | truth) >= 0.5)
+        if r.Phone_Clean:
+            hits['Phone_Number'].append(data['Phone_Number'][-9:] == str(r.Phone_Clean)[-9:])
+
+    report = pd.DataFrame([{'Field': f, 'Scored': len(h), 'Accuracy': float(np.mean(h)) if h else np.nan,
+                            'Coverage': len(h) / len(rows) if len(rows) else 0.0} for f, h in hits.items()])
+    ms = np.array(latencies) * 1000
+    summary = {'messages': len(rows), 'llm_share': needs_ai / len(rows) if len(rows) else 0.0, 'date_swapped': swapped,
+               'p50_ms': float(np.percentile(ms, 50)) if len(ms) else 0.0,
+               'p95_ms': float(np.percentile(ms, 95)) if len(ms) else 0.0,
+               'max_ms': float(ms.max()) if len(ms) else 0.0}
+    return report, summary
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Rule-based order extraction")
+    ap.add_argument("command", choices=["eval", "parse"])
+    ap.add_argument("text", nargs="?", help="message to parse (parse); default: stdin")
+    ap.add_argument("--threshold", type=float, default=THRESHOLD)
+    ap.add_argument("--file", default="cleaned_revenue_data.csv", help="order CSV to evaluate against (eval)")
+    args = ap.parse_args()
+    if args.command == "parse":
+        data, conf = extract(args.text if args.text is not None else sys.stdin.read())
+        for f in FIELDS:
+            print(f"{'⚠️' if conf[f] < args.threshold else '  '} {f:>14}: {data[f]!r}  ({conf[f]:.2f})")
+        sys.exit(0)
+
+    import storage
+    report, s = evaluate(storage._parse_orders(args.file), args.threshold)  # read-only: no migration or journal
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.1%}"))
+    print(f"{s['messages']} messages · {s['llm_share']:.0%} would call the LLM · "
+          f"latency p50 {s['p50_ms']:.2f} ms, p95 {s['p95_ms']:.2f} ms, max {s['max_ms']:.2f} ms")
+    if s['date_swapped']:
+        print(f"({s['date_swapped']} stored dates have day and month swapped; counted as matches)")
@@ -0,0 +1,477 @@
+"""
+Order storage backends.
+
+    CsvStore     cleaned_revenue_data.csv + append-only journal (default)
+    SqliteStore  orders.db with a real primary key and indexes
+
+Both return the same cleaned frame as clean_orders(). Pick one with the
+ORDER_BACKEND setting ("csv" or "sqlite").
+
+    python storage.py import [csv] [db]   # copy the CSV order book into SQLite
+"""
+import os
+import sys
+import pickle
+import sqlite3
+import hashlib
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+import journal
+import geocode
+import perf
+from cleaning import clean_orders, parse_dates, CATEGORY_COLS
+
+DATA_FILE = 'cleaned_revenue_data.csv'
+DB_FILE = 'orders.db'
+SNAPSHOT_SUFFIX = '.snapshot.pkl'
+SNAPSHOT_FORMAT = 5  # bump whenever clean_orders() output changes, so old snapshots are ignored
+
+ORDER_COLS = ['Date', 'Customer_Name', 'Phone_Number', 'Order_Title', 'Details', 'Pax', 'Pramusaji', 'Event_Type', 'Location', 'Menu_Items', 'Revenue']
+# Columns clean_orders() derives; dropped before journal rows are re-cleaned
+DERIVED_COLS = ['Date_Valid', 'Month_Year', 'Phone_Clean', 'Dishes', 'Lat', 'Lon', 'Revenue_Estimated']
+
+# Process-wide counters, shared by every Streamlit session in this server process
+_STATS_LOCK = threading.Lock()
+LOAD_STATS = {"hits": 0, "misses": 0, "snapshot_hits": 0}
+
+def _count(name):
+    with _STATS_LOCK:
+        LOAD_STATS[name] += 1
+
+def get_load_stats():
+    """Hit/miss counters for the data cache"""
+    with _STATS_LOCK:
+        return dict(LOAD_STATS)
+
+# --- CHANGE LISTENERS ---
+# Called as fn(old_rows, new_rows) with cleaned frames (None for insert/delete) after each write
+_LISTENERS = []
+
+def subscribe(fn):
+    if fn not in _LISTENERS:
+        _LISTENERS.append(fn)
+
+def _notify(old, new):
+    for fn in list(_LISTENERS):
+        try:
+            fn(old, new)
+        except Exception as e:
+            print(f"⚠️ Change listener failed: {e}")
+
+def _stored_values(df):
+    """Cleaned rows -> the values stored for them: derived columns dropped, estimated revenue blank again"""
+    raw = df.drop(columns=DERIVED_COLS, errors='ignore')
+    if 'Revenue_Estimated' in df.columns:
+        raw = raw.assign(Revenue=raw['Revenue'].mask(df['Revenue_Estimated'].to_numpy()))
+    return raw
+
+def _merged_row(old, fields, order_id):
+    """The cleaned row a reload will show once `fields` are applied to `old`"""
+    row = _stored_values(old).iloc[0].to_dict() if old is not None else {}
+    row.update(fields)
+    row['Order_ID'] = order_id
+    return clean_orders(pd.DataFrame([row]))
+
+SEARCH_COLS = ['Order_ID', 'Customer_Name', 'Order_Title', 'Location', 'Phone_Number']
+
+def _text_mask(df, text):
+    """Rows where any SEARCH_COLS value contains `text` (case-insensitive)"""
+    mask = pd.Series(False, index=df.index)
+    for c in SEARCH_COLS:
+        col = df[c]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            # Match the few distinct values once, then look rows up by code
+            hit = col.cat.categories.astype(str).str.contains(text, case=False, regex=False)
+            mask |= np.append(hit, False)[col.cat.codes.to_numpy()]  # code -1 (missing) -> False
+        else:
+            mask |= col.fillna('').astype(str).str.contains(text, case=False, regex=False)
+    return mask
+
+# data_version -> the SqliteStore whose full-table read carries it (see filter_orders)
+_SQL_TABLES = weakref.WeakValueDictionary()
+
+def filter_orders(df, start=None, end=None, year=None, text=None):
+    """
+    Date-range / year / text filter on a cleaned frame (end is exclusive).
+    On a SQLite store's table the date/year part runs as indexed SQL and only
+    the matching rows are read and cleaned; text is matched on the cleaned rows.
+    """
+    store = _SQL_TABLES.get(df.attrs.get('data_version'))
+    if store is not None and (start is not None or end is not None or year is not None):
+        rows = store.query(start, end, year)
+        return rows[_text_mask(rows, text)] if text else rows
+    mask = df['Date_Valid'].copy()
+    if start is not None: mask &= df['Date'] >= pd.Timestamp(start)
+    if end is not None: mask &= df['Date'] < pd.Timestamp(end)
+    if year is not None: mask &= df['Date'].dt.year == int(year)
+    if text: mask &= _text_mask(df[mask], text).reindex(df.index, fill_value=False)
+    return df[mask]
+
+# --- 1. CSV + JOURNAL ---
+def _file_stat(path):
+    st_ = os.stat(path)
+    return (st_.st_mtime_ns, st_.st_size)
+
+def _file_hash(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def _read_snapshot(path, content_hash):
+    """Returns the cleaned frame from the binary snapshot if it matches the CSV (and the gazetteer its Lat/Lon came from)"""
+    try:
+        with open(path + SNAPSHOT_SUFFIX, 'rb') as f:
+            snap = pickle.load(f)
+        if (snap.get("hash") == content_hash and snap.get("format") == SNAPSHOT_FORMAT
+                and snap.get("gazetteer") == geocode.gazetteer_key()):
+            return snap["df"]
+    except Exception:
+        pass
+    return None
+
+def _write_snapshot(path, content_hash, df):
+    """Atomically writes the cleaned frame next to the CSV"""
+    tmp = f"{path}{SNAPSHOT_SUFFIX}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            pickle.dump({"hash": content_hash, "format": SNAPSHOT_FORMAT, "gazetteer": geocode.gazetteer_key(), "df": df}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path + SNAPSHOT_SUFFIX)
+    except Exception as e:
+        print(f"⚠️ Could not write snapshot: {e}")
+        if os.path.exists(tmp): os.remove(tmp)
+
+def _parse_orders(path):
+    """Parses and cleans the raw CSV (the slow path)"""
+    with perf.span("csv_parse"):
+        df = pd.read_csv(
+            path,
+            encoding='utf-8',
+            on_bad_lines='skip',
+            quotechar='"'
+        )
+    with perf.span("clean_orders"):
+        return clean_orders(journal.fill_order_ids(df))
+
+def _replay_journal(base, records):
+    """Applies pending journal records, cleaning only the rows they touch"""
+    df = journal.apply(base, records, prepare=clean_orders, unprepare=_stored_values)
+    df = df.sort_values('Date', na_position='last', kind='stable')
+    for c in CATEGORY_COLS:
+        if not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype('category')
+    return df
+
+class CsvStore:
+    """The CSV order book with the journal replayed on top (see journal.py)"""
+
+    def __init__(self, path=DATA_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._base = {"stat": None, "hash": None, "df": None}
+        self._view = {"key": None, "df": None, "index": None}
+        self._migrated = False
+
+    def _load_base(self):
+        """
+        Returns the cleaned base CSV, re-parsing only when its content changes.
+        Lookup order: in-memory (mtime/size, then content hash) -> snapshot -> CSV parse.
+        """
+        stat = _file_stat(self.path)
+        with self._lock:
+            cache = self._base
+            if cache["df"] is not None and cache["stat"] == stat:
+                _count("hits")
+                return cache["df"]
+
+            # mtime/size changed: only re-parse if the bytes actually changed
+            content_hash = _file_hash(self.path)
+            if cache["df"] is not None and cache["hash"] == content_hash:
+                cache["stat"] = stat
+                _count("hits")
+                return cache["df"]
+
+            df = _read_snapshot(self.path, content_hash)
+            if df is not None:
+                _count("snapshot_hits")
+            else:
+                _count("misses")
+                df = _parse_orders(self.path)
+                _write_snapshot(self.path, content_hash, df)
+
+            df.attrs['data_version'] = content_hash
+            df.attrs['legacy_ids'] = journal.has_legacy_ids(df)
+            cache.update(stat=stat, hash=content_hash, df=df)
+            return df
+
+    def load(self):
+        """Cached base frame with the order journal replayed on top"""
+        for _ in range(3):
+            base_stat = _file_stat(self.path)
+            base = self._load_base()
+            if base.attrs.get('legacy_ids') and not self._migrated:
+                self.migrate()
+                continue
+            jstat = journal.journal_stat(self.path)
+            key = (base.attrs['data_version'], jstat)
+            with self._lock:
+                if self._view["key"] == key:
+                    return self._view["df"]
+            records = journal.read(self.path)
+            # A compaction swapping the base mid-read would pair a new base with a cleared journal
+            if _file_stat(self.path) == base_stat:
+                break
+
+        df = _replay_journal(base, records) if records else base
+        df.attrs['data_version'] = f"{key[0]}-{jstat[1]}" if records else key[0]
+        with self._lock:
+            self._view.update(key=key, df=df, index=None)
+        return df
+
+    def migrate(self):
+        """Persists IDs for legacy rows once; positional placeholders stay if the CSV is read-only"""
+        self._migrated = True
+        try:
+            n = journal.migrate_ids(self.path)
+            if n: print(f"🆔 Assigned persistent IDs to {n} orders in {self.path}")
+        except Exception as e:
+            print(f"❌ Order ID migration failed: {e}")
+
+    def _index(self, df):
+        """Order_ID -> row position in the current view (built once per data version)"""
+        with self._lock:
+            if self._view["df"] is df and self._view["index"] is not None:
+                return self._view["index"]
+        index = dict(zip(df['Order_ID'].astype(str), range(len(df))))  # last row wins on a duplicate ID
+        with self._lock:
+            if self._view["df"] is df:
+                self._view["index"] = index
+        return index
+
+    def get(self, order_id):
+        df = self.load()
+        pos = self._index(df).get(str(order_id))
+        return df.iloc[0:0] if pos is None else df.iloc[[pos]]
+
+    def exists(self, order_id):
+        return str(order_id) in self._index(self.load())
+
+    # Writes go to the append-only journal; the CSV is only rewritten by compaction
+    def insert(self, data):
+        order_id = journal.new_order_id()
+        journal.append(self.path, "insert", order_id, data)
+        if _LISTENERS: _notify(None, _merged_row(None, data, order_id))
+        return order_id
+
+    def insert_many(self, df):
+        """Raw order rows (ORDER_COLS, optional Order_ID) -> one journal write"""
+        rows = journal.fill_new_ids(df.reindex(columns=DB_COLS))
+        rows = rows.astype(object).where(rows.notna(), None)
+        items = [("insert", rec.pop('Order_ID'), rec) for rec in rows.to_dict('records')]
+        journal.append_many(self.path, items)
+        if _LISTENERS:
+            for _, order_id, rec in items:
+                _notify(None, _merged_row(None, rec, order_id))
+        return [order_id for _, order_id, _ in items]
+
+    def update(self, order_id, data):
+        old = self.get(order_id)
+        if old.empty: return False
+        journal.append(self.path, "update", order_id, data)
+        if _LISTENERS: _notify(old, _merged_row(old, data, order_id))
+        return True
+
+    def delete(self, order_id):
+        old = self.get(order_id)
+        if old.empty: return False
+        journal.append(self.path, "delete", order_id)
+        if _LISTENERS: _notify(old, None)
+        return True
+
+    def compact(self):
+        return journal.compact(self.path)
+
+# --- 2. SQLITE ---
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    Order_ID      TEXT PRIMARY KEY,
+    Date          TEXT,
+    Customer_Name TEXT,
+    Phone_Number  TEXT,
+    Order_Title   TEXT,
+    Details       TEXT,
+    Pax           INTEGER,
+    Pramusaji     INTEGER,
+    Event_Type    TEXT,
+    Location      TEXT,
+    Menu_Items    TEXT,
+    Revenue       REAL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_date ON orders(Date);
+CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(Customer_Name);
+CREATE INDEX IF NOT EXISTS idx_orders_event ON orders(Event_Type);
+
+-- Bumped by every write so readers can cache per data version
+CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS orders_ins AFTER INSERT ON orders BEGIN UPDATE meta SET version = version + 1; END;
+CREATE TRIGGER IF NOT EXISTS orders_upd AFTER UPDATE ON orders BEGIN UPDATE meta SET version = version + 1; END;
+CREATE TRIGGER IF NOT EXISTS orders_del AFTER DELETE ON orders BEGIN UPDATE meta SET version = version + 1; END;
+"""
+DB_COLS = ['Order_ID'] + ORDER_COLS
+SELECT_COLS = ", ".join(DB_COLS)
+
+def _to_db_rows(df):
+    """Normalizes raw order rows for SQLite: ISO dates (sortable as text) and real numbers"""
+    df = df.reindex(columns=DB_COLS).copy()
+    dates = parse_dates(df['Date'])
+    df['Date'] = dates.dt.strftime('%Y-%m-%d %H:%M:%S').where(dates.notna(), None)
+    for c in ['Pax', 'Pramusaji', 'Revenue']:
+        df[c] = pd.to_numeric(df[c], errors='coerce')
+    df = df.astype(object).where(df.notna(), None)
+    return list(df.itertuples(index=False, name=None))
+
+class SqliteStore:
+    """Orders in a local SQLite file with a real primary key; date and year filters run as indexed SQL"""
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cache = {"version": None, "df": None}
+        with self._conn() as con:
+            con.executescript(SCHEMA)
+
+    def _conn(self):
+        # One connection per thread: Streamlit serves each session from its own thread
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30)
+            con.execute("PRAGMA journal_mode=WAL")
+            self._local.con = con
+        return con
+
+    def version(self):
+        return self._conn().execute("SELECT version FROM meta").fetchone()[0]
+
+    def _select(self, where="", params=()):
+        df = pd.read_sql_query(f"SELECT {SELECT_COLS} FROM orders {where}", self._conn(), params=params)
+        return clean_orders(df)
+
+    def load(self):
+        version = self.version()
+        with self._lock:
+            if self._cache["version"] == version:
+                _count("hits")
+                return self._cache["df"]
+        _count("misses")
+        df = self._select()
+        # Only the full table gets a data version: caches keyed on it must never see a filtered subset
+        df.attrs['data_version'] = f"sqlite-{version}"
+        _SQL_TABLES[df.attrs['data_version']] = self
+        with self._lock:
+            self._cache.update(version=version, df=df)
+        return df
+
+    def query(self, start=None, end=None, year=None):
+        """Valid-dated orders in [start, end) and/or one year; the filter runs on idx_orders_date"""
+        clauses, params = ["Date IS NOT NULL"], []
+        if year is not None:
+            y0, y1 = pd.Timestamp(f"{int(year)}-01-01"), pd.Timestamp(f"{int(year) + 1}-01-01")
+            start = y0 if start is None else max(pd.Timestamp(start), y0)
+            end = y1 if end is None else min(pd.Timestamp(end), y1)
+        if start is not None:
+            clauses.append("Date >= ?"); params.append(pd.Timestamp(start).strftime('%Y-%m-%d %H:%M:%S'))
+        if end is not None:
+            clauses.append("Date < ?"); params.append(pd.Timestamp(end).strftime('%Y-%m-%d %H:%M:%S'))
+        return self._select("WHERE " + " AND ".join(clauses), params)
+
+    def get(self, order_id):
+        return self._select("WHERE Order_ID = ?", (str(order_id),))
+
+    def exists(self, order_id):
+        return self._conn().execute("SELECT 1 FROM orders WHERE Order_ID = ?", (str(order_id),)).fetchone() is not None
+
+    def insert(self, data):
+        order_id = journal.new_order_id()
+        self.insert_many(pd.DataFrame([{**data, 'Order_ID': order_id}]))
+        return order_id
+
+    def insert_many(self, df):
+        df = journal.fill_new_ids(df.reindex(columns=DB_COLS))
+        con = self._conn()
+        with con:
+            con.executemany(f"INSERT OR REPLACE INTO orders ({', '.join(DB_COLS)}) VALUES ({', '.join('?' * len(DB_COLS))})", _to_db_rows(df))
+        if _LISTENERS:
+            rows = df.astype(object).where(df.notna(), None)
+            for rec in rows.to_dict('records'):
+                order_id = rec.pop('Order_ID')
+                _notify(None, _merged_row(None, rec, order_id))
+        return df['Order_ID'].tolist()
+
+    def update(self, order_id, data):
+        old = self.get(order_id)
+        if old.empty: return False
+        fields = {k: v for k, v in data.items() if k in ORDER_COLS}
+        if 'Date' in fields:
+            fields['Date'] = _to_db_rows(pd.DataFrame([{'Date': fields['Date']}]))[0][1]
+        if fields:
+            con = self._conn()
+            with con:
+                con.execute(f"UPDATE orders SET {', '.join(f'{k} = ?' for k in fields)} WHERE Order_ID = ?", (*fields.values(), str(order_id)))
+        if _LISTENERS: _notify(old, _merged_row(old, data, order_id))
+        return True
+
+    def delete(self, order_id):
+        old = self.get(order_id)
+        if old.empty: return False
+        con = self._conn()
+        with con:
+            con.execute("DELETE FROM orders WHERE Order_ID = ?", (str(order_id),))
+        if _LISTENERS: _notify(old, None)
+        return True
+
+    def compact(self):
+        self._conn().execute("VACUUM")
+        return 0
+
+def import_csv(csv_path=DATA_FILE, db_path=DB_FILE):
+    """Copies the CSV order book (journal included) into SQLite. Safe to re-run."""
+    try:
+        journal.migrate_ids(csv_path)  # so both backends share the same persistent IDs
+    except Exception as e:
+        print(f"❌ Order ID migration failed: {e}")
+    raw = pd.read_csv(csv_path, encoding='utf-8', on_bad_lines='skip', quotechar='"', dtype=str, keep_default_na=False)
+    raw = journal.apply(journal.fill_order_ids(raw), journal.read(csv_path))
+    raw = raw.mask(raw == "")
+    store = SqliteStore(db_path)
+    store.insert_many(raw)
+    return len(raw)
+
+# --- 3. BACKEND SELECTION ---
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+def get_store(backend="csv", path=None):
+    """One shared store per (backend, path) so caches survive Streamlit reruns"""
+    backend = (backend or "csv").lower()
+    if backend not in ("csv", "sqlite"):
+        raise ValueError(f"Unknown ORDER_BACKEND '{backend}' (use 'csv' or 'sqlite')")
+    path = path or (DB_FILE if backend == "sqlite" else DATA_FILE)
+    with _STORES_LOCK:
+        if (backend, path) not in _STORES:
+            _STORES[(backend, path)] = SqliteStore(path) if backend == "sqlite" else CsvStore(path)
+        return _STORES[(backend, path)]
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "import":
+        src = sys.argv[2] if len(sys.argv) > 2 else DATA_FILE
+        dst = sys.argv[3] if len(sys.argv) > 3 else DB_FILE
+        print(f"Imported {import_csv(src, dst)} orders from {src} into {dst}")
+    else:
+        print(__doc__)
@@ -1,40 +1,48 @@
 import streamlit as st
-import altair as alt
-import pandas as pd
-from utils import get_strategic_advice
+from utils import stream_strategic_advice, get_last_ai_timing, get_data, get_duplicates, get_chart_budget
+import charts
+import core
+import perf
 
-def render_analytics(df):
+@perf.timed()
+def render_analytics():
     st.header("📊 Business Snapshot")
     
-    # Year Filter
-    years = sorted(df['Date'].dt.year.unique(), reverse=True)
-    sel_year = st.selectbox("📅 Pick a Year:", years)
-    ydf = df[df['Date'].dt.year == sel_year]
+    # Year Filter (all KPIs/charts below are memoized per data version and year, see core.py)
+    df = get_data()
+    sel_year = st.selectbox("📅 Pick a Year:", core.year_list(df))
+    ys = core.yearly_kpis(df, sel_year)
     
-    if ydf.empty:
+    if ys is None:
         st.info("No Data for this year."); return
 
     # --- ROW 1: METRICS ---
-    tot_rev = ydf['Revenue'].sum()
-    tot_pax = ydf['Pax'].sum()
-    tot_staff = ydf['Pramusaji'].sum()
+    tot_rev = ys['revenue']
+    tot_pax = ys['pax']
+    tot_staff = ys['staff']
     
     k1, k2, k3, k4 = st.columns(4)
     k1.metric("💰 Total Money In", f"RM {tot_rev:,.0f}")
-    k2.metric("👥 Guests Fed", f"{tot_pax:,}")
-    k3.metric("👨‍🍳 Staff Shifts", f"{tot_staff:,}")
+    k2.metric("👥 Guests Fed", f"{tot_pax:,.0f}")
+    k3.metric("👨‍🍳 Staff Shifts", f"{tot_staff:,.0f}")
     
-    if not ydf.empty:
-        busy_month = ydf.groupby(ydf['Date'].dt.month_name())['Revenue'].sum().idxmax()
-    else:
-        busy_month = "-"
+    busy_month = ys['busiest_month']
     k4.metric("🔥 Busiest Month", busy_month)
+
+    # Re-sent orders inflate the totals above until they're merged (see dedupe.py)
+    dups = get_duplicates()
+    dups = dups[dups['Date'].dt.year == sel_year] if not dups.empty else dups
+    if not dups.empty:
+        st.warning(f"⚠️ {len(dups)} possible duplicate orders add RM {dups['Revenue'].sum():,.0f} to {sel_year}'s totals. "
+                   "Review them under 📅 Schedule → 🧹 Possible Duplicates.")
     
     # --- LLM INSIGHT BUTTON ---
     with st.expander("🧠 Generate AI Year Report", expanded=False):
+        fresh = st.checkbox("🔄 Fresh answer (skip AI cache)", key="report_fresh")
         if st.button("Analyze Performance"):
-            top_client = ydf.groupby('Customer_Name')['Revenue'].sum().idxmax()
-            top_event = ydf['Event_Type'].mode()[0]
+            top = core.top_clients(df, sel_year, 1)
+            top_client = top['Customer_Name'].iloc[0] if not top.empty else "-"
+            top_event = ys['top_event']
             
             context = f"""
             Year: {sel_year}
@@ -45,75 +53,39 @@ def render_analytics(df):
             Most Common Event: {top_event}
             """
             
-            with st.spinner("Consulting AI..."):
-                insight = get_strategic_advice(context, analysis_type="analytics")
-                st.markdown(f"**EXECUTIVE SUMMARY:**\n\n{insight}")
+            st.markdown("**EXECUTIVE SUMMARY:**")
+            st.write_stream(stream_strategic_advice(context, analysis_type="analytics", use_cache=not fresh))
+            t = get_last_ai_timing()
+            if t and t['first_token'] is not None:
+                st.caption(f"⚡ First words in {t['first_token']:.2f}s · full report in {t['total']:.2f}s")
 
     st.divider()
     
     # --- ROW 2: MAIN CHARTS ---
+    # Specs come pre-built and row-capped per data version and year (see charts.py)
+    budget = get_chart_budget()
     c1, c2 = st.columns(2)
     with c1:
         st.subheader("📅 Monthly Income")
-        m_data = ydf.groupby(ydf['Date'].dt.month_name())['Revenue'].sum().reindex([
-            "January", "February", "March", "April", "May", "June", 
-            "July", "August", "September", "October", "November", "December"
-        ]).reset_index()
-        m_data.columns = ['Month', 'Sales']
-        
-        # MODERN CHART: Removed Grid, Cleaned Axes
-        chart = alt.Chart(m_data).mark_bar(cornerRadiusTopLeft=10, cornerRadiusTopRight=10).encode(
-            x=alt.X('Month', sort=None, axis=alt.Axis(labelAngle=0, title=None)),
-            y=alt.Y('Sales', axis=None),
-            color=alt.value("#FF4B4B"),
-            tooltip=['Month', 'Sales']
-        ).properties(height=300, background='transparent').configure_axis(grid=False, domain=False).configure_view(strokeWidth=0)
-        
-        st.altair_chart(chart, use_container_width=True)
+        st.vega_lite_chart(charts.monthly_income(df, sel_year, budget), use_container_width=True)
     
     with c2:
         st.subheader("🎭 Event Types")
-        e_data = ydf['Event_Type'].value_counts().reset_index()
-        e_data.columns = ['Type', 'Count']
-        
-        # MODERN DONUT CHART
-        chart = alt.Chart(e_data).mark_arc(innerRadius=80, outerRadius=120).encode(
-            theta='Count', 
-            color=alt.Color('Type', scale=alt.Scale(scheme='magma')), 
-            tooltip=['Type', 'Count']
-        ).properties(height=300, background='transparent').configure_view(strokeWidth=0)
-        
-        st.altair_chart(chart, use_container_width=True)
+        st.vega_lite_chart(charts.event_types(df, sel_year, budget), use_container_width=True)
 
     st.divider()
 
     # --- ROW 3: VIPs & STAFF ---
     c3, c4 = st.columns(2)
     with c3:
-        st.subheader("🏆 Top VIP Clients")
-        client_df = ydf[ydf['Customer_Name'] != "Unknown"]
-        if not client_df.empty:
-            top = client_df.groupby('Customer_Name')['Revenue'].sum().reset_index().sort_values('Revenue', ascending=False).head(5)
-            
-            chart = alt.Chart(top).mark_bar(color='#FFD700', cornerRadius=5).encode(
-                x=alt.X('Revenue', axis=None), 
-                y=alt.Y('Customer_Name', sort='-x', title=None),
-                tooltip=['Customer_Name', 'Revenue']
-            ).properties(height=300, background='transparent').configure_axis(grid=False, domain=False).configure_view(strokeWidth=0)
-            
-            st.altair_chart(chart, use_container_width=True)
+        st.subheader("🏆 Top VIP Clients")  # by customer, not by spelling (see customers.py)
+        spec = charts.top_clients(df, sel_year, budget)
+        if spec:
+            st.vega_lite_chart(spec, use_container_width=True)
             
     with c4:
         st.subheader("👨‍🍳 Staffing Intensity")
-        staff_stats = ydf.groupby('Event_Type')['Pramusaji'].mean().reset_index()
-        
-        chart = alt.Chart(staff_stats).mark_bar(color='#008080', cornerRadius=5).encode(
-            x=alt.X('Event_Type', title=None, axis=alt.Axis(labelAngle=0)), 
-            y=alt.Y('Pramusaji', title="Avg Staff", axis=None), 
-            tooltip=['Event_Type', 'Pramusaji']
-        ).properties(height=300, background='transparent').configure_axis(grid=False, domain=False).configure_view(strokeWidth=0)
-        
-        st.altair_chart(chart, use_container_width=True)
+        st.vega_lite_chart(charts.staffing_intensity(df, sel_year, budget), use_container_width=True)
 
     st.divider()
 
@@ -121,39 +93,23 @@ def render_analytics(df):
     c5, c6 = st.columns(2)
     with c5:
         st.subheader("🍗 Top 5 Dishes")
-        all_text = " ".join(ydf['Menu_Items'].astype(str))
-        clean_text = all_text.replace("[", "").replace("]", "").replace("'", "").replace('"', "")
-        menu_list = [x.strip() for x in clean_text.split(",") if len(x.strip()) > 2]
-        if menu_list:
-            from collections import Counter
-            menu_counts = pd.DataFrame(Counter(menu_list).most_common(5), columns=['Menu', 'Count'])
-            
-            chart = alt.Chart(menu_counts).mark_bar(color='#FF914D', cornerRadius=5).encode(
-                x=alt.X('Count', axis=None), 
-                y=alt.Y('Menu', sort='-x', title=None), 
-                tooltip=['Menu', 'Count']
-            ).properties(height=300, background='transparent').configure_axis(grid=False, domain=False).configure_view(strokeWidth=0)
-            
-            st.altair_chart(chart, use_container_width=True)
+        spec = charts.top_dishes(df, sel_year, budget)
+        if spec:
+            st.vega_lite_chart(spec, use_container_width=True)
+
+        dish_q = st.text_input("🔎 Orders with dish:", placeholder="e.g. rendang")
+        if dish_q:
+            hits = core.dish_orders(df, sel_year, dish_q)
+            st.caption(f"{len(hits)} orders in {sel_year} with '{dish_q}'")
+            if len(hits):
+                st.dataframe(hits, use_container_width=True, hide_index=True)
             
     with c6:
         st.subheader("🗺️ Delivery Heatmap")
-        coords = {
-            "gombak": [3.2252, 101.7224], "bidara": [3.2380, 101.6840], "selayang": [3.2514, 101.6599],
-            "puchong": [3.0346, 101.6166], "kl": [3.1390, 101.6869], "kuala lumpur": [3.1390, 101.6869],
-            "dbkl": [3.1510, 101.6930], "batu caves": [3.2379, 101.6840], "shah alam": [3.0738, 101.5183],
-            "ampang": [3.1578, 101.7619], "petaling": [3.1073, 101.6067], "damansara": [3.1543, 101.6033],
-            "cheras": [3.0645, 101.7589], "kajang": [2.9935, 101.7874]
-        }
-        def map_loc(txt):
-            txt = str(txt).lower()
-            for k, v in coords.items():
-                if k in txt: return v
-            return None
-        
-        ydf['Coords'] = ydf['Location'].apply(map_loc)
-        map_data = ydf.dropna(subset=['Coords'])
+        map_data = charts.delivery_map(df, sel_year, budget)
         if not map_data.empty:
-            st.map(pd.DataFrame(map_data['Coords'].tolist(), columns=['lat', 'lon']), size=20, zoom=10, color='#ffaa00')
+            # One point per location cluster, sized by its orders
+            st.map(map_data, size='size', zoom=10, color='#ffaa00')
+            st.caption(f"{int(map_data['orders'].sum())} orders at {len(map_data)} locations")
         else:
             st.warning("No matched locations for map.")
\ No newline at end of file
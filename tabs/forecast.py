@@ -1,60 +1,71 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
+import altair as alt
 import math
-from sklearn.linear_model import LinearRegression
-from utils import get_strategic_advice
+from utils import stream_strategic_advice, get_last_ai_timing, get_backtest, get_data
+import core
+import perf
+from forecasting import ENGINES
+from backtest import best_engine
 
-def render_forecast(df):
+MONTH_NAMES = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+
+@perf.timed()
+def outlook_chart(outlook):
+    """Monthly revenue forecast line with its 90% interval band"""
+    data = outlook.assign(Month=outlook['Month'].dt.to_timestamp())
+    base = alt.Chart(data).encode(x=alt.X('Month:T', title=None, axis=alt.Axis(format='%b %Y')))
+    band = base.mark_area(opacity=0.25, color='#00CC96').encode(y=alt.Y('Revenue_Lo:Q', title='Revenue (RM)'), y2='Revenue_Hi:Q')
+    line = base.mark_line(point=True, color='#00CC96').encode(
+        y='Revenue:Q',
+        tooltip=[alt.Tooltip('Month:T', format='%B %Y'), alt.Tooltip('Revenue:Q', format=',.0f'),
+                 alt.Tooltip('Revenue_Lo:Q', format=',.0f'), alt.Tooltip('Revenue_Hi:Q', format=',.0f'),
+                 alt.Tooltip('Staff:Q', format='.0f')])
+    return (band + line).properties(height=300)
+
+@perf.timed()
+def render_forecast():
     st.header("🔮 AI Operational Forecast")
     st.caption("Predicts future demand and asks LLM for strategic preparation.")
     
-    # Prepare Data
-    ml_df = df.groupby(df['Date'].dt.to_period('M')).agg({'Revenue': 'sum', 'Pramusaji': 'sum'}).reset_index()
-    ml_df['Month_Num'] = ml_df['Date'].dt.month
-    ml_df['Time_Index'] = np.arange(len(ml_df))
+    # Engine: best walk-forward score unless overridden (see backtest.py)
+    scores = get_backtest()
+    best = best_engine(scores)
+    with st.expander("🧪 Model Backtest", expanded=False):
+        if scores is None:
+            st.info("Need more than 12 months of history to backtest.")
+        else:
+            st.caption("Walk-forward: each model is refitted on the history up to a month and scored on the next 3 months it hasn't seen.")
+            st.dataframe(scores.drop(columns=['Engine']).round(1), use_container_width=True, hide_index=True)
+        names = list(ENGINES)
+        engine = st.selectbox("Model:", names, index=names.index(best),
+                              format_func=lambda e: f"{ENGINES[e].label}{' (best)' if e == best else ''}")
+
+    # One cached fit per data version and engine (see forecasting.py), results memoized in core.py
+    df = get_data()
     
     with st.container(border=True):
-        # --- ROW 1: SELECTORS ---
+        # --- ROW 1: OUTLOOK ---
+        horizon = st.slider("Outlook (months):", 12, 24, 12)
+        outlook = core.forecast_outlook(df, engine, horizon)
+        if outlook is None:
+            st.error("⚠️ Need more data (> 6 months) for accurate ML predictions.")
+            return
+        st.altair_chart(outlook_chart(outlook), use_container_width=True)
+        st.caption(f"{ENGINES[engine].label} · shaded band: 90% range · {outlook['Revenue'].sum():,.0f} RM and {math.ceil(outlook['Staff'].sum())} staff shifts expected over {horizon} months")
+
+        # --- ROW 2: SELECTORS ---
         c1, c2 = st.columns(2)
         f_year = c1.selectbox("Target Year:", [2025, 2026, 2027])
-        f_month = c2.selectbox("Target Month:", ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"])
+        f_month = c2.selectbox("Target Month:", MONTH_NAMES)
         
-        # --- ROW 2: BUTTON (Bottom) ---
-        st.write("") # Spacer
+        # --- ROW 3: BUTTON (Bottom) ---
+        fresh = st.checkbox("🔄 Fresh answer (skip AI cache)", key="forecast_fresh")
         if st.button("🚀 Run AI Prediction", type="primary", use_container_width=True):
             
-            month_map = {"January": 1, "February": 2, "March": 3, "April": 4, "May": 5, "June": 6, "July": 7, "August": 8, "September": 9, "October": 10, "November": 11, "December": 12}
-            target_month_num = month_map[f_month]
-            
-            if len(ml_df) < 6:
-                st.error("⚠️ Need more data (> 6 months) for accurate ML predictions.")
-                return
-
-            # --- 1. RUN REGRESSION MODELS ---
-            model_rev = LinearRegression()
-            model_rev.fit(ml_df[['Time_Index']], ml_df['Revenue'])
-            
-            model_staff = LinearRegression()
-            model_staff.fit(ml_df[['Time_Index']], ml_df['Pramusaji'])
-            
-            # Predict Future
-            last_date = ml_df['Date'].max()
-            target_date = pd.Period(f"{f_year}-{target_month_num:02d}", freq='M')
-            months_diff = (target_date - last_date).n
-            future_idx = ml_df['Time_Index'].max() + months_diff
-            
-            pred_rev = model_rev.predict([[future_idx]])[0]
-            pred_staff = model_staff.predict([[future_idx]])[0]
-            
-            # Seasonality logic
-            avg_month = ml_df[ml_df['Month_Num'] == target_month_num]['Revenue'].mean()
-            global_avg = ml_df['Revenue'].mean()
-            factor = (avg_month / global_avg) if global_avg > 0 else 1.0
-            if pd.isna(factor): factor = 1.0
-            
-            final_rev = max(0, pred_rev * factor)
-            final_staff = max(0, math.ceil(pred_staff * factor))
+            pred = core.forecast_month(df, engine, f_year, MONTH_NAMES.index(f_month) + 1)
+            factor = pred['factor']
+            final_rev = pred['revenue']
+            final_staff = pred['staff']
             
             # --- 2. DISPLAY NUMBERS ---
             st.divider()
@@ -63,15 +74,16 @@ def render_forecast(df):
             r1, r2, r3 = st.columns(3)
             r1.metric("💰 Predicted Revenue", f"RM {final_rev:,.0f}", f"{factor:.2f}x Seasonality")
             r2.metric("👨‍🍳 Staff Needed", f"{final_staff} Pax", "Min. Roster")
-            eff = final_rev / final_staff if final_staff > 0 else 0
-            r3.metric("⚡ Efficiency Target", f"RM {eff:,.0f} / Staff", "Revenue per Head")
+            r3.metric("⚡ Efficiency Target", f"RM {pred['efficiency']:,.0f} / Staff", "Revenue per Head")
+            st.caption(f"90% range: RM {pred['revenue_lo']:,.0f} – {pred['revenue_hi']:,.0f} · "
+                       f"{pred['staff_lo']} – {pred['staff_hi']} staff")
             
             # --- 3. GENERATE LLM STRATEGY ---
             st.subheader("🤖 AI Strategic Advice (Live Generation)")
             
             # Build the context string for the LLM
-            history_max_rev = ml_df['Revenue'].max()
-            history_max_staff = ml_df['Pramusaji'].max()
+            history_max_rev = pred['history_max_revenue']
+            history_max_staff = pred['history_max_staff']
             
             context_prompt = f"""
             Context:
@@ -88,9 +100,9 @@ def render_forecast(df):
             If revenue is low, suggest marketing.
             """
             
-            with st.spinner("🧠 AI is analyzing the numbers..."):
-                advice = get_strategic_advice(context_prompt, analysis_type="forecast")
-                
-                # UPDATED: Use a formal container with Markdown for beautiful formatting
-                with st.container(border=True):
-                    st.markdown(advice)
\ No newline at end of file
+            # Stream the report into a bordered container as the model writes it
+            with st.container(border=True):
+                st.write_stream(stream_strategic_advice(context_prompt, analysis_type="forecast", use_cache=not fresh))
+            t = get_last_ai_timing()
+            if t and t['first_token'] is not None:
+                st.caption(f"⚡ First words in {t['first_token']:.2f}s · full report in {t['total']:.2f}s")
\ No newline at end of file
@@ -1,17 +1,163 @@
 import streamlit as st
-import pandas as pd
 import time
+import pandas as pd
 from datetime import datetime
-from utils import get_ai_extraction
+from utils import get_fast_extraction, get_bulk_fast_extraction, add_order, add_orders, find_customers, match_customer, mask_phone_number, check_duplicate, get_order
+import perf
+from whatsapp import candidate_orders, EVENT_TYPES
+
+def _grid_row(msg, data, err):
+    """One review-grid row from an extraction result"""
+    data = data or {}
+    menu = data.get('Menu_Items') or []
+    date = pd.to_datetime(data.get('Date'), errors='coerce', format='ISO8601')
+    return {
+        'Save': bool(data) and not err,
+        'Date': date.date() if pd.notna(date) else None,
+        'Customer_Name': data.get('Customer_Name') if data.get('Customer_Name') not in (None, '', 'Unknown') else (msg['sender'] or 'Unknown'),
+        'Phone_Number': str(data.get('Phone_Number') or ''),
+        'Order_Title': data.get('Order_Title') or '',
+        'Pax': int(data.get('Pax') or 0),
+        'Staff': int(data.get('Staff_Count') or 0),
+        'Event_Type': data.get('Event_Type') if data.get('Event_Type') in EVENT_TYPES else "Other",
+        'Revenue': float(data.get('Total_Price') or 0.0),
+        'Location': data.get('Location') or '',
+        'Menu': ", ".join(menu) if isinstance(menu, list) else str(menu),
+        'Message': msg['text'][:200] if not err else f"⚠️ {err}",
+    }
+
+def _order_row(r):
+    """Review-grid row -> the same record the single-order form saves"""
+    return {
+        'Date': pd.Timestamp(r['Date']).strftime("%Y-%m-%d"), 'Customer_Name': r['Customer_Name'],
+        'Phone_Number': r['Phone_Number'], 'Order_Title': r['Order_Title'], 'Pax': int(r['Pax']),
+        'Pramusaji': int(r['Staff']), 'Event_Type': r['Event_Type'], 'Revenue': float(r['Revenue']),
+        'Location': r['Location'], 'Details': f"AI: {r['Menu']}", 'Menu_Items': f"['{r['Menu']}']"
+    }
+
+@perf.timed()
+def render_bulk_import():
+    """Exported WhatsApp chat -> concurrent extraction -> review grid -> batch save"""
+    with st.expander("📥 Bulk Import WhatsApp Chat", expanded=False):
+        up = st.file_uploader("Exported chat (.txt)", type=["txt"])
+        pasted = st.text_area("...or paste several messages (blank line between them):", key="bulk_text")
+        chat = up.getvalue().decode("utf-8", errors="ignore") if up else pasted
+
+        if st.button("🔎 Find & Extract Orders") and chat.strip():
+            msgs = candidate_orders(chat)
+            if not msgs:
+                st.warning("No order-like messages found.")
+            else:
+                bar = st.progress(0.0, text=f"Extracting {len(msgs)} messages...")
+                results, stats = get_bulk_fast_extraction(
+                    [f"{m['sender']}: {m['text']}" if m['sender'] else m['text'] for m in msgs],
+                    progress=lambda done, n: bar.progress(done / n, text=f"Extracted {done}/{n}"))
+                grid = pd.DataFrame([_grid_row(m, d, e) for m, (d, e) in zip(msgs, results)])
+                # Messages already saved earlier (e.g. the same chat imported twice) start unticked
+                for i, r in grid[grid['Date'].notna()].iterrows():
+                    hits = check_duplicate(_order_row(r))
+                    if hits:
+                        grid.loc[i, ['Save', 'Message']] = [False, f"⚠️ Already saved? ID {hits[0][0]} ({hits[0][1]:.0%} alike) · {r['Message']}"]
+                st.session_state['bulk_rows'] = grid
+                st.session_state['bulk_stats'] = stats
+
+        rows = st.session_state.get('bulk_rows')
+        if rows is not None and not rows.empty:
+            stats = st.session_state.get('bulk_stats', {})
+            st.caption(f"⚡ {len(rows)} messages in {stats.get('seconds', 0):.1f}s · {stats.get('rules_only', 0)} without AI · "
+                       f"{stats.get('retries', 0)} retries · {int((~rows['Save']).sum())} need attention")
+            edited = st.data_editor(
+                rows, hide_index=True, use_container_width=True, key="bulk_grid",
+                column_config={
+                    "Save": st.column_config.CheckboxColumn("Save?"),
+                    "Date": st.column_config.DateColumn("Date", format="DD/MM/YYYY"),
+                    "Event_Type": st.column_config.SelectboxColumn("Type", options=EVENT_TYPES),
+                    "Revenue": st.column_config.NumberColumn("RM", min_value=0.0, step=50.0),
+                    "Message": st.column_config.TextColumn("Message", disabled=True, width="large"),
+                })
+            c1, c2 = st.columns(2)
+            if c1.button("💾 Save Selected Orders", type="primary"):
+                picked = edited[edited['Save'] & edited['Date'].notna()]
+                saved, errors = add_orders([_order_row(r) for r in picked.to_dict('records')])
+                if errors:
+                    st.error(f"Error saving {len(errors)} orders: {errors[0]}")
+                if saved:
+                    st.success(f"✅ Saved {len(saved)} orders!")
+                    st.session_state.pop('bulk_rows', None)
+                    time.sleep(1.0)
+                    st.rerun()
+            if c2.button("🗑️ Discard"):
+                st.session_state.pop('bulk_rows', None)
+                st.rerun()
 
-def render_order(full_df):
+def _save_order(new_row):
+    # Append to the order journal (no full-file rewrite)
+    success, msg = add_order(new_row)
+    if success:
+        st.session_state.pop('pending_order', None)
+        st.success(f"✅ Saved Order for {new_row['Customer_Name']}!")
+        time.sleep(1.0)
+        st.rerun()
+    else:
+        st.error(f"Error saving: {msg}")
+
+def render_duplicate_confirm():
+    """Asks before saving an order that looks like one already saved (see dedupe.py)"""
+    pending = st.session_state.get('pending_order')
+    if not pending:
+        return
+    new_row, hits = pending
+    same = []
+    for oid, sim in hits[:3]:
+        o = get_order(oid)
+        if o is not None:
+            same.append(f"ID {oid}: {str(o['Order_Title']).strip()[:40]}, {o['Customer_Name']}, {int(o['Pax'])} pax ({sim:.0%} alike)")
+    st.warning("⚠️ This looks like an order that's already saved for the same day:\n\n" + "\n\n".join(same))
+    c1, c2 = st.columns(2)
+    if c1.button("💾 Save anyway"):
+        _save_order(new_row)
+    if c2.button("✋ Don't save"):
+        st.session_state.pop('pending_order', None)
+        st.rerun()
+
+def _customer_line(c):
+    last = f"{c['Last']:%d %b %Y}" if pd.notna(c['Last']) else "-"
+    phone = mask_phone_number(c['Phone']) if c['Phone'] else "no phone"
+    return (f"**{c['Name']}** · {phone} — 💰 RM {c['Revenue']:,.0f} over {c['Orders']} orders · "
+            f"last: {last}, {str(c['Last_Title']).strip()[:40]} ({int(c['Last_Pax'])} pax)")
+
+def render_customer_lookup():
+    """Finds a returning customer by name or phone (customer index, see customers.py) and fills the form with them"""
+    known = st.session_state.get('f_name') or st.session_state.get('f_phone')
+    with st.expander("👤 Returning Customer?", expanded=bool(known)):
+        query = st.text_input("Type a name or phone number:", key="cust_find").strip()
+        if query:
+            matches = find_customers(query)
+        else:
+            hit = match_customer(st.session_state.get('f_name') or "", st.session_state.get('f_phone')) if known else None
+            matches = [hit] if hit else []
+            if hit:
+                st.caption("🔁 The extracted name/phone belongs to a returning customer:")
+        for c in matches:
+            c1, c2 = st.columns([5, 1])
+            c1.markdown(_customer_line(c))
+            if c2.button("Use", key=f"cust_use_{c['Customer_ID']}"):
+                st.session_state.update({'f_name': c['Name'], 'f_phone': c['Phone']})
+                st.rerun()
+        if query and not matches:
+            st.caption("No match: this will be a new customer.")
+
+@perf.timed()
+def render_order():
     st.header("➕ Add New Order")
     
     # 1. AI Extraction
     with st.expander("✨ Autofill from WhatsApp", expanded=True):
         raw = st.text_area("Paste WhatsApp text here:")
         if st.button("Extract Data"):
-            data = get_ai_extraction(raw)
+            t0 = time.perf_counter()
+            data = get_fast_extraction(raw)
+            ms = 1000 * (time.perf_counter() - t0)
             if data:
                 # Save ALL fields to session state
                 st.session_state.update({
@@ -22,8 +168,17 @@ def render_order(full_df):
                     'f_price': data.get('Total_Price', 0.0), 'f_staff': data.get('Staff_Count', 0)
                 })
                 st.success("Data extracted successfully!")
+                via = "locally" if data['Source'] == "rules" else "locally + AI"
+                st.caption(f"⚡ Parsed {via} in {ms:.0f} ms · confidence {data['Confidence']:.0%}")
+                if data['Low_Fields']:
+                    st.warning(f"⚠️ Please check: {', '.join(data['Low_Fields'])}")
 
-    # 2. The Form
+    render_bulk_import()
+
+    # 2. Returning customer lookup
+    render_customer_lookup()
+
+    # 3. The Form
     with st.form("entry_form"):
         st.write("### 👤 Customer Details")
         c1, c2 = st.columns(2)
@@ -54,20 +209,16 @@ def render_order(full_df):
         
         if st.form_submit_button("💾 Save Order"):
             # Create Row
-            new_row = pd.DataFrame({
-                'Date': [date_val.strftime("%Y-%m-%d")], 'Customer_Name': [name],
-                'Phone_Number': [phone], 'Order_Title': [title], 'Pax': [pax],
-                'Pramusaji': [staff], 'Event_Type': [etype], 'Revenue': [rev],
-                'Location': [loc], 'Details': [f"AI: {menu}"], 'Menu_Items': [f"['{menu}']"]
-            })
-            
-            # Save to CSV
-            updated = pd.concat([full_df, new_row], ignore_index=True)
-            cols = ['Date', 'Customer_Name', 'Phone_Number', 'Order_Title', 'Details', 'Pax', 'Pramusaji', 'Event_Type', 'Location', 'Menu_Items', 'Revenue']
-            try:
-                updated[cols].to_csv('cleaned_revenue_data.csv', index=False)
-                st.success(f"✅ Saved Order for {name}!")
-                time.sleep(1.0)
-                st.rerun()
-            except Exception as e:
-                st.error(f"Error saving: {e}")
\ No newline at end of file
+            new_row = {
+                'Date': date_val.strftime("%Y-%m-%d"), 'Customer_Name': name,
+                'Phone_Number': phone, 'Order_Title': title, 'Pax': pax,
+                'Pramusaji': staff, 'Event_Type': etype, 'Revenue': rev,
+                'Location': loc, 'Details': f"AI: {menu}", 'Menu_Items': f"['{menu}']"
+            }
+            hits = check_duplicate(new_row)
+            if hits:
+                st.session_state['pending_order'] = (new_row, hits)
+            else:
+                _save_order(new_row)
+
+    render_duplicate_confirm()
\ No newline at end of file
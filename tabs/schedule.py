@@ -1,25 +1,98 @@
 import streamlit as st
 import pandas as pd
+import altair as alt
 import time
-from utils import update_order, delete_order, mask_phone_number
+from utils import get_data, update_order, delete_order, mask_phone_numbers, get_capacity_outlook, get_capacity_limits, find_orders, get_order, get_duplicates, merge_duplicate, dismiss_duplicate
+import core
+import perf
 
-def render_schedule(df, full_df):
+@perf.timed()
+def capacity_chart(cap, staff_pool):
+    """Peak concurrent staff booked per day vs the usual demand and the staff pool"""
+    data = cap.reset_index()
+    base = alt.Chart(data).encode(x=alt.X('Day:T', title=None))
+    bars = base.mark_bar().encode(
+        y=alt.Y('Peak_Staff:Q', title='Staff on duty'),
+        color=alt.condition(alt.datum.Overbooked, alt.value('#EF553B'), alt.value('#636EFA')),
+        tooltip=[alt.Tooltip('Day:T', format='%a %d %b'), 'Orders:Q', 'Peak_Staff:Q', 'Staff:Q', 'Pax:Q',
+                 alt.Tooltip('Exp_Staff:Q', format='.1f', title='Usual staff')])
+    usual = base.mark_line(color='#FFA15A', strokeDash=[4, 3]).encode(y='Exp_Staff:Q')
+    pool = alt.Chart(pd.DataFrame({'y': [staff_pool]})).mark_rule(color='#EF553B').encode(y='y:Q')
+    return (bars + usual + pool).properties(height=220)
+
+PAGE_SIZES = [25, 50, 100]
+
+def _labels(df):
+    return ("ID " + df['Order_ID'].astype(str) + ": " + df['Order_Title'].astype(str).str.strip().str[:40]
+            + " (" + df['Date'].dt.strftime('%Y-%m-%d') + ")")
+
+DUPLICATES_SHOWN = 20
+
+@perf.timed()
+def render_duplicates():
+    """Review list for orders flagged as re-sent copies (see dedupe.py): merge into the original or keep both"""
+    dups = get_duplicates()
+    if dups.empty:
+        return
+    with st.expander(f"🧹 Possible Duplicates ({len(dups)} · RM {dups['Revenue'].sum():,.0f} counted twice)", expanded=False):
+        st.caption("Same day, similar pax and near-identical title/details. Merge keeps the earlier order, "
+                   "fills its blank fields from the copy and deletes the copy.")
+        for r in dups.head(DUPLICATES_SHOWN).itertuples(index=False):
+            c1, c2, c3 = st.columns([6, 1, 1])
+            c1.markdown(f"**{r.Date:%d %b %Y}** · {r.Pax:.0f} pax · RM {r.Revenue:,.0f} — ID {r.Order_ID} "
+                        f"“{str(r.Order_Title).strip()[:40]}” ≈ ID {r.Duplicate_Of} “{str(r.Original_Title).strip()[:40]}” "
+                        f"({r.Similarity:.0%})")
+            if c2.button("🔗 Merge", key=f"dup_merge_{r.Order_ID}"):
+                success, msg = merge_duplicate(r.Order_ID, r.Duplicate_Of)
+                if success: st.success(msg); time.sleep(1); st.rerun()
+                else: st.error(msg)
+            if c3.button("✋ Keep both", key=f"dup_keep_{r.Order_ID}"):
+                success, msg = dismiss_duplicate(r.Order_ID, r.Duplicate_Of)
+                if success: st.rerun()
+                else: st.error(msg)
+        if len(dups) > DUPLICATES_SHOWN:
+            st.caption(f"... and {len(dups) - DUPLICATES_SHOWN} more")
+
+@perf.timed()
+def render_schedule():
     c1, c2 = st.columns([3, 1])
     with c1: st.header("📅 Operational Schedule")
     with c2: view_mode = st.radio("View Mode:", ["Upcoming", "Past History"], horizontal=True)
+    render_duplicates()
+
+    # Filters run on the memoized order slice (see core.py) before anything is formatted
+    f1, f2, f3 = st.columns([3, 2, 1])
+    text = f1.text_input("🔎 Search (customer, title, location, phone, ID):", key="sched_text").strip()
+    rng = f2.date_input("Date range:", value=(), key=f"sched_range_{view_mode}", format="DD/MM/YYYY")
+    page_size = f3.selectbox("Per page:", PAGE_SIZES)
+    r0 = pd.Timestamp(rng[0]) if len(rng) > 0 else None
+    r1 = pd.Timestamp(rng[1]) + pd.Timedelta(days=1) if len(rng) > 1 else None
 
     today = pd.Timestamp.now().normalize()
-    if view_mode == "Upcoming":
-        orders = df[df['Date'] >= today].sort_values('Date', ascending=True)
-    else:
-        orders = df[df['Date'] < today].sort_values('Date', ascending=False)
+    orders = core.schedule_slice(get_data(), view_mode, today, r0, r1, text or None)
     
     if orders.empty:
         st.info(f"No {view_mode.lower()} orders found.")
         return
 
+    # Capacity check for upcoming days (see capacity.py)
+    over_days = set()
+    if view_mode == "Upcoming":
+        staff_pool, kitchen_pax = get_capacity_limits()
+        horizon = max(60, (orders['Date'].max().normalize() - today).days + 1)
+        cap = get_capacity_outlook(today, horizon)
+        if not cap.empty:
+            over = cap[cap['Overbooked']]
+            over_days = set(over.index)
+            if not over.empty:
+                why = [f"{d:%d %b} ({'staff ' + str(int(r['Peak_Staff'])) if r['Over_Staff'] else ''}"
+                       f"{' · ' if r['Over_Staff'] and r['Over_Kitchen'] else ''}"
+                       f"{'pax ' + str(int(r['Pax'])) if r['Over_Kitchen'] else ''})" for d, r in over.head(5).iterrows()]
+                st.warning(f"⚠️ {len(over)} overbooked day(s): {', '.join(why)}{' ...' if len(over) > 5 else ''}")
+            with st.expander(f"📈 Staff & Kitchen Load (pool {staff_pool} staff · kitchen {kitchen_pax:,} pax/day)", expanded=False):
+                st.altair_chart(capacity_chart(cap.head(60), staff_pool), use_container_width=True)
+
     # Cards Display
-    st.caption(f"Showing {len(orders)} orders.")
     for i, row in orders.head(3).iterrows():
         with st.container():
             c_a, c_b, c_c, c_d = st.columns([2, 3, 2, 2])
@@ -31,23 +104,42 @@ def render_schedule(df, full_df):
             c_d.caption(f"RM {row['Revenue']:,.0f}{staff_txt}")
             st.divider()
 
-    # Table View
+    # Table View: only the current page is formatted and sent to the browser
+    pages = max(1, -(-len(orders) // page_size))
     with st.expander(f"📋 {view_mode} List", expanded=True):
-        display_df = orders[['Date', 'Customer_Name', 'Phone_Number', 'Order_Title', 'Pax', 'Pramusaji', 'Location', 'Revenue', 'Row_ID']].copy()
-        display_df['Phone_Number'] = display_df['Phone_Number'].apply(mask_phone_number)
+        p1, p2 = st.columns([1, 4])
+        page_key = f"sched_page_{view_mode}"
+        if st.session_state.get(page_key, 1) > pages:
+            st.session_state[page_key] = pages  # a narrower filter can leave the old page out of range
+        page = p1.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+        lo = (page - 1) * page_size
+        page_df = orders.iloc[lo:lo + page_size]
+        p2.caption(f"Showing {lo + 1}–{lo + len(page_df)} of {len(orders)} orders · page {page} of {pages}")
+
+        display_df = page_df[['Date', 'Customer_Name', 'Phone_Number', 'Order_Title', 'Pax', 'Pramusaji', 'Location', 'Revenue', 'Order_ID']].copy()
+        display_df['Phone_Number'] = mask_phone_numbers(display_df['Phone_Number'])
         display_df['Date'] = display_df['Date'].dt.strftime('%Y-%m-%d')
-        display_df['Revenue'] = display_df['Revenue'].apply(lambda x: f"RM {x:,.2f}")
-        st.dataframe(display_df, use_container_width=True, hide_index=True, column_config={"Row_ID": st.column_config.NumberColumn("ID", format="%d")})
+        display_df['Revenue'] = "RM " + display_df['Revenue'].map('{:,.2f}'.format)
+        if over_days:
+            display_df.insert(0, 'Load', page_df['Date'].dt.normalize().isin(over_days).map({True: "⚠️", False: ""}))
+        st.dataframe(display_df, use_container_width=True, hide_index=True, column_config={"Order_ID": st.column_config.TextColumn("ID")})
 
     # MANAGER CONTROL PANEL (FULL RESTORE)
     with st.expander(f"🛠️ Manager Control Panel (Edit/Delete)", expanded=False):
-        st.info("Select an ID below to modify.")
+        st.info("Type an ID, customer or title to find an order (or pick one from this page).")
         
-        # Selector
-        opts = orders.apply(lambda x: f"ID {x['Row_ID']}: {x['Order_Title']} ({x['Date'].strftime('%Y-%m-%d')})", axis=1)
-        sel_opt = st.selectbox("Select Order:", opts)
-        sel_id = int(sel_opt.split(":")[0].replace("ID ", ""))
-        curr = full_df.loc[sel_id]
+        # Selector: index lookup instead of one option per order in the book
+        find = st.text_input("Find order:", key="sched_find").strip()
+        matches = find_orders(find) if find else list(zip(page_df['Order_ID'], _labels(page_df)))
+        if not matches:
+            st.warning("No matching orders.")
+            return
+        names = dict(matches)
+        sel_id = st.selectbox("Select Order:", list(names), format_func=names.get)
+        curr = get_order(sel_id)
+        if curr is None:
+            st.error("ID not found.")
+            return
         
         with st.form("edit_form"):
             st.subheader(f"Editing ID: {sel_id}")
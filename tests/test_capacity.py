@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+import capacity
+
+def _orders(rows):
+    df = pd.DataFrame(rows, columns=['Date', 'Event_Type', 'Pramusaji', 'Details'])
+    df['Date'] = pd.to_datetime(df['Date'])
+    return df.assign(Pax=100, Date_Valid=True)
+
+def test_peak_counts_only_overlapping_bookings():
+    load = capacity.daily_load(_orders([
+        ('2024-05-04 10:00', 'Wedding', 3, ''),   # staff 08:00-16:00
+        ('2024-05-04 13:00', 'Buffet', 4, ''),    # 11:00-17:00
+        ('2024-05-04 18:00', 'Buffet', 5, ''),    # 16:00-22:00: starts as the wedding ends
+        ('2024-05-05 00:00', 'Buffet', 2, ''),    # no time: the whole day
+        ('2024-05-05 00:00', 'Buffet', 6, 'Jam 7.00 malam hingga 10.00 malam'),
+    ]))
+    assert load.loc['2024-05-04', 'Peak_Staff'] == 9  # buffets overlap 16:00-17:00; the wedding has left
+    assert load.loc['2024-05-04', 'Staff'] == 12
+    assert load.loc['2024-05-05', 'Peak_Staff'] == 8
+
+def test_sweep_matches_brute_force():
+    rng = np.random.default_rng(11)
+    n = 400
+    df = _orders({
+        'Date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 20, n), unit='D')
+                + pd.to_timedelta(rng.choice([0, 8, 9.5, 11, 12, 15, 19], n), unit='h'),
+        'Event_Type': rng.choice(list(capacity.EVENT_HOURS), n),
+        'Pramusaji': rng.integers(0, 8, n),
+        'Details': '',
+    })
+    start, end, _ = capacity.event_windows(df)
+    load = capacity.daily_load(df)
+    for day, got in load['Peak_Staff'].items():
+        on = (df['Date'].dt.normalize() == day).to_numpy()
+        s, e, staff = start[on].to_numpy(), end[on].to_numpy(), df['Pramusaji'].to_numpy()[on]
+        # Staff on duty just after each start (windows are half-open, so a shift ending then has left)
+        want = max(staff[(s <= t) & (e > t)].sum() for t in s)
+        assert got == want, day
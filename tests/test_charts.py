@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+
+import charts
+
+MONTHS = pd.DataFrame({'Month': ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'],
+                       'Sales': [1.0, 2, np.nan, 4, 5, 6, 7, 8, 9, 10, 11, 12]})
+
+def test_rebinned_bars_keep_every_month_in_some_total():
+    for max_rows in (12, 5, 4, 2):
+        bars = charts.rebin(MONTHS, 'Month', 'Sales', max_rows)
+        assert len(bars) <= max_rows
+        assert bars['Sales'].sum() == MONTHS['Sales'].sum()
+    assert charts.rebin(MONTHS, 'Month', 'Sales', 4)['Month'].tolist() == ['Jan–Mar', 'Apr–Jun', 'Jul–Sep', 'Oct–Dec']
+
+def test_folded_tail_keeps_the_total():
+    data = pd.DataFrame({'Type': list('abcdef'), 'Count': [6, 5, 4, 3, 2, 1]})
+    folded = charts.fold_tail(data, 'Type', 'Count', 3)
+    assert folded['Type'].tolist() == ['a', 'b', 'Other'] and folded['Count'].sum() == 21
@@ -0,0 +1,46 @@
+import pandas as pd
+
+import customers
+
+def _resolve(rows):
+    """Customer ID per (name, phone) row, resolved oldest first by a fresh index"""
+    df = pd.DataFrame(rows, columns=['Customer_Name', 'Phone_Clean'])
+    df['Order_ID'] = [f"o{i}" for i in range(len(df))]
+    df['Date'] = pd.date_range('2024-01-01', periods=len(df), freq='D')
+    index = customers.CustomerIndex()
+    return list(index.assign(df)), index
+
+def test_spellings_of_one_customer_merge():
+    ids, _ = _resolve([("Kak Timah", ""), ("kak timah ", ""), ("Timah", ""), ("Aminah Binti Ali", ""), ("Aminah Bnti Ali", "")])
+    assert ids[0] == ids[1] == ids[2]
+    assert ids[3] == ids[4] != ids[0]
+
+def test_phone_links_names_and_separates_namesakes():
+    ids, _ = _resolve([("Farah", "0123456789"), ("Farah", "0198765432"), ("Farah Catering", "123456789"), ("Unknown", "")])
+    assert ids[0] != ids[1]             # same name, each with their own number
+    assert ids[2] == ids[0]             # same number, another spelling
+    assert ids[3] is None               # anonymous walk-in
+
+def test_word_check_keeps_close_names_apart():
+    ids, _ = _resolve([("Selayang Utama", ""), ("Selayang UiTM", ""), ("Fatimah", ""), ("Timah", "")])
+    assert len(set(ids)) == 4
+
+def _shares_block(a, b):
+    """Same word count and a word with the same prefix at the same position, at a length that can still match"""
+    wa, wb = a.split(), b.split()
+    return (len(wa) == len(wb) and len(b) in customers._lengths(len(a))
+            and any(x[:customers.BLOCK_CHARS] == y[:customers.BLOCK_CHARS] for x, y in zip(wa, wb)))
+
+def test_blocking_only_prunes_names_outside_the_block():
+    names = ["aminah ali", "aminah aly", "amnah ali", "aminah alias", "zainab ali", "ali aminah", "siti aminah", "rosnah ali",
+             "amina ali", "aminah ali baba", "farid ali", "faridah ali", "nur aminah ali", "aminah", "amnah", "aminahh"]
+    _, index = _resolve([(n, "") for n in names])
+    pruned = 0
+    for key in map(customers.name_key, names):
+        found = dict(index.similar(key, limit=len(names)))
+        brute = {c for c in index.by_name if customers._ratio(key, c) >= customers.SIMILARITY and customers._same_words(key, c)}
+        in_block = {c for c in brute if _shares_block(key, c)}
+        assert in_block <= set(found) <= brute
+        assert key in found
+        pruned += len(brute - in_block)
+    assert pruned  # "aminah" / "amnah" only differ inside the block prefix
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+import dedupe
+
+FORWARDED = "Tempahan nasi minyak ayam masak merah untuk majlis kahwin di Dewan Selayang, 120 pax, rate RM15"
+
+def _orders(rows):
+    df = pd.DataFrame(rows, columns=['Order_ID', 'Date', 'Order_Title', 'Details', 'Pax'])
+    df['Date'] = pd.to_datetime(df['Date'])
+    return df.assign(Date_Valid=True, Customer_Name="Kak Ana", Revenue=df['Pax'] * 15.0)
+
+def test_signature_similarity_estimates_jaccard():
+    a, b, c = dedupe.signatures([FORWARDED, FORWARDED.replace("120", "121"), "Nasi lemak bungkus 300 pack untuk sekolah"])
+    assert (a == dedupe.signatures([FORWARDED.upper() + " !!"])[0]).all()  # case and punctuation are ignored
+    assert (a == b).mean() >= dedupe.SIMILARITY
+    assert (a == c).mean() < 0.2
+
+def test_copies_on_the_same_day_and_size_are_flagged():
+    df = _orders([
+        ('a', '2024-05-04 10:00', 'Kenduri Aminah', FORWARDED, 120),
+        ('b', '2024-05-04 10:00', 'kenduri aminah', FORWARDED + " ya", 118),      # re-typed copy
+        ('c', '2024-05-05 10:00', 'Kenduri Aminah', FORWARDED, 120),              # another day
+        ('d', '2024-05-04 10:00', 'Kenduri Aminah', FORWARDED, 300),              # another size
+        ('e', '2024-05-04 12:00', 'Mesyuarat DBKL', "Nasi lemak bungkus 120 pack", 120),
+    ])
+    out = dedupe.review(df, dismissed=set())
+    assert list(zip(out['Order_ID'], out['Duplicate_Of'])) == [('b', 'a')]
+    assert dedupe.review(df, dismissed={frozenset(('a', 'b'))}).empty
+
+def test_check_finds_the_order_a_new_one_would_repeat():
+    index = dedupe.DuplicateIndex(_orders([('a', '2024-05-04', 'Kenduri Aminah', FORWARDED, 120)]))
+    assert [oid for oid, _ in index.check('2024-05-04', 'Kenduri Aminah', "", 120)] == ['a']  # title alone counts
+    assert index.check('2024-05-05', 'Kenduri Aminah', FORWARDED, 120) == []
+    assert index.check('2024-05-04', 'Kenduri Aminah', FORWARDED, 200) == []
+
+def test_lsh_groups_match_a_brute_force_comparison():
+    rng = np.random.default_rng(7)
+    words = "nasi minyak ayam masak merah dalca acar kuih teh tarik air sirap daging rendang sayur".split()
+    rows = []
+    for i in range(200):
+        text = " ".join(rng.choice(words, 12))
+        rows.append((f"o{i}", f"2024-05-{1 + i % 5:02d}", "Kenduri", text, 100))
+        if i % 4 == 0:
+            rows.append((f"o{i}x", f"2024-05-{1 + i % 5:02d}", "Kenduri", text + " ya", 100))
+    df = _orders(rows)
+    index = dedupe.DuplicateIndex(df)
+    a, b = np.triu_indices(len(df), 1)
+    sim = (index.sig(a) == index.sig(b)).mean(axis=1)
+    same = (index.days[a] == index.days[b]) & dedupe._same_pax(index.pax[a], index.pax[b])
+    # LSH may miss a borderline pair, but it never links orders of different days or sizes and always finds near-identical ones
+    linked = index.original[a] == index.original[b]
+    assert not (linked & ~same).any()
+    assert linked[same & (sim >= 0.9)].all()
+    assert {f"o{i}x" for i in range(0, 200, 4)} <= set(dedupe.review(df, dismissed=set())['Order_ID'])
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+import storage
+
+ROW = {'Date': '2024-05-04', 'Customer_Name': 'Kak Ana', 'Phone_Number': '0123456789', 'Order_Title': 'Kenduri',
+       'Details': 'nasi minyak', 'Pax': 50, 'Pramusaji': 2, 'Event_Type': 'Wedding', 'Location': 'Selayang',
+       'Menu_Items': "['nasi minyak']", 'Revenue': None}
+
+def _revenue(store, order_id):
+    return float(store.get(order_id)['Revenue'].iloc[0])
+
+@pytest.fixture
+def csv_store(tmp_path):
+    path = str(tmp_path / "orders.csv")
+    pd.DataFrame([{'Order_ID': 'a1', **ROW}], columns=['Order_ID'] + storage.ORDER_COLS).to_csv(path, index=False)
+    return storage.CsvStore(path)
+
+def test_update_reestimates_blank_revenue_before_and_after_compaction(csv_store, tmp_path):
+    assert _revenue(csv_store, 'a1') == 50 * 18  # Wedding rate
+    assert csv_store.update('a1', {'Pax': 100})
+    assert _revenue(csv_store, 'a1') == 100 * 18  # journal replayed on the cleaned base
+    csv_store.compact()
+    assert _revenue(csv_store, 'a1') == 100 * 18
+    assert pd.read_csv(csv_store.path)['Revenue'].isna().all()  # the estimate is never stored
+
+    sqlite = storage.SqliteStore(str(tmp_path / "orders.db"))
+    sqlite.insert_many(pd.DataFrame([{'Order_ID': 'a1', **ROW}]))
+    sqlite.update('a1', {'Pax': 100})
+    assert _revenue(sqlite, 'a1') == 100 * 18
+
+def test_recorded_revenue_survives_update(csv_store):
+    csv_store.update('a1', {'Revenue': 1200})
+    csv_store.update('a1', {'Pax': 80})
+    assert _revenue(csv_store, 'a1') == 1200
+    csv_store.compact()
+    assert _revenue(csv_store, 'a1') == 1200
@@ -0,0 +1,36 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+import lookup
+
+def _orders(n=300):
+    rng = np.random.default_rng(3)
+    return pd.DataFrame({
+        'Order_ID': [f"{i:06d}" for i in range(n)],
+        'Order_Title': rng.choice(["Kenduri kahwin", "Mesyuarat Jawatankuasa", "Majlis tahlil", "Nasi kotak 300 pack"], n),
+        'Customer_Name': rng.choice(["DBKL", "Istana Negara", "Kak Ana", "Ana Catering", "Kawan Yusuf", "Pn Anasuha"], n),
+        'Date': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 900, n), unit='D'),
+        'Date_Valid': True,
+    })
+
+def _old_scan(index, q):
+    """The substring scan the word index replaced, newest first"""
+    return list(np.flatnonzero(pd.Series(index.labels).str.lower().str.contains(q.lower(), regex=False).to_numpy()))
+
+def test_word_index_matches_the_substring_scan_at_word_starts():
+    index = lookup.OrderLookup(_orders())
+    for q in ["dbkl", "DBKL", "istana negara", "kak ana", "ana", "2024-05", "kenduri kahwin", "jawatan", "2023", "zzz"]:
+        got = [index.ids.tolist().index(oid) for oid, _ in index.search(q, limit=len(index.ids))]
+        # Only a query that starts mid-word ("ana" in "Anasuha" still counts, in "Istana" not) is dropped
+        want = [p for p in _old_scan(index, q) if re.search(r"(?<!\w)" + re.escape(q.lower()), index.labels[p].lower())]
+        assert got == want, q
+
+def test_id_prefix_first_and_short_words_ignored():
+    index = lookup.OrderLookup(_orders())
+    hits = [oid for oid, _ in index.search("00012")]
+    assert sorted(hits) == [f"{i:06d}" for i in range(120, 130)]
+    assert index.search("k") == []  # one letter: no word lookup, and no ID starts with it
+    labels = [label for _, label in index.search("kak a", limit=50)]
+    assert labels and all("kak a" in label.lower() for label in labels)  # the short word still has to follow "kak"
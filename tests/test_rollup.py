@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+import rollup
+from cleaning import clean_orders
+from test_journal import ROW
+
+def _frame(rows, version):
+    df = clean_orders(pd.DataFrame([{**ROW, **r} for r in rows]))
+    df.attrs['data_version'] = version
+    return df
+
+ROWS = [{'Order_ID': 'a', 'Date': '2024-03-04', 'Revenue': 1000}, {'Order_ID': 'b', 'Date': '2024-05-04', 'Revenue': 500},
+        {'Order_ID': 'c', 'Date': '2024-05-20', 'Event_Type': 'Corporate', 'Revenue': 300}]
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setitem(rollup._CACHE, "cube", None)
+
+def _stats():
+    return dict(rollup.CUBE_STATS)
+
+def test_patched_cube_is_adopted_when_it_matches():
+    df = _frame(ROWS, "v1")
+    rollup.get_cube(df)
+    moved = [ROWS[0], {**ROWS[1], 'Date': '2024-06-04'}, ROWS[2]]  # an edit moves b from May to June
+    df2 = _frame(moved, "v2")
+    rollup._on_change(df[df['Order_ID'] == 'b'], df2[df2['Order_ID'] == 'b'])
+    before = _stats()
+    cube = rollup.get_cube(df2)
+    assert _stats()['incremental'] == before['incremental'] + 1
+    assert cube.year(2024)['monthly'][['May', 'June']].tolist() == [300, 500]
+
+def test_patch_moving_revenue_between_cells_is_caught():
+    df = _frame(ROWS, "v1")
+    cube = rollup.get_cube(df)
+    # Same order count and revenue, but May's revenue booked under March and the Corporate order as a Wedding
+    cells = cube.cells.copy()
+    cells.loc[cells['Month'] == 5, 'Month'] = 3
+    cells['Event_Type'] = 'Wedding'
+    cube.cells, cube.pending = cells, True
+    before = _stats()
+    cube = rollup.get_cube(_frame(ROWS, "v2"))
+    assert _stats()['builds'] == before['builds'] + 1 and _stats()['incremental'] == before['incremental']
+    assert cube.year(2024)['monthly'][['March', 'May']].tolist() == [1000, 800]
+    assert cube.year(2024)['event_counts'].to_dict() == {'Wedding': 2, 'Corporate': 1}
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+import rule_parser
+
+TODAY = datetime(2026, 1, 1)
+CHAT = "Salam kak, saya Aminah nak tempah nasi minyak 120 pax untuk majlis kahwin pada 12/12/2026. Rate RM15.00"
+BLOCK = "Nama: Puan Aminah\nTarikh: 12/12/2026\nAlamat: Dewan Selayang\n120 pax\nMenu:\n- nasi minyak\n- ayam masak merah"
+
+def test_name_missing_from_free_text_goes_to_the_llm():
+    data, conf = rule_parser.extract(CHAT, TODAY)
+    assert data['Customer_Name'] == ''
+    assert data['Event_Type'] == 'Wedding'
+    low = rule_parser.low_fields(conf)
+    assert 'Customer_Name' in low and 'Order_Title' in low  # the title is made up from the event
+    assert 'Event_Type' not in low and 'Pax' not in low and 'Total_Price' not in low
+
+def test_fallback_defaults_score_below_threshold():
+    data, conf = rule_parser.extract("Nama: Aminah\nTarikh: 12/12/2026\nnasi minyak 120 pax", TODAY)
+    assert data['Event_Type'] == 'Buffet'
+    assert conf['Event_Type'] < rule_parser.THRESHOLD
+
+def test_optional_fields_missing_from_a_booking_block_are_absent():
+    data, conf = rule_parser.extract(BLOCK, TODAY)
+    assert rule_parser.is_booking_block(BLOCK) and not rule_parser.is_booking_block(CHAT)
+    assert data['Total_Price'] == 0.0 and data['Phone_Number'] == ''
+    assert conf['Total_Price'] == conf['Phone_Number'] == rule_parser.ABSENT
+    assert 'Customer_Name' not in rule_parser.low_fields(conf)
+
+def test_inline_dish_runs_to_a_stop_word_or_delimiter():
+    data, _ = rule_parser.extract("nak order nasi minyak ayam masak merah untuk 50 pax", TODAY)
+    assert data['Menu_Items'] == ['nasi minyak ayam masak merah']
+    data, _ = rule_parser.extract("nak order nasi minyak, ayam masak merah dan dalca 50 pax", TODAY)
+    assert data['Menu_Items'] == ['nasi minyak', 'ayam masak merah', 'dalca']
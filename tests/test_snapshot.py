@@ -0,0 +1,43 @@
+import os
+
+import pandas as pd
+import pytest
+
+import geocode
+import storage
+from test_journal import ROW
+
+def _write_gazetteer(path, lat):
+    path.write_text(f"name,lat,lon\nselayang,{lat},101.6\n")
+
+@pytest.fixture
+def gazetteer(tmp_path, monkeypatch):
+    path = tmp_path / "gazetteer.csv"
+    _write_gazetteer(path, 3.2)
+    monkeypatch.setenv("GAZETTEER_FILE", str(path))
+    geocode.load_gazetteer()
+    yield path
+    monkeypatch.undo()
+    geocode.load_gazetteer()
+
+def _restart():
+    """What a fresh process sees: no matcher loaded yet, nothing memoized"""
+    geocode._STATE.update(matcher=None, coords=None, key=None)
+    geocode._geocode_normalized.cache_clear()
+
+def test_snapshot_is_rebuilt_after_a_gazetteer_edit(gazetteer, tmp_path):
+    path = str(tmp_path / "orders.csv")
+    pd.DataFrame([{'Order_ID': 'a1', **ROW}], columns=['Order_ID'] + storage.ORDER_COLS).to_csv(path, index=False)
+    store = storage.CsvStore(path)
+    assert store.load()['Lat'].iloc[0] == 3.2
+
+    # Same size, newer mtime: this process still holds the matcher built from the old file
+    _write_gazetteer(gazetteer, 8.2)
+    st_ = os.stat(gazetteer)
+    os.utime(gazetteer, ns=(st_.st_atime_ns, st_.st_mtime_ns + 10**9))
+    store.update('a1', {'Pax': 60})
+    store.compact()
+    assert store.load()['Lat'].iloc[0] == 3.2  # reparsed with the old matcher, so its snapshot carries the old key
+
+    _restart()
+    assert storage.CsvStore(path).load()['Lat'].iloc[0] == 8.2
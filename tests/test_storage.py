@@ -0,0 +1,22 @@
+import pandas as pd
+
+import storage
+from test_journal import ROW
+
+def test_sqlite_year_and_range_filters_run_in_sql(tmp_path, monkeypatch):
+    store = storage.SqliteStore(str(tmp_path / "orders.db"))
+    dates = ['2023-12-31 12:00', '2024-01-01 09:00', '2024-06-15', '2025-01-02', None]
+    store.insert_many(pd.DataFrame([{**ROW, 'Order_ID': f"o{i}", 'Date': d, 'Customer_Name': f"Kak Ana {i}"} for i, d in enumerate(dates)]))
+    df = store.load()
+    plain = df.copy()
+    plain.attrs = {}  # no data version: filtered in pandas
+
+    seen = []
+    query = store.query
+    monkeypatch.setattr(store, 'query', lambda *a: seen.append(a) or query(*a))
+    for kw in [dict(year=2024), dict(start='2024-03-01'), dict(end='2024-01-01'), dict(year=2024, end='2024-03-01', text='ana 2')]:
+        got = storage.filter_orders(df, **kw)
+        assert sorted(got['Order_ID']) == sorted(storage.filter_orders(plain, **kw)['Order_ID'])
+    assert len(seen) == 4
+    assert sorted(storage.filter_orders(df, year=2024)['Order_ID']) == ['o1', 'o2']
+    assert len(storage.filter_orders(df)) == 4  # no date filter: the loaded table, minus the undated order
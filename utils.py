@@ -1,41 +1,61 @@
 import pandas as pd
-import numpy as np
 import os
-import json
+import time
+from collections import deque
 import streamlit as st  # <--- Added this to access Cloud Secrets
-from openai import OpenAI
 from dotenv import load_dotenv
+import storage
+import rollup
+import menu
+import whatsapp
+import rule_parser
+import llm_cache
+import forecasting
+import backtest
+import capacity
+import lookup
+import customers
+import dedupe
+import perf
+import core
 
 load_dotenv()
 
-# --- HELPER: GET KEY SAFELY ---
-def get_api_key():
-    """Tries to get the API key from Environment (Local) or Secrets (Cloud)"""
+# --- HELPER: GET SETTINGS SAFELY ---
+def get_setting(name, default=None):
+    """Reads a setting from Environment (Local) or Secrets (Cloud)"""
     # 1. Try Local .env
-    key = os.getenv("OPENAI_API_KEY")
-    if key:
-        return key
+    value = os.getenv(name)
+    if value:
+        return value
     
     # 2. Try Streamlit Cloud Secrets
     try:
-        return st.secrets["OPENAI_API_KEY"]
+        return st.secrets[name]
     except:
+        return default
+
+def get_api_key():
+    """Tries to get the API key from Environment (Local) or Secrets (Cloud)"""
+    return get_setting("OPENAI_API_KEY")
+
+_CLIENTS = {}
+
+def get_client():
+    """Sync OpenAI client, built once per key/base URL so its connection pool is reused"""
+    api_key = get_api_key()
+    if not api_key:
         return None
+    key = (api_key, get_setting("OPENAI_BASE_URL"))
+    if key not in _CLIENTS:
+        from openai import OpenAI  # the SDK takes ~0.6s to import, so only on the first AI call
+        _CLIENTS[key] = OpenAI(api_key=api_key, base_url=key[1] or None)
+    return _CLIENTS[key]
 
 # --- 1. AI STRATEGIC ADVICE ---
-def get_strategic_advice(context_text, analysis_type="forecast"):
-    """
-    Sends data to OpenAI to get a strategic business insight.
-    """
-    try:
-        api_key = get_api_key()
-        if not api_key:
-            return "⚠️ Error: OpenAI API Key is missing. Check .env or Streamlit Secrets."
-            
-        client = OpenAI(api_key=api_key) # <--- Explicitly pass the key
-        
-        if analysis_type == "forecast":
-            system_role = """
+def _advice_role(analysis_type):
+    if analysis_type == "forecast":
+        return """
             You are an Operations Director presenting a forecast to the CEO. 
             Format your response using Markdown. 
             Structure it into 3 distinct sections with bold headers:
@@ -43,124 +63,368 @@ def get_strategic_advice(context_text, analysis_type="forecast"):
             2. **⚠️ Operational Risk Analysis**: Compare the prediction vs historical max. Is it too high (capacity risk) or too low (revenue risk)?
             3. **🚀 Strategic Action Plan**: Provide 2-3 specific, actionable bullet points for the manager.
             """
-        else:
-            system_role = "You are a Business Analyst. Summarize the yearly performance, highlight the biggest win, and suggest one improvement area. Use bold headers and bullet points."
+    return "You are a Business Analyst. Summarize the yearly performance, highlight the biggest win, and suggest one improvement area. Use bold headers and bullet points."
+
+@perf.timed()
+def get_strategic_advice(context_text, analysis_type="forecast", use_cache=True):
+    """
+    Sends data to OpenAI to get a strategic business insight.
+    Identical requests are answered from the on-disk cache unless use_cache=False.
+    """
+    try:
+        client = get_client()
+        if client is None:
+            return "⚠️ Error: OpenAI API Key is missing. Check .env or Streamlit Secrets."
+        
+        system_role = _advice_role(analysis_type)
+
+        def ask():
+            response = client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": system_role},
+                    {"role": "user", "content": context_text}
+                ],
+                temperature=0.7
+            )
+            return response.choices[0].message.content
+        return llm_cache.cached_call(ask, "gpt-4o-mini", system_role, context_text, 0.7, use_cache=use_cache)
+    except Exception as e:
+        return f"AI Error: {e}"
 
-        response = client.chat.completions.create(
+AI_TIMINGS = deque(maxlen=50)  # recent streamed replies: time to first token and total
+
+def stream_strategic_advice(context_text, analysis_type="forecast", use_cache=True):
+    """
+    Same advice as get_strategic_advice(), yielded chunk by chunk as the model
+    writes it (for st.write_stream). Timings are recorded in AI_TIMINGS.
+    """
+    client = get_client()
+    if client is None:
+        yield "⚠️ Error: OpenAI API Key is missing. Check .env or Streamlit Secrets."
+        return
+    system_role = _advice_role(analysis_type)
+
+    def chunks():
+        stream = client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": system_role},
                 {"role": "user", "content": context_text}
             ],
-            temperature=0.7
+            temperature=0.7,
+            stream=True
         )
-        return response.choices[0].message.content
+        for event in stream:
+            if event.choices and event.choices[0].delta.content:
+                yield event.choices[0].delta.content
+
+    t0 = time.perf_counter()
+    first = None
+    try:
+        with perf.span("stream_strategic_advice"):
+            for piece in llm_cache.cached_stream(chunks, "gpt-4o-mini", system_role, context_text, 0.7, use_cache=use_cache):
+                if first is None:
+                    first = time.perf_counter() - t0
+                yield piece
     except Exception as e:
-        return f"AI Error: {e}"
+        yield f"AI Error: {e}"
+    finally:
+        AI_TIMINGS.append({"type": analysis_type, "first_token": first, "total": time.perf_counter() - t0})
+
+def get_last_ai_timing():
+    return AI_TIMINGS[-1] if AI_TIMINGS else None
 
 # --- 2. WHATSAPP EXTRACTION ---
-def get_ai_extraction(text_input):
+@perf.timed()
+def get_ai_extraction(text_input, use_cache=True):
     """Uses OpenAI to convert raw text into structured JSON"""
     try:
-        api_key = get_api_key()
-        if not api_key:
+        client = get_client()
+        if client is None:
             return None
 
-        client = OpenAI(api_key=api_key) # <--- Explicitly pass the key
-        
-        prompt = f"""
-        Extract catering order details into JSON.
-        Fields:
-        - Date (YYYY-MM-DD)
-        - Customer_Name (Person's Name)
-        - Phone_Number (digits only)
-        - Order_Title (Event Name)
-        - Pax (Integer)
-        - Staff_Count (Integer, default 0)
-        - Event_Type (Wedding, Corporate, Packet, Buffet, Other)
-        - Location (City/Area)
-        - Menu_Items (List of food items)
-        - Total_Price (Float, total contract value)
-        
-        Text: "{text_input}"
-        Return ONLY valid JSON.
-        """
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0
-        )
-        content = response.choices[0].message.content.replace("```json", "").replace("```", "")
-        return json.loads(content)
+        prompt = whatsapp.build_prompt(text_input)
+
+        def ask():
+            response = client.chat.completions.create(
+                model=whatsapp.MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0
+            )
+            content = response.choices[0].message.content
+            whatsapp.parse_reply(content)  # raises on bad JSON, so it never gets cached
+            return content
+        return whatsapp.parse_reply(llm_cache.cached_call(ask, whatsapp.MODEL, "", prompt, 0, use_cache=use_cache))
     except Exception:
         return None
 
+@perf.timed()
+def get_fast_extraction(text_input, use_cache=True):
+    """
+    Local rules first (rule_parser.py); the LLM is only asked when a field comes
+    out below RULE_CONFIDENCE, and only those fields are taken from its reply.
+    Returns the get_ai_extraction() fields plus 'Confidence', 'Low_Fields' and 'Source'.
+    """
+    threshold = float(get_setting("RULE_CONFIDENCE", rule_parser.THRESHOLD))
+    data, conf = rule_parser.extract(text_input)
+    low = rule_parser.low_fields(conf, threshold)
+    source = "rules"
+    if low:
+        ai = get_ai_extraction(text_input, use_cache=use_cache)
+        if ai:
+            data, conf = rule_parser.merge(data, conf, ai, low)
+            source = "rules+ai"
+    return {**data, 'Confidence': rule_parser.overall(conf), 'Low_Fields': rule_parser.low_fields(conf, threshold), 'Source': source}
+
+def get_bulk_extraction(texts, progress=None):
+    """
+    Extracts many WhatsApp messages concurrently (see whatsapp.py).
+    Returns ([(data or None, error or None)], stats), or None without an API key.
+    """
+    api_key = get_api_key()
+    if not api_key:
+        return None
+    return whatsapp.extract_batch(
+        texts, api_key, get_setting("OPENAI_BASE_URL"),
+        concurrency=int(get_setting("AI_CONCURRENCY", 8)), rpm=float(get_setting("AI_RPM", 120)),
+        progress=progress)
+
+def get_bulk_fast_extraction(texts, progress=None):
+    """
+    get_fast_extraction() for many messages: rules for all of them, then one
+    concurrent LLM batch for those with low-confidence fields. Returns
+    ([(data, error or None)], stats); a message still low after that (or with no
+    API key) comes back with an error naming the fields to check.
+    """
+    threshold = float(get_setting("RULE_CONFIDENCE", rule_parser.THRESHOLD))
+    parsed = [rule_parser.extract(t) for t in texts]
+    todo = [i for i, (_, conf) in enumerate(parsed) if rule_parser.low_fields(conf, threshold)]
+    out = get_bulk_extraction([texts[i] for i in todo], progress=progress) if todo else None
+    stats = out[1] if out else {"completed": 0, "retries": 0, "seconds": 0.0}
+    if out:
+        for i, (reply, err) in zip(todo, out[0]):
+            if reply and not err:
+                parsed[i] = rule_parser.merge(*parsed[i], reply, rule_parser.low_fields(parsed[i][1], threshold))
+    elif progress:
+        progress(len(texts), len(texts))
+    stats["rules_only"] = len(texts) - len(todo)
+    results = []
+    for data, conf in parsed:
+        low = rule_parser.low_fields(conf, threshold)
+        results.append((data, f"Check {', '.join(low)}" if low else None))
+    return results, stats
+
 # --- 3. DATA LOADING ---
-def load_data():
-    """Loads and cleans the database with robust error handling"""
-    try:
-        df = pd.read_csv(
-            'cleaned_revenue_data.csv', 
-            encoding='utf-8', 
-            engine='python',
-            on_bad_lines='skip',
-            quotechar='"'
-        )
-        
-        # Standard Clean-up
-        df['Date'] = pd.to_datetime(df['Date'], format='mixed', errors='coerce')
-        df['Date_Valid'] = df['Date'].notna()
-        df['Row_ID'] = df.index
-        df = df.sort_values('Date', na_position='last')
-        df['Month_Year'] = df['Date'].dt.to_period('M')
-
-        # Ensure Columns Exist
-        cols = ['Customer_Name', 'Phone_Number', 'Pramusaji', 'Revenue', 'Pax', 'Event_Type', 'Location', 'Order_Title', 'Details', 'Menu_Items']
-        for c in cols:
-            if c not in df.columns:
-                df[c] = 0 if c in ['Pramusaji', 'Revenue', 'Pax'] else ""
-
-        # Force Numbers
-        df['Revenue'] = pd.to_numeric(df['Revenue'], errors='coerce')
-        df['Pax'] = pd.to_numeric(df['Pax'], errors='coerce').fillna(0)
-        df['Pramusaji'] = pd.to_numeric(df['Pramusaji'], errors='coerce').fillna(0)
-        df['Phone_Clean'] = df['Phone_Number'].astype(str).str.replace(r'\D', '', regex=True)
-
-        # Estimate missing revenue
-        def estimate_revenue(row):
-            if pd.notna(row['Revenue']) and row['Revenue'] > 0: return row['Revenue']
-            rates = {"Wedding": 18, "Corporate": 25, "Packet": 10, "Buffet": 22}
-            return row['Pax'] * rates.get(str(row['Event_Type']), 15)
-
-        df['Revenue'] = df.apply(estimate_revenue, axis=1)
-        return df
+# Backend is chosen by the ORDER_BACKEND setting: "csv" (default) or "sqlite"
+DATA_FILE = storage.DATA_FILE
+
+def get_store():
+    return storage.get_store(get_setting("ORDER_BACKEND", "csv"), get_setting("ORDER_DB"))
+
+@perf.timed()
+def get_data():
+    """The shared cached frame for the current data version (no copy: read-only, see core.py)"""
+    try:
+        return _flag_duplicates(get_store().load())
     except Exception as e:
-        print(f"❌ Error Loading CSV: {e}")
+        print(f"❌ Error Loading Orders: {e}")
         return pd.DataFrame()
 
+def _flag_duplicates(df):
+    """Builds the near-duplicate index for a new data version at load time (see dedupe.py)"""
+    try:
+        if not df.empty: dedupe.get_index(df)
+    except Exception as e:
+        print(f"❌ Duplicate Check Error: {e}")
+    return df
+
+def get_rollup():
+    """Pre-aggregated analytics cube for the current data version (see rollup.py)"""
+    return rollup.get_cube(get_store().load())
+
+def get_dish_index():
+    """Dish -> orders inverted index for the current data version (see menu.py)"""
+    return menu.get_dish_index(get_store().load())
+
+def get_backtest():
+    """Walk-forward scores of every forecast engine (see backtest.py); None if too little history"""
+    try:
+        return backtest.get_backtest(get_store().load())
+    except Exception as e:
+        print(f"❌ Backtest Error: {e}")
+        return None
+
+def get_forecast_model(engine=None):
+    """Fitted forecast model for the current data version (see forecasting.py); None if too little history.
+    Without an engine name, the best one from the backtest is used."""
+    try:
+        if engine is None:
+            engine = backtest.best_engine(get_backtest())
+        return forecasting.get_model(get_store().load(), engine)
+    except Exception as e:
+        print(f"❌ Forecast Error: {e}")
+        return None
+
+def get_order(order_id):
+    """One order as a Series, or None"""
+    try:
+        rows = get_store().get(order_id)
+        return rows.iloc[-1] if not rows.empty else None
+    except Exception as e:
+        print(f"❌ Error Loading Order: {e}")
+        return None
+
+def find_orders(query, limit=20):
+    """(order_id, label) matches for an ID prefix or customer/title text (see lookup.py)"""
+    try:
+        return lookup.get_lookup(get_store().load()).search(query, limit)
+    except Exception as e:
+        print(f"❌ Lookup Error: {e}")
+        return []
+
+def _customer_records(df, cids):
+    prof = core.customer_profiles(df)
+    return prof.loc[[c for c in cids if c in prof.index]].rename_axis('Customer_ID').reset_index().to_dict('records')
+
+def find_customers(query, limit=5):
+    """Profiles (name, phone, lifetime revenue, last order) of customers matching a name or phone (see customers.py)"""
+    try:
+        df = get_store().load()
+        core.customer_ids(df)  # resolves orders saved since the last call
+        return _customer_records(df, customers.find(query, limit))
+    except Exception as e:
+        print(f"❌ Customer Lookup Error: {e}")
+        return []
+
+def match_customer(name, phone=None):
+    """Profile of the existing customer a typed name/phone resolves to, or None"""
+    try:
+        df = get_store().load()
+        core.customer_ids(df)
+        cid = customers.match(name, phone)
+        records = _customer_records(df, [cid]) if cid else []
+        return records[0] if records else None
+    except Exception as e:
+        print(f"❌ Customer Lookup Error: {e}")
+        return None
+
+def get_duplicates():
+    """Orders flagged as re-sent copies of an earlier one, with that original, minus dismissed pairs"""
+    try:
+        return dedupe.review(get_store().load())
+    except Exception as e:
+        print(f"❌ Duplicate Check Error: {e}")
+        return pd.DataFrame()
+
+def check_duplicate(order):
+    """(order_id, similarity) of saved orders that a new order (form/grid row) looks like a copy of"""
+    try:
+        return dedupe.get_index(get_store().load()).check(
+            order['Date'], order.get('Order_Title', ''), order.get('Details', ''), order.get('Pax') or 0)
+    except Exception as e:
+        print(f"❌ Duplicate Check Error: {e}")
+        return []
+
+def get_capacity_limits():
+    """(staff pool, kitchen pax per day) from the STAFF_POOL / KITCHEN_PAX settings"""
+    return (int(get_setting("STAFF_POOL", capacity.STAFF_POOL)), int(get_setting("KITCHEN_PAX", capacity.KITCHEN_PAX)))
+
+def get_capacity_outlook(start, days=60):
+    """Booked vs expected daily staff/pax load from `start`, with overbooked days flagged (see capacity.py)"""
+    try:
+        pool, kitchen = get_capacity_limits()
+        return core.capacity_outlook(get_store().load(), pd.Timestamp(start), days, pool, kitchen)
+    except Exception as e:
+        print(f"❌ Capacity Error: {e}")
+        return pd.DataFrame()
+
+def get_chart_budget():
+    """Max rows any one Analytics chart sends to the browser (CHART_MAX_ROWS setting, see charts.py)"""
+    import charts  # pulls in Altair: only from the tabs that draw charts
+    return max(2, int(get_setting("CHART_MAX_ROWS", charts.MAX_ROWS)))
+
+def get_chart_payloads():
+    """Rows and serialized bytes of every chart built (see charts.py)"""
+    import charts
+    return charts.get_payload_stats()
+
+def get_load_stats():
+    """Hit/miss counters for the data cache"""
+    return storage.get_load_stats()
+
+def get_llm_cache_stats():
+    """Hit/miss counters and latencies for the AI response cache"""
+    return llm_cache.get_cache_stats()
+
 # --- 4. CRUD HELPERS ---
-def delete_order(row_id):
+def add_order(new_data):
     try:
-        df_raw = pd.read_csv('cleaned_revenue_data.csv', encoding='utf-8', engine='python', quotechar='"')
-        if row_id in df_raw.index:
-            df_raw = df_raw.drop(row_id)
-            df_raw.to_csv('cleaned_revenue_data.csv', index=False)
+        return True, get_store().insert(new_data)
+    except Exception as e: return False, str(e)
+
+def add_orders(rows):
+    """Saves several orders; returns (saved_ids, errors)"""
+    saved, errors = [], []
+    for row in rows:
+        ok, msg = add_order(row)
+        (saved if ok else errors).append(msg)
+    return saved, errors
+
+def delete_order(order_id):
+    try:
+        if get_store().delete(order_id):
             return True, "Deleted."
         return False, "ID not found."
     except Exception as e: return False, str(e)
 
-def update_order(row_id, updated_data):
+def update_order(order_id, updated_data):
     try:
-        df_raw = pd.read_csv('cleaned_revenue_data.csv', encoding='utf-8', engine='python', quotechar='"')
-        if row_id in df_raw.index:
-            for key, value in updated_data.items():
-                df_raw.at[row_id, key] = value
-            df_raw.to_csv('cleaned_revenue_data.csv', index=False)
+        if get_store().update(order_id, updated_data):
             return True, "Updated."
         return False, "ID not found."
     except Exception as e: return False, str(e)
 
+# Fields a merge copies from the duplicate when the original has them blank
+MERGE_COLS = ['Customer_Name', 'Phone_Number', 'Location', 'Pax', 'Pramusaji', 'Revenue']
+
+def _blank(v):
+    return pd.isna(v) or str(v).strip() in ("", "0", "0.0", "nan", "Unknown")
+
+def merge_duplicate(order_id, original_id):
+    """Fills the original's blank fields from its duplicate, then deletes the duplicate"""
+    try:
+        store = get_store()
+        copy, orig = store.get(order_id), store.get(original_id)
+        if copy.empty or orig.empty:
+            return False, "ID not found."
+        copy, orig = copy.iloc[-1], orig.iloc[-1]
+        fill = {c: getattr(copy[c], 'item', lambda: copy[c])() for c in MERGE_COLS
+                if c in copy.index and _blank(orig[c]) and not _blank(copy[c])}
+        if fill:
+            store.update(original_id, fill)
+        store.delete(order_id)
+        return True, f"Merged into {original_id}" + (f" ({', '.join(fill)} filled in)." if fill else ".")
+    except Exception as e: return False, str(e)
+
+def dismiss_duplicate(order_id, original_id):
+    """Marks two flagged orders as separate bookings so they're not flagged again"""
+    try:
+        dedupe.dismiss(order_id, original_id)
+        return True, "Kept both."
+    except Exception as e: return False, str(e)
+
+def compact_orders():
+    """Folds the journal into the base CSV (also runs automatically in the background)"""
+    try:
+        return True, f"Compacted {get_store().compact()} changes."
+    except Exception as e: return False, str(e)
+
 def mask_phone_number(phone):
     s = str(phone)
     if len(s) > 4: return "*" * (len(s) - 4) + s[-4:]
-    return s
\ No newline at end of file
+    return s
+
+def mask_phone_numbers(phones):
+    """mask_phone_number() over a whole column at once"""
+    return phones.fillna('').astype(str).str.replace(r'.(?=.{4})', '*', regex=True)
\ No newline at end of file
@@ -0,0 +1,213 @@
+"""
+Bulk WhatsApp order extraction.
+
+An exported chat (Android "12/03/2024, 14:05 - Name: text" or iOS
+"[12/03/2024, 14:05:33] Name: text") is split into messages, bursts from the
+same sender are merged, and messages that look like orders are sent to the LLM
+concurrently. Requests go through one pooled AsyncOpenAI client living on a
+background event loop, bounded by a semaphore and a token-bucket rate limit,
+and retried with exponential backoff on 429s, timeouts and 5xx errors.
+
+Point OPENAI_BASE_URL at bench/stub_openai.py to run it without the real API.
+"""
+import re
+import json
+import time
+import random
+import asyncio
+import threading
+import concurrent.futures
+from datetime import datetime, timedelta
+
+
+MODEL = "gpt-4o-mini"
+EVENT_TYPES = ["Wedding", "Corporate", "Packet", "Buffet", "Other"]
+
+# --- 1. PROMPT (shared with the single-message autofill) ---
+def build_prompt(text_input):
+    return f"""
+        Extract catering order details into JSON.
+        Fields:
+        - Date (YYYY-MM-DD)
+        - Customer_Name (Person's Name)
+        - Phone_Number (digits only)
+        - Order_Title (Event Name)
+        - Pax (Integer)
+        - Staff_Count (Integer, default 0)
+        - Event_Type ({', '.join(EVENT_TYPES)})
+        - Location (City/Area)
+        - Menu_Items (List of food items)
+        - Total_Price (Float, total contract value)
+
+        Text: "{text_input}"
+        Return ONLY valid JSON.
+        """
+
+def parse_reply(content):
+    """Model reply -> dict (raises ValueError on anything that isn't a JSON object)"""
+    data = json.loads(content.replace("```json", "").replace("```", ""))
+    if not isinstance(data, dict):
+        raise ValueError("reply is not a JSON object")
+    return data
+
+# --- 2. CHAT SPLITTING ---
+_HEADER = re.compile(
+    r"^‎?\[?(\d{1,2}/\d{1,2}/\d{2,4}),?\s+(\d{1,2}[:.]\d{2})(?::\d{2})?\s*([ap]\.?m\.?)?\]?\s*(?:-\s*)?([^:]{1,60}?):\s?(.*)$",
+    re.I)
+_SKIP = re.compile(r"<media omitted>|image omitted|sticker omitted|this message was deleted|messages and calls are end-to-end", re.I)
+_ORDER_HINT = re.compile(r"\b(?:\d+\s*(?:pax|org|orang|bungkus|pek)|tempah\w*|order|menu|majlis|kenduri|tarikh|rm\s?\d|nasi|catering)\b", re.I)
+MIN_ORDER_CHARS = 25
+BURST_MINUTES = 10  # consecutive messages from one sender within this window are one order
+
+def _stamp(date_s, time_s, ampm):
+    d, m, y = date_s.split('/')
+    y = int(y) + 2000 if len(y) == 2 else int(y)
+    hh, mm = re.split(r"[:.]", time_s)
+    hh = int(hh)
+    if ampm:
+        pm = ampm.lower().startswith('p')
+        hh = hh % 12 + (12 if pm else 0)
+    try:
+        return datetime(y, int(m), int(d), hh, int(mm))
+    except ValueError:
+        return None
+
+def split_chat(text):
+    """Exported chat -> [{'sender', 'time', 'text'}], multi-line messages and same-sender bursts merged"""
+    messages = []
+    for line in text.splitlines():
+        m = _HEADER.match(line)
+        if m:
+            date_s, time_s, ampm, sender, body = m.groups()
+            messages.append({'sender': sender.strip(), 'time': _stamp(date_s, time_s, ampm), 'text': body})
+        elif messages:
+            messages[-1]['text'] += "\n" + line
+        elif line.strip():
+            messages.append({'sender': "", 'time': None, 'text': line})
+
+    merged = []
+    for msg in messages:
+        if _SKIP.search(msg['text']):
+            continue
+        prev = merged[-1] if merged else None
+        if (prev and prev['sender'] == msg['sender'] and prev['time'] and msg['time']
+                and msg['time'] - prev['last'] <= timedelta(minutes=BURST_MINUTES)):
+            prev['text'] += "\n" + msg['text']
+            prev['last'] = msg['time']
+        else:
+            merged.append({**msg, 'last': msg['time']})
+    return [{'sender': m['sender'], 'time': m['time'], 'text': m['text'].strip()} for m in merged]
+
+def candidate_orders(text):
+    """Messages from an exported chat (or plain text blocks separated by blank lines) that look like orders"""
+    messages = split_chat(text)
+    if not any(m['sender'] for m in messages):
+        # Not a chat export: treat blank-line separated blocks as messages
+        messages = [{'sender': "", 'time': None, 'text': b.strip()} for b in re.split(r"\n\s*\n", text) if b.strip()]
+    return [m for m in messages if len(m['text']) >= MIN_ORDER_CHARS and _ORDER_HINT.search(m['text'])]
+
+# --- 3. RATE LIMITING ---
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+# --- 4. BACKGROUND LOOP & CLIENT ---
+_LOOP = {"loop": None, "thread": None}
+_CLIENTS = {}
+_LOCK = threading.Lock()
+
+def _loop():
+    """One event loop per process, running in a daemon thread (Streamlit's script thread stays free)"""
+    with _LOCK:
+        if _LOOP["loop"] is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="ai-extract-loop", daemon=True)
+            thread.start()
+            _LOOP.update(loop=loop, thread=thread)
+        return _LOOP["loop"]
+
+def get_async_client(api_key, base_url=None, timeout=30.0):
+    """Pooled AsyncOpenAI client, reused across batches (retries are handled here, not by the SDK)"""
+    from openai import AsyncOpenAI  # the SDK is only imported once a batch actually runs
+    key = (api_key, base_url)
+    with _LOCK:
+        if key not in _CLIENTS:
+            _CLIENTS[key] = AsyncOpenAI(api_key=api_key, base_url=base_url or None, timeout=timeout, max_retries=0)
+        return _CLIENTS[key]
+
+# --- 5. CONCURRENT EXTRACTION ---
+def retryable_errors():
+    from openai import RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
+    return (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+def _retry_after(err):
+    try:
+        return float(err.response.headers.get("retry-after"))
+    except Exception:
+        return None
+
+async def _extract_one(client, text, sem, bucket, stats, retries, backoff):
+    async with sem:
+        for attempt in range(retries + 1):
+            await bucket.acquire()
+            try:
+                resp = await client.chat.completions.create(
+                    model=MODEL, messages=[{"role": "user", "content": build_prompt(text)}], temperature=0)
+                return parse_reply(resp.choices[0].message.content), None
+            except retryable_errors() as e:
+                if attempt == retries:
+                    return None, f"{type(e).__name__}: {e}"
+                stats["retries"] += 1
+                delay = _retry_after(e) or backoff * (2 ** attempt)
+                await asyncio.sleep(delay * (0.5 + random.random()))
+            except Exception as e:
+                return None, f"{type(e).__name__}: {e}"
+
+async def _extract_all(client, texts, concurrency, rpm, stats, retries, backoff):
+    sem = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rpm / 60.0, capacity=concurrency)
+
+    async def one(text):
+        result = await _extract_one(client, text, sem, bucket, stats, retries, backoff)
+        stats["completed"] += 1
+        return result
+    return await asyncio.gather(*(one(t) for t in texts))
+
+def extract_batch(texts, api_key, base_url=None, concurrency=8, rpm=120, retries=4, backoff=1.0, progress=None):
+    """
+    Extracts every text concurrently. Returns ([(data or None, error or None)], stats),
+    in input order. `progress(done, total)` is called from the calling thread.
+    """
+    stats = {"completed": 0, "retries": 0, "seconds": 0.0}
+    if not texts:
+        return [], stats
+    client = get_async_client(api_key, base_url)
+    t0 = time.perf_counter()
+    fut = asyncio.run_coroutine_threadsafe(
+        _extract_all(client, list(texts), int(concurrency), float(rpm), stats, retries, backoff), _loop())
+    while True:
+        try:
+            results = fut.result(timeout=0.25)
+            break
+        except concurrent.futures.TimeoutError:  # only an alias of the builtin from Python 3.11
+            if progress: progress(stats["completed"], len(texts))
+    if progress: progress(len(texts), len(texts))
+    stats["seconds"] = time.perf_counter() - t0
+    return results, stats